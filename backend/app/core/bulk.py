@@ -0,0 +1,117 @@
+"""
+Bulk ingestion for list-style records (offline replays, wearable imports).
+
+Bodies are a JSON array or NDJSON (one object per line, Content-Type application/x-ndjson),
+read incrementally and capped at BULK_MAX_ROWS rows / BULK_MAX_BYTES. Each row is validated
+on its own; valid rows go in with one executemany INSERT, invalid ones are reported by index.
+
+    python -m benchmarks.bulk_ingest [--rows N]   # rows/sec: bulk vs one request per row
+"""
+import json
+import os
+from datetime import datetime, timezone
+from typing import TypeVar
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "1000"))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", str(5 * 1024 * 1024)))
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def utc_naive(value: datetime | None) -> datetime | None:
+    """Timestamps are stored as naive UTC; convert client-supplied aware ones."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(413, detail)
+
+
+def _row_error(index: int, e: Exception) -> dict:
+    if isinstance(e, ValidationError):
+        msgs = [f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors()]
+    else:
+        msgs = [str(e)]
+    return {"index": index, "errors": msgs}
+
+
+async def _ndjson_lines(request: Request):
+    received = 0
+    buffer = b""
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > BULK_MAX_BYTES:
+            raise _too_large(f"Body exceeds {BULK_MAX_BYTES} bytes")
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def read_rows(request: Request, schema: type[T]) -> tuple[list[tuple[int, T]], list[dict], int]:
+    """
+    Parse and validate a bulk body. Returns ([(index, row)], [{"index", "errors"}], received).
+    413 when the body has more than BULK_MAX_ROWS rows, 400 when a JSON array body is malformed.
+    """
+    valid: list[tuple[int, T]] = []
+    errors: list[dict] = []
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        index = -1
+        async for line in _ndjson_lines(request):
+            index += 1
+            if index >= BULK_MAX_ROWS:
+                raise _too_large(f"At most {BULK_MAX_ROWS} rows per request")
+            try:
+                valid.append((index, schema.model_validate_json(line)))
+            except ValidationError as e:
+                errors.append(_row_error(index, e))
+        return valid, errors, index + 1
+    body = await request.body()
+    if len(body) > BULK_MAX_BYTES:
+        raise _too_large(f"Body exceeds {BULK_MAX_BYTES} bytes")
+    try:
+        items = json.loads(body)
+    except json.JSONDecodeError:
+        raise HTTPException(400, "Body must be a JSON array or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(400, "Body must be a JSON array or NDJSON")
+    if len(items) > BULK_MAX_ROWS:
+        raise _too_large(f"At most {BULK_MAX_ROWS} rows per request")
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            errors.append(_row_error(index, e))
+    return valid, errors, len(items)
+
+
+async def insert_rows(db: AsyncSession, model, rows: list[dict]) -> list[int]:
+    """One executemany INSERT (batched into multi-row VALUES by SQLAlchemy); ids in row order."""
+    if not rows:
+        return []
+    result = await db.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+    return list(result.scalars())
+
+
+def bulk_result(received: int, indexes: list[int], ids: list[int], errors: list[dict]) -> dict:
+    """ids is aligned with the request rows: the new id, or None where errors has the reason."""
+    by_index = dict(zip(indexes, ids))
+    return {
+        "received": received,
+        "inserted": len(ids),
+        "ids": [by_index.get(i) for i in range(received)],
+        "errors": sorted(errors, key=lambda e: e["index"]),
+    }
+
@@ -1,39 +1,86 @@
-"""FastAPI dependencies: get current user from JWT."""
-from fastapi import Depends, HTTPException, status
+"""FastAPI dependencies: get current user from JWT, the caller's local date."""
+import os
+import time
+from datetime import date, datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
+from app.core.cache import TTLCache
 from app.core.security import decode_access_token
 
 security = HTTPBearer(auto_error=False)
 
+# Decoded tokens and user rows are cached per process. Writes through this API call
+# invalidate_user(); other workers see a change within AUTH_CACHE_TTL_SECONDS.
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+_token_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)  # token -> user_id | None
+_user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)  # user_id -> detached User
+
+
+def _token_user_id(token: str) -> int | None:
+    """User id from a JWT `sub` claim, None when the token is invalid or expired."""
+    cached = _token_cache.get(token, default=False)
+    if cached is not False:
+        return cached
+    payload = decode_access_token(token)
+    user_id = payload.get("sub") if payload else None
+    if isinstance(user_id, str) and user_id.isdigit():
+        user_id = int(user_id)
+    elif not isinstance(user_id, int):
+        user_id = None
+    ttl = None
+    if payload and isinstance(payload.get("exp"), (int, float)):
+        ttl = payload["exp"] - time.time()
+    _token_cache.set(token, user_id, ttl=ttl)
+    return user_id
+
+
+async def _load_user(db: AsyncSession, user_id: int) -> User | None:
+    """User snapshot, detached from the session so it can be shared between requests."""
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+    user = await db.get(User, user_id)
+    if user is None:
+        return None
+    db.expunge(user)
+    _user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop the cached snapshot after a user row changes."""
+    _user_cache.pop(user_id)
+
 
-def get_current_user(
+def auth_cache_stats() -> dict:
+    return {"tokens": _token_cache.stats(), "users": _user_cache.stats()}
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> User:
+    """Authenticated, active user. Returned detached: reload it via db.get() before modifying."""
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    payload = decode_access_token(credentials.credentials)
-    if not payload or "sub" not in payload:
+    user_id = _token_user_id(credentials.credentials)
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
-    user_id = payload.get("sub")
-    if isinstance(user_id, str) and user_id.isdigit():
-        user_id = int(user_id)
-    elif not isinstance(user_id, int):
-        user_id = None
-    if user_id is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await _load_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -41,16 +88,24 @@ def get_current_user(
     return user
 
 
-def get_current_user_optional(
+async def get_current_user_optional(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> User | None:
     if not credentials:
         return None
-    payload = decode_access_token(credentials.credentials)
-    if not payload or "sub" not in payload:
+    user_id = _token_user_id(credentials.credentials)
+    if user_id is None:
         return None
-    user_id = payload.get("sub")
-    if isinstance(user_id, str) and user_id.isdigit():
-        user_id = int(user_id)
-    return db.query(User).filter(User.id == user_id, User.is_active == True).first()
+    user = await _load_user(db, user_id)
+    return user if user and user.is_active else None
+
+
+def local_date(
+    tz: str = Query("UTC", max_length=64, description="IANA timezone name, e.g. Asia/Kolkata"),
+) -> date:
+    """Today's date in the caller's timezone."""
+    try:
+        return datetime.now(ZoneInfo(tz)).date()
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
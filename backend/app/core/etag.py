@@ -0,0 +1,27 @@
+"""ETag / If-None-Match for JSON documents that clients poll."""
+import hashlib
+import json
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+def _matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def etag_response(request: Request, payload, cache_control: str = "private, no-cache") -> Response:
+    """
+    Serialize `payload` once; the ETag is a hash of those bytes. A matching If-None-Match gets
+    an empty 304, so unchanged data costs no body. no-cache makes clients revalidate each time.
+    """
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":"), ensure_ascii=False).encode()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,41 @@
+"""Lightweight in-process metrics for /admin/metrics."""
+import threading
+from collections import deque
+
+
+class LatencyStats:
+    """Call/error counters plus a rolling window of recent latencies for percentiles."""
+
+    def __init__(self, window: int = 1024):
+        self._window: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms: float, ok: bool = True) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            if not ok:
+                self.errors += 1
+            self._window.append(ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._window)
+            count, errors, total = self.count, self.errors, self.total_ms
+
+        def pct(p: float) -> float | None:
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 1)
+
+        return {
+            "count": count,
+            "errors": errors,
+            "avg_ms": round(total / count, 1) if count else None,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+        }
@@ -0,0 +1,116 @@
+"""Keyset (cursor) pagination and column projection for list endpoints."""
+import base64
+import json
+from datetime import date, datetime
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, false, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Query params shared by list endpoints: ?cursor=&limit=&fields=a,b,c"""
+
+    def __init__(
+        self,
+        cursor: str | None = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} response header"),
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+        fields: str | None = Query(None, description="Comma-separated columns to return"),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.fields = fields
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, (datetime, date)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_columns: list) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(key_columns):
+            raise ValueError("cursor shape")
+        out = []
+        for col, v in zip(key_columns, values):
+            if v is not None and col.type.python_type is datetime:
+                v = datetime.fromisoformat(v)
+            out.append(v)
+        return out
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def _columns(model, fields: str | None, key_columns: list, exclude: tuple[str, ...]) -> list:
+    """Requested column attributes (sort keys always included), validated against the model."""
+    allowed = {a.key: a for a in model.__mapper__.column_attrs if a.key not in exclude}
+    if not fields:
+        names = list(allowed)
+    else:
+        names = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [n for n in names if n not in allowed]
+        if unknown:
+            raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}")
+    for col in key_columns:
+        if col.key not in names:
+            names.append(col.key)
+    return [getattr(model, n) for n in dict.fromkeys(names)]
+
+
+def _order(col, descending: bool):
+    """NULL sorts as the smallest value on every backend (SQLite's default, not Postgres')."""
+    if descending:
+        return col.desc().nulls_last() if col.nullable else col.desc()
+    return col.asc().nulls_first() if col.nullable else col.asc()
+
+
+def _beyond(col, value, descending: bool):
+    """col comes strictly after value in _order(col, descending)."""
+    if value is None:
+        return false() if descending else col.is_not(None)
+    cmp = col < value if descending else col > value
+    return or_(cmp, col.is_(None)) if descending and col.nullable else cmp
+
+
+def _after(key_columns: list, values: list, descending: bool):
+    """
+    Row-value comparison (a, b) < (x, y) spelled out so it works on every backend, with
+    NULLs (legacy rows without a timestamp) ordered as in _order; `col == None` is IS NULL.
+    """
+    clauses = []
+    for i, col in enumerate(key_columns):
+        cmp = _beyond(col, values[i], descending)
+        clauses.append(and_(*[key_columns[j] == values[j] for j in range(i)], cmp))
+    return or_(*clauses)
+
+
+async def paginate(
+    db: AsyncSession,
+    response: Response,
+    model,
+    *criteria,
+    order_by: tuple,
+    page: PageParams,
+    descending: bool = True,
+    exclude: tuple[str, ...] = (),
+) -> list[dict]:
+    """
+    One page of `model` rows as dicts, ordered by the `order_by` key columns (last one
+    must be unique, e.g. id). Sets X-Next-Cursor when more rows exist.
+    """
+    key_columns = list(order_by)
+    stmt = select(*_columns(model, page.fields, key_columns, exclude)).where(*criteria)
+    if page.cursor:
+        stmt = stmt.where(_after(key_columns, decode_cursor(page.cursor, key_columns), descending))
+    stmt = stmt.order_by(*[_order(c, descending) for c in key_columns]).limit(page.limit + 1)
+    rows = [dict(r._mapping) for r in (await db.execute(stmt)).all()]
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([rows[-1][c.key] for c in key_columns])
+    return rows
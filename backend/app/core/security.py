@@ -1,14 +1,32 @@
 """JWT and password hashing for auth."""
+import asyncio
+import multiprocessing
 import os
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Raising BCRYPT_ROUNDS upgrades existing hashes on each user's next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "10080"))
 
+# bcrypt runs in a dedicated process pool so login spikes don't starve the API.
+# 0 workers = run in the event loop's default thread pool instead.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+_executor: Executor | None = None
+_pending = 0
+_rejected = 0
+
+
+class PasswordHasherBusy(Exception):
+    """Hashing queue is full; the caller should answer 503."""
+
 
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
@@ -18,6 +36,59 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """(valid, new_hash); new_hash is set when the stored hash uses outdated settings."""
+    return pwd_context.verify_and_update(plain, hashed)
+
+
+def _get_executor() -> Executor | None:
+    global _executor
+    if _executor is None and PASSWORD_HASH_WORKERS > 0:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+async def _run_hasher(fn, *args):
+    global _pending, _rejected
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        _rejected += 1
+        raise PasswordHasherBusy()
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hasher(get_password_hash, password)
+
+
+async def verify_and_update_password_async(plain: str, hashed: str) -> tuple[bool, str | None]:
+    return await _run_hasher(verify_and_update_password, plain, hashed)
+
+
+def shutdown_password_hasher() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def password_hasher_stats() -> dict:
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "pending": _pending,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        "rejected": _rejected,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+    }
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=EXPIRE_MINUTES)
@@ -1,25 +1,95 @@
 """
-ArogyaMitra - SQLite database with SQLAlchemy ORM.
+ArogyaMitra - SQLite (default) or Postgres database with SQLAlchemy ORM.
 """
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./arogyamitra.db")
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Engine profile - tune via env. Pool settings apply to server databases (Postgres);
+# the SQLite pragmas apply to every new SQLite connection.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:"))
+
+
+def _async_url(url: str) -> str:
+    """Map DATABASE_URL onto its asyncio driver (aiosqlite / asyncpg)."""
+    scheme, sep, rest = url.partition("://")
+    base = scheme.split("+", 1)[0]
+    if base == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if base in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+def _engine_options(url: str) -> dict:
+    """create_engine kwargs for the configured backend."""
+    if url.startswith("sqlite"):
+        # SQLite needs check_same_thread=False for FastAPI
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def _async_engine_options(url: str) -> dict:
+    """create_async_engine kwargs; aiosqlite would otherwise reopen a connection per session."""
+    if not url.startswith("sqlite"):
+        return _engine_options(url)
+    if _is_sqlite_memory(url):
+        return {}
+    return {"poolclass": AsyncAdaptedQueuePool}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """WAL lets readers run alongside the single writer; NORMAL sync is safe under WAL."""
+    cursor = dbapi_connection.cursor()
+    try:
+        if not _is_sqlite_memory(DATABASE_URL):
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
 
-# SQLite needs check_same_thread=False for FastAPI
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args["check_same_thread"] = False
 
 engine = create_engine(
     DATABASE_URL,
-    connect_args=connect_args,
     echo=os.getenv("DEBUG", "false").lower() == "true",
+    **_engine_options(DATABASE_URL),
+)
+# Async engine for request handlers; the sync engine above serves init_db and scripts.
+async_engine = create_async_engine(
+    _async_url(DATABASE_URL),
+    echo=os.getenv("DEBUG", "false").lower() == "true",
+    **_async_engine_options(DATABASE_URL),
 )
+if IS_SQLITE:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: handlers return ORM objects after commit without lazy reloads
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 
@@ -32,57 +102,37 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Async dependency for FastAPI routes."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def close_db():
+    """Release pooled connections. Call on shutdown."""
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def _pool_stats(pool) -> dict:
+    stats = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            stats[name] = fn()
+    return stats
+
+
+def get_pool_stats() -> dict:
+    """Connection pool counters for monitoring."""
+    return {
+        "backend": engine.dialect.name,
+        "sync": _pool_stats(engine.pool),
+        "async": _pool_stats(async_engine.pool),
+    }
+
+
 def init_db():
-    """Create all tables. Call on startup."""
-    from app.models import user, workout, nutrition, progress, health, chat  # noqa: F401
-    Base.metadata.create_all(bind=engine)
-    # SQLite migrations: add columns/tables if missing
-    if DATABASE_URL.startswith("sqlite"):
-        with engine.connect() as conn:
-            r = conn.execute(text("SELECT 1 FROM pragma_table_info('workout_plans') WHERE name='plan_data'"))
-            if r.fetchone() is None:
-                conn.execute(text("ALTER TABLE workout_plans ADD COLUMN plan_data TEXT"))
-                conn.commit()
-            # Meals: add nutrition_plan_id and day_of_week if missing
-            r2 = conn.execute(text("SELECT 1 FROM pragma_table_info('meals') WHERE name='nutrition_plan_id'"))
-            if r2.fetchone() is None:
-                try:
-                    conn.execute(text("ALTER TABLE meals ADD COLUMN nutrition_plan_id INTEGER REFERENCES nutrition_plans(id)"))
-                except Exception:
-                    conn.execute(text("ALTER TABLE meals ADD COLUMN nutrition_plan_id INTEGER"))
-                conn.commit()
-            r3 = conn.execute(text("SELECT 1 FROM pragma_table_info('meals') WHERE name='day_of_week'"))
-            if r3.fetchone() is None:
-                conn.execute(text("ALTER TABLE meals ADD COLUMN day_of_week VARCHAR(20)"))
-                conn.commit()
-            # Health assessments: add optional columns if missing
-            for col, ctype in [
-                ("age", "INTEGER"), ("gender", "VARCHAR(20)"), ("height_cm", "REAL"),
-                ("weight_kg", "REAL"), ("bmi", "REAL"), ("bmi_category", "VARCHAR(50)"),
-                ("health_conditions", "TEXT"), ("injuries", "TEXT"), ("sleep_hours", "REAL"),
-                ("stress_level", "VARCHAR(50)"), ("activity_level", "VARCHAR(50)"),
-                ("fitness_goal", "VARCHAR(100)"), ("fitness_level", "VARCHAR(50)"),
-                ("workout_preference", "VARCHAR(50)"), ("workout_time_preference", "VARCHAR(50)"),
-                ("dietary_preference", "VARCHAR(100)"), ("notes", "TEXT")
-            ]:
-                r = conn.execute(text(f"SELECT 1 FROM pragma_table_info('health_assessments') WHERE name='{col}'"))
-                if r.fetchone() is None:
-                    conn.execute(text(f"ALTER TABLE health_assessments ADD COLUMN {col} {ctype}"))
-            
-            # Workout plans: add additional columns
-            for col, ctype in [
-                ("difficulty", "VARCHAR(50)"), ("duration_minutes", "INTEGER"), ("plan_data", "TEXT")
-            ]:
-                r = conn.execute(text(f"SELECT 1 FROM pragma_table_info('workout_plans') WHERE name='{col}'"))
-                if r.fetchone() is None:
-                    conn.execute(text(f"ALTER TABLE workout_plans ADD COLUMN {col} {ctype}"))
-
-            # Workouts: add columns
-            for col, ctype in [
-                ("completed_at", "DATETIME"), ("duration_minutes", "INTEGER"), ("notes", "TEXT")
-            ]:
-                r = conn.execute(text(f"SELECT 1 FROM pragma_table_info('workouts') WHERE name='{col}'"))
-                if r.fetchone() is None:
-                    conn.execute(text(f"ALTER TABLE workouts ADD COLUMN {col} {ctype}"))
-            
-            conn.commit()
+    """Bring the schema up to the latest migration. Call on startup."""
+    from app.migrations import run_migrations
+    run_migrations(engine)
@@ -4,10 +4,15 @@ ArogyaMitra - FastAPI backend entry point.
 import os
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.database import init_db
+from app.database import init_db, close_db
+from app.core.security import PasswordHasherBusy, shutdown_password_hasher
+from app.services.ai_agent import close_ai_client
+from app.services.plan_jobs import start_plan_workers, stop_plan_workers
+from app.services.http_client import close_http_client
 from app.routers import (
     auth,
     workouts,
@@ -17,6 +22,8 @@ from app.routers import (
     aromi,
     calendar,
     admin,
+    achievements,
+    dashboard,
 )
 
 load_dotenv()
@@ -28,8 +35,13 @@ CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost
 async def lifespan(app: FastAPI):
     """Startup: init DB. Shutdown: cleanup if needed."""
     init_db()
+    await start_plan_workers()
     yield
-    # Shutdown cleanup if any
+    await stop_plan_workers()
+    shutdown_password_hasher()
+    await close_ai_client()
+    await close_http_client()
+    await close_db()
 
 
 app = FastAPI(
@@ -45,8 +57,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Location", "ETag"],
 )
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    """Fail fast instead of queueing more bcrypt work behind a login spike."""
+    return JSONResponse(status_code=503, content={"detail": "Server busy, please retry"}, headers={"Retry-After": "1"})
+
+
 # Modular routers
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(workouts.router, prefix="/workouts", tags=["workouts"])
@@ -56,6 +75,8 @@ app.include_router(health.router, prefix="/health", tags=["health"])
 app.include_router(aromi.router, prefix="/aromi", tags=["ai-coach"])
 app.include_router(calendar.router, prefix="/calendar", tags=["calendar"])
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
+app.include_router(achievements.router, prefix="/achievements", tags=["achievements"])
+app.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 
 
 @app.get("/")
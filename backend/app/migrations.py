@@ -0,0 +1,699 @@
+"""
+Versioned schema migrations.
+
+Startup reads the schema version with a single query. Pending steps run under a
+database-wide lock (BEGIN IMMEDIATE on SQLite, an advisory lock on Postgres), so
+workers starting together apply each step exactly once.
+Add new steps to MIGRATIONS with the next version number; never edit applied ones.
+"""
+import json
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    bindparam,
+    inspect,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = "schema_version"
+_PG_LOCK_KEY = 720_514_001  # arbitrary, app-wide advisory lock id
+_SQLITE_LOCK_WAIT_MS = 60_000
+
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl_type: str) -> None:
+    if not _has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+# Each step defines the tables it creates as they were when it was written, on its own
+# MetaData: app.models describes the latest schema, and a later model change must not
+# change what an old step does. Foreign keys to tables created earlier point at stubs.
+
+def _frozen(*referenced: str) -> MetaData:
+    metadata = MetaData()
+    for name in referenced:
+        Table(name, metadata, Column("id", Integer, primary_key=True))
+    return metadata
+
+
+def _create_tables(conn: Connection, *tables: Table) -> None:
+    for table in tables:
+        table.create(bind=conn, checkfirst=True)
+
+
+def _create_indexes(conn: Connection, indexes: list[tuple[str, str, str]], unique: bool = False) -> None:
+    for name, table, columns in indexes:
+        conn.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _day_sql(dialect: str, column: str, period: str = "day") -> str:
+    """SQL for the UTC day / week (starting Monday) of a timestamp, stored like Python datetimes."""
+    if dialect == "sqlite":
+        modifiers = ", '-6 days', 'weekday 1'" if period == "week" else ""
+        return f"strftime('%Y-%m-%d 00:00:00.000000', {column}{modifiers})"
+    return f"date_trunc('{period}', {column})"
+
+
+def _json(value):
+    """A JSON column read through text(): a string on SQLite, already decoded on Postgres."""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _m001_baseline(conn: Connection) -> None:
+    """Tables plus the columns older SQLite databases were created without."""
+    metadata = _frozen()
+    Table(
+        "users", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("email", String(255), unique=True, index=True, nullable=False),
+        Column("hashed_password", String(255), nullable=False),
+        Column("full_name", String(255), nullable=True),
+        Column("is_active", Boolean),
+        Column("is_admin", Boolean),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+    )
+    Table(
+        "workout_plans", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("name", String(255), nullable=False),
+        Column("description", Text, nullable=True),
+        Column("difficulty", String(50), nullable=True),
+        Column("duration_minutes", Integer, nullable=True),
+        Column("plan_data", JSON, nullable=True),
+        Column("created_at", DateTime),
+    )
+    Table(
+        "workouts", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("plan_id", Integer, ForeignKey("workout_plans.id"), nullable=True),
+        Column("name", String(255), nullable=False),
+        Column("exercises", JSON, nullable=True),
+        Column("completed_at", DateTime, nullable=True),
+        Column("duration_minutes", Integer, nullable=True),
+        Column("notes", Text, nullable=True),
+        Column("created_at", DateTime),
+    )
+    Table(
+        "nutrition_plans", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("name", String(255), nullable=False),
+        Column("description", Text, nullable=True),
+        Column("daily_calories", Float, nullable=True),
+        Column("protein_grams", Float, nullable=True),
+        Column("carbs_grams", Float, nullable=True),
+        Column("fat_grams", Float, nullable=True),
+        Column("dietary_type", String(100), nullable=True),
+        Column("is_active", Integer),
+        Column("created_at", DateTime),
+    )
+    Table(
+        "meals", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("nutrition_plan_id", Integer, ForeignKey("nutrition_plans.id"), nullable=True),
+        Column("name", String(255), nullable=False),
+        Column("meal_type", String(50), nullable=True),
+        Column("calories", Float, nullable=True),
+        Column("protein", Float, nullable=True),
+        Column("carbs", Float, nullable=True),
+        Column("fat", Float, nullable=True),
+        Column("ingredients", JSON, nullable=True),
+        Column("day_of_week", String(20), nullable=True),
+        Column("logged_at", DateTime),
+        Column("created_at", DateTime),
+    )
+    Table(
+        "nutrition_logs", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("date", DateTime, nullable=False),
+        Column("total_calories", Float, nullable=True),
+        Column("total_protein", Float, nullable=True),
+        Column("total_carbs", Float, nullable=True),
+        Column("total_fat", Float, nullable=True),
+        Column("notes", Text, nullable=True),
+        Column("created_at", DateTime),
+    )
+    Table(
+        "progress_entries", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("entry_type", String(50), nullable=False),
+        Column("value", Float, nullable=True),
+        Column("unit", String(20), nullable=True),
+        Column("metadata", JSON, nullable=True),
+        Column("notes", Text, nullable=True),
+        Column("recorded_at", DateTime),
+        Column("created_at", DateTime),
+    )
+    Table(
+        "health_assessments", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("age", Integer, nullable=True),
+        Column("gender", String(20), nullable=True),
+        Column("height_cm", Float, nullable=True),
+        Column("weight_kg", Float, nullable=True),
+        Column("bmi", Float, nullable=True),
+        Column("bmi_category", String(50), nullable=True),
+        Column("health_conditions", JSON, nullable=True),
+        Column("injuries", JSON, nullable=True),
+        Column("sleep_hours", Float, nullable=True),
+        Column("stress_level", String(50), nullable=True),
+        Column("activity_level", String(50), nullable=True),
+        Column("fitness_goal", String(100), nullable=True),
+        Column("fitness_level", String(50), nullable=True),
+        Column("workout_preference", String(50), nullable=True),
+        Column("workout_time_preference", String(50), nullable=True),
+        Column("dietary_preference", String(100), nullable=True),
+        Column("notes", Text, nullable=True),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+    )
+    Table(
+        "chat_sessions", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("title", String(255), nullable=True),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+    )
+    Table(
+        "chat_messages", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("session_id", Integer, ForeignKey("chat_sessions.id"), nullable=False),
+        Column("role", String(20), nullable=False),
+        Column("content", Text, nullable=False),
+        Column("created_at", DateTime),
+    )
+    metadata.create_all(bind=conn)
+    if conn.dialect.name != "sqlite":
+        return
+    _add_column(conn, "meals", "nutrition_plan_id", "INTEGER REFERENCES nutrition_plans(id)")
+    _add_column(conn, "meals", "day_of_week", "VARCHAR(20)")
+    for col, ctype in [
+        ("age", "INTEGER"), ("gender", "VARCHAR(20)"), ("height_cm", "REAL"),
+        ("weight_kg", "REAL"), ("bmi", "REAL"), ("bmi_category", "VARCHAR(50)"),
+        ("health_conditions", "TEXT"), ("injuries", "TEXT"), ("sleep_hours", "REAL"),
+        ("stress_level", "VARCHAR(50)"), ("activity_level", "VARCHAR(50)"),
+        ("fitness_goal", "VARCHAR(100)"), ("fitness_level", "VARCHAR(50)"),
+        ("workout_preference", "VARCHAR(50)"), ("workout_time_preference", "VARCHAR(50)"),
+        ("dietary_preference", "VARCHAR(100)"), ("notes", "TEXT"),
+    ]:
+        _add_column(conn, "health_assessments", col, ctype)
+    for col, ctype in [("difficulty", "VARCHAR(50)"), ("duration_minutes", "INTEGER"), ("plan_data", "TEXT")]:
+        _add_column(conn, "workout_plans", col, ctype)
+    for col, ctype in [("completed_at", "DATETIME"), ("duration_minutes", "INTEGER"), ("notes", "TEXT")]:
+        _add_column(conn, "workouts", col, ctype)
+
+
+def _m002_indexes(conn: Connection) -> None:
+    """Per-user composite indexes."""
+    _create_indexes(conn, [
+        ("ix_chat_sessions_user_updated", "chat_sessions", "user_id, updated_at"),
+        ("ix_chat_messages_session_created", "chat_messages", "session_id, created_at"),
+        ("ix_health_assessments_user_updated", "health_assessments", "user_id, updated_at"),
+        ("ix_nutrition_plans_user_created", "nutrition_plans", "user_id, created_at"),
+        ("ix_meals_user_logged", "meals", "user_id, logged_at"),
+        ("ix_meals_nutrition_plan", "meals", "nutrition_plan_id"),
+        ("ix_nutrition_logs_user_date", "nutrition_logs", "user_id, date"),
+        ("ix_progress_entries_user_recorded", "progress_entries", "user_id, recorded_at"),
+        ("ix_progress_entries_user_type_recorded", "progress_entries", "user_id, entry_type, recorded_at"),
+        ("ix_workout_plans_user_created", "workout_plans", "user_id, created_at"),
+        ("ix_workouts_user_created", "workouts", "user_id, created_at"),
+    ])
+
+
+def _m003_chat_summary(conn: Connection) -> None:
+    """Rolling conversation summary on chat sessions."""
+    _add_column(conn, "chat_sessions", "summary", "TEXT")
+    _add_column(conn, "chat_sessions", "summary_through_id", "INTEGER")
+
+
+def _m004_plan_jobs(conn: Connection) -> None:
+    """Background workout-plan generation jobs."""
+    plan_jobs = Table(
+        "plan_jobs", _frozen("users", "workout_plans"),
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("request_hash", String(64), nullable=False),
+        Column("status", String(20), nullable=False),
+        Column("params", JSON, nullable=True),
+        Column("result", JSON, nullable=True),
+        Column("error", Text, nullable=True),
+        Column("plan_id", Integer, ForeignKey("workout_plans.id"), nullable=True),
+        Column("attempts", Integer),
+        Column("created_at", DateTime),
+        Column("started_at", DateTime, nullable=True),
+        Column("finished_at", DateTime, nullable=True),
+        Index("ix_plan_jobs_user_created", "user_id", "created_at"),
+        Index("ix_plan_jobs_hash_status", "request_hash", "status"),
+    )
+    _create_tables(conn, plan_jobs)
+
+
+def _m005_plan_job_source(conn: Connection) -> None:
+    """Which engine (template or llm) produced a plan job."""
+    _add_column(conn, "plan_jobs", "source", "VARCHAR(20)")
+
+
+def _m006_exercise_videos(conn: Connection) -> None:
+    """Persistent exercise -> YouTube video cache."""
+    exercise_videos = Table(
+        "exercise_videos", _frozen(),
+        Column("id", Integer, primary_key=True, index=True),
+        Column("exercise_key", String(255), unique=True, index=True, nullable=False),
+        Column("video_id", String(32), nullable=True),
+        Column("title", String(255), nullable=True),
+        Column("channel", String(255), nullable=True),
+        Column("duration", String(32), nullable=True),
+        Column("fetched_at", DateTime, nullable=False),
+    )
+    _create_tables(conn, exercise_videos)
+
+
+INGREDIENTS_FTS = "ingredients_fts"
+
+
+def _m007_ingredients(conn: Connection) -> None:
+    """
+    Local ingredient table plus its word-prefix search index: an FTS5 table kept in sync
+    by triggers on SQLite, a pg_trgm GIN index on Postgres. Without either (SQLite built
+    without FTS5, no permission to create the extension) search falls back to LIKE.
+    """
+    ingredients = Table(
+        "ingredients", _frozen(),
+        Column("id", Integer, primary_key=True, index=True),
+        Column("name", String(255), nullable=False),
+        Column("name_key", String(255), unique=True, index=True, nullable=False),
+        Column("spoonacular_id", Integer, nullable=True, index=True),
+        Column("aisle", String(100), nullable=True),
+        Column("image", String(255), nullable=True),
+        Column("calories", Float, nullable=True),
+        Column("protein", Float, nullable=True),
+        Column("carbs", Float, nullable=True),
+        Column("fat", Float, nullable=True),
+        Column("fiber", Float, nullable=True),
+        Column("sugar", Float, nullable=True),
+        Column("sodium", Float, nullable=True),
+        Column("source", String(20), nullable=True),
+        Column("updated_at", DateTime),
+    )
+    _create_tables(conn, ingredients)
+    if conn.dialect.name == "postgresql":  # name_key LIKE 'prefix%' under any collation
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_ingredients_name_key_pattern ON ingredients (name_key text_pattern_ops)"
+        )
+    try:
+        with conn.begin_nested():
+            if conn.dialect.name == "sqlite":
+                conn.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {INGREDIENTS_FTS} USING fts5("
+                    "name, content='ingredients', content_rowid='id', "
+                    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+                conn.exec_driver_sql(
+                    "CREATE TRIGGER IF NOT EXISTS ingredients_fts_ai AFTER INSERT ON ingredients BEGIN "
+                    f"INSERT INTO {INGREDIENTS_FTS}(rowid, name) VALUES (new.id, new.name); END"
+                )
+                conn.exec_driver_sql(
+                    "CREATE TRIGGER IF NOT EXISTS ingredients_fts_ad AFTER DELETE ON ingredients BEGIN "
+                    f"INSERT INTO {INGREDIENTS_FTS}({INGREDIENTS_FTS}, rowid, name) VALUES ('delete', old.id, old.name); END"
+                )
+                conn.exec_driver_sql(
+                    "CREATE TRIGGER IF NOT EXISTS ingredients_fts_au AFTER UPDATE OF name ON ingredients BEGIN "
+                    f"INSERT INTO {INGREDIENTS_FTS}({INGREDIENTS_FTS}, rowid, name) VALUES ('delete', old.id, old.name); "
+                    f"INSERT INTO {INGREDIENTS_FTS}(rowid, name) VALUES (new.id, new.name); END"
+                )
+                conn.exec_driver_sql(f"INSERT INTO {INGREDIENTS_FTS}({INGREDIENTS_FTS}) VALUES ('rebuild')")
+            elif conn.dialect.name == "postgresql":
+                conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                conn.exec_driver_sql(
+                    "CREATE INDEX IF NOT EXISTS ix_ingredients_name_key_trgm ON ingredients USING gin (name_key gin_trgm_ops)"
+                )
+    except (OperationalError, ProgrammingError) as e:
+        logger.warning("Ingredient search index not created (%s); autocomplete will use LIKE", e)
+
+
+def _m008_api_cache(conn: Connection) -> None:
+    """Persistent third-party API response cache."""
+    api_cache = Table(
+        "api_cache", _frozen(),
+        Column("id", Integer, primary_key=True, index=True),
+        Column("key", String(64), unique=True, index=True, nullable=False),
+        Column("namespace", String(100), nullable=False),
+        Column("params", JSON, nullable=True),
+        Column("value", JSON, nullable=True),
+        Column("fetched_at", DateTime, nullable=False),
+    )
+    _create_tables(conn, api_cache)
+
+
+def _m009_nutrition_rollups(conn: Connection) -> None:
+    """Unique daily nutrition_logs rows with a meal count, backfilled from logged meals."""
+    _add_column(conn, "nutrition_logs", "meal_count", "INTEGER DEFAULT 0")
+    conn.execute(text(
+        "DELETE FROM nutrition_logs WHERE id NOT IN "
+        "(SELECT MIN(id) FROM nutrition_logs GROUP BY user_id, date)"
+    ))
+    conn.execute(text("DROP INDEX IF EXISTS ix_nutrition_logs_user_date"))
+    _create_indexes(conn, [("ix_nutrition_logs_user_date", "nutrition_logs", "user_id, date")], unique=True)
+    conn.execute(text(
+        "UPDATE nutrition_logs SET total_calories = 0, total_protein = 0, total_carbs = 0, total_fat = 0, meal_count = 0"
+    ))
+    day = _day_sql(conn.dialect.name, "logged_at")
+    totals = ("total_calories", "total_protein", "total_carbs", "total_fat", "meal_count")
+    conn.execute(text(
+        "INSERT INTO nutrition_logs (user_id, date, total_calories, total_protein, total_carbs, total_fat, meal_count, created_at) "
+        f"SELECT user_id, {day}, COALESCE(SUM(calories), 0), COALESCE(SUM(protein), 0), COALESCE(SUM(carbs), 0), "
+        "COALESCE(SUM(fat), 0), COUNT(*), CURRENT_TIMESTAMP "
+        f"FROM meals WHERE nutrition_plan_id IS NULL GROUP BY user_id, {day} "
+        "ON CONFLICT (user_id, date) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in totals)
+    ))
+
+
+def _m010_progress_series_index(conn: Connection) -> None:
+    """Covering (user_id, entry_type, recorded_at, value) index for progress time series."""
+    conn.execute(text("DROP INDEX IF EXISTS ix_progress_entries_user_type_recorded"))
+    _create_indexes(conn, [(
+        "ix_progress_entries_user_type_recorded_value", "progress_entries", "user_id, entry_type, recorded_at, value",
+    )])
+
+
+def _m011_int(value) -> int:
+    try:
+        return max(int(float(value)), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _m011_workout_stats(conn: Connection) -> None:
+    """Typed exercise completions backfilled from progress_entries JSON, plus their aggregates."""
+    metadata = _frozen("users", "progress_entries")
+    sums = ("sets", "reps", "duration_minutes", "calories_burned")
+    exercise_completions = Table(
+        "exercise_completions", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("progress_entry_id", Integer, ForeignKey("progress_entries.id"), nullable=True, index=True),
+        Column("exercise_name", String(255), nullable=False),
+        Column("exercise_key", String(255), nullable=False),
+        Column("plan_id", String(64), nullable=True),
+        *(Column(c, Integer, nullable=False) for c in sums),
+        Column("completed_at", DateTime, nullable=False),
+        Index("ix_exercise_completions_user_completed", "user_id", "completed_at"),
+        Index("ix_exercise_completions_user_exercise", "user_id", "exercise_key"),
+    )
+    workout_period_stats = Table(
+        "workout_period_stats", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("period", String(8), nullable=False),
+        Column("start", DateTime, nullable=False),
+        Column("completions", Integer, nullable=False),
+        *(Column(c, Integer, nullable=False) for c in sums),
+        Index("ix_workout_period_stats_user_period_start", "user_id", "period", "start", unique=True),
+    )
+    exercise_totals = Table(
+        "exercise_totals", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("exercise_key", String(255), nullable=False),
+        Column("exercise_name", String(255), nullable=False),
+        Column("completions", Integer, nullable=False),
+        *(Column(c, Integer, nullable=False) for c in sums),
+        Column("last_completed_at", DateTime, nullable=True),
+        Index("ix_exercise_totals_user_exercise", "user_id", "exercise_key", unique=True),
+    )
+    workout_user_stats = Table(
+        "workout_user_stats", metadata,
+        Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+        Column("completions", Integer, nullable=False),
+        *(Column(c, Integer, nullable=False) for c in sums),
+        Column("active_days", Integer, nullable=False),
+        Column("current_streak", Integer, nullable=False),
+        Column("longest_streak", Integer, nullable=False),
+        Column("last_active_date", DateTime, nullable=True),
+    )
+    _create_tables(conn, exercise_completions, workout_period_stats, exercise_totals, workout_user_stats)
+
+    result = conn.execute(
+        text(
+            "SELECT id, user_id, value, metadata, recorded_at FROM progress_entries "
+            "WHERE entry_type = 'workout_exercise' ORDER BY id"
+        ).columns(recorded_at=DateTime)
+    )
+    while batch := result.fetchmany(5000):
+        rows = []
+        for entry_id, user_id, sets, meta, recorded_at in batch:
+            data = _json(meta)
+            if not isinstance(data, dict):
+                data = {}
+            name = str(data.get("exercise_name") or "unknown")[:255]
+            plan_id = data.get("plan_id")
+            rows.append({
+                "user_id": user_id,
+                "progress_entry_id": entry_id,
+                "exercise_name": name,
+                "exercise_key": re.sub(r"\s+", " ", name.strip().lower())[:255],
+                "plan_id": str(plan_id)[:64] if plan_id not in (None, "") else None,
+                "sets": _m011_int(data["sets_completed"] if "sets_completed" in data else sets),
+                "reps": _m011_int(data.get("reps_completed")),
+                "duration_minutes": _m011_int(data.get("duration_minutes")),
+                "calories_burned": _m011_int(data.get("calories_burned")),
+                "completed_at": recorded_at or datetime.utcnow(),
+            })
+        conn.execute(exercise_completions.insert(), rows)
+
+    summed = ", ".join(f"COALESCE(SUM({c}), 0)" for c in sums)
+    for period in ("day", "week"):
+        start = _day_sql(conn.dialect.name, "completed_at", period)
+        conn.execute(text(
+            f"INSERT INTO workout_period_stats (user_id, period, start, completions, {', '.join(sums)}) "
+            f"SELECT user_id, '{period}', {start}, COUNT(*), {summed} FROM exercise_completions GROUP BY user_id, {start}"
+        ))
+    conn.execute(text(
+        f"INSERT INTO exercise_totals (user_id, exercise_key, exercise_name, completions, {', '.join(sums)}, last_completed_at) "
+        f"SELECT user_id, exercise_key, MAX(exercise_name), COUNT(*), {summed}, MAX(completed_at) "
+        "FROM exercise_completions GROUP BY user_id, exercise_key"
+    ))
+    conn.execute(text(
+        "UPDATE exercise_totals SET exercise_name = (SELECT c.exercise_name FROM exercise_completions c "
+        "WHERE c.user_id = exercise_totals.user_id AND c.exercise_key = exercise_totals.exercise_key "
+        "ORDER BY c.completed_at DESC, c.id DESC LIMIT 1)"
+    ))
+    conn.execute(text(
+        f"INSERT INTO workout_user_stats (user_id, completions, {', '.join(sums)}, active_days, current_streak, longest_streak) "
+        f"SELECT user_id, COUNT(*), {summed}, 0, 0, 0 FROM exercise_completions GROUP BY user_id"
+    ))
+
+    streaks: dict[int, dict] = {}
+    for user_id, day in conn.execute(
+        text("SELECT user_id, start FROM workout_period_stats WHERE period = 'day' ORDER BY user_id, start")
+        .columns(start=DateTime)
+    ):
+        day = datetime(day.year, day.month, day.day)
+        s = streaks.setdefault(user_id, {"uid": user_id, "days": 0, "cur": 0, "best": 0, "last": None})
+        s["cur"] = s["cur"] + 1 if s["last"] is not None and day == s["last"] + timedelta(days=1) else 1
+        s["days"] += 1
+        s["best"] = max(s["best"], s["cur"])
+        s["last"] = day
+    if streaks:
+        conn.execute(
+            text(
+                "UPDATE workout_user_stats SET active_days = :days, current_streak = :cur, "
+                "longest_streak = :best, last_active_date = :last WHERE user_id = :uid"
+            ).bindparams(bindparam("last", type_=DateTime)),
+            list(streaks.values()),
+        )
+
+
+def _m012_achievements(conn: Connection) -> None:
+    """Unlocked achievements and achievement counters (seeded per user on first use)."""
+    metadata = _frozen("users")
+    user_achievements = Table(
+        "user_achievements", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("code", String(50), nullable=False),
+        Column("unlocked_at", DateTime, nullable=False),
+        Index("ix_user_achievements_user_code", "user_id", "code", unique=True),
+    )
+    achievement_counters = Table(
+        "achievement_counters", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("metric", String(50), nullable=False),
+        Column("value", Float, nullable=False),
+        Column("current", Float, nullable=True),
+        Column("last_at", DateTime, nullable=True),
+        Index("ix_achievement_counters_user_metric", "user_id", "metric", unique=True),
+    )
+    _create_tables(conn, user_achievements, achievement_counters)
+
+
+_M013_DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def _m013_weekday(entry: dict) -> int | None:
+    name = entry.get("day_name")
+    if isinstance(name, str) and name.strip().capitalize() in _M013_DAY_NAMES:
+        return _M013_DAY_NAMES.index(name.strip().capitalize())
+    day = entry.get("day")
+    if isinstance(day, int) and not isinstance(day, bool) and 1 <= day <= 7:
+        return day - 1
+    return None
+
+
+def _m013_plan_days(conn: Connection) -> None:
+    """One plan_days row per plan and weekday, backfilled from workout_plans.plan_data."""
+    plan_days = Table(
+        "plan_days", _frozen("users", "workout_plans"),
+        Column("id", Integer, primary_key=True, index=True),
+        Column("plan_id", Integer, ForeignKey("workout_plans.id"), nullable=False),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("plan_created_at", DateTime, nullable=True),
+        Column("day_of_week", Integer, nullable=False),
+        Column("day_name", String(16), nullable=False),
+        Column("focus", String(255), nullable=True),
+        Column("total_duration", Float, nullable=True),
+        Column("exercises", JSON, nullable=True),
+        Column("details", JSON, nullable=True),
+        Index("ix_plan_days_plan_day", "plan_id", "day_of_week", unique=True),
+        Index("ix_plan_days_user_day_plan", "user_id", "day_of_week", "plan_created_at", "plan_id"),
+    )
+    _create_tables(conn, plan_days)
+    day_columns = {"day", "day_name", "focus", "total_duration", "exercises"}
+    result = conn.execute(
+        text("SELECT id, user_id, created_at, plan_data FROM workout_plans ORDER BY id").columns(created_at=DateTime)
+    )
+    while batch := result.fetchmany(1000):
+        rows = []
+        for plan_id, user_id, created_at, plan_data in batch:
+            data = _json(plan_data)
+            if isinstance(data, str):  # plan_data once stored as a JSON-encoded string
+                data = _json(data)
+            daily = data.get("daily_workouts") if isinstance(data, dict) else None
+            entries: dict[int, dict] = {}
+            for entry in daily if isinstance(daily, list) else []:
+                if isinstance(entry, dict) and (weekday := _m013_weekday(entry)) is not None:
+                    entries.setdefault(weekday, entry)
+            for weekday, day_name in enumerate(_M013_DAY_NAMES):
+                entry = entries.get(weekday, {})
+                focus, duration = entry.get("focus"), entry.get("total_duration")
+                rows.append({
+                    "plan_id": plan_id,
+                    "user_id": user_id,
+                    "plan_created_at": created_at or datetime(1970, 1, 1),
+                    "day_of_week": weekday,
+                    "day_name": day_name,
+                    "focus": str(focus)[:255] if focus is not None else None,
+                    "total_duration": (
+                        float(duration) if isinstance(duration, (int, float)) and not isinstance(duration, bool) else None
+                    ),
+                    "exercises": [e for e in entry.get("exercises") or [] if isinstance(e, dict)],
+                    "details": {k: v for k, v in entry.items() if k not in day_columns} or None,
+                })
+        conn.execute(plan_days.insert(), rows)
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline tables and legacy columns", _m001_baseline),
+    (2, "per-user composite indexes", _m002_indexes),
+    (3, "chat session rolling summary", _m003_chat_summary),
+    (4, "workout plan generation jobs", _m004_plan_jobs),
+    (5, "plan job source", _m005_plan_job_source),
+    (6, "exercise video cache", _m006_exercise_videos),
+    (7, "ingredients and search index", _m007_ingredients),
+    (8, "api response cache", _m008_api_cache),
+    (9, "daily nutrition rollups", _m009_nutrition_rollups),
+    (10, "progress series covering index", _m010_progress_series_index),
+    (11, "exercise completions and workout stats", _m011_workout_stats),
+    (12, "achievements", _m012_achievements),
+    (13, "workout plan days", _m013_plan_days),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _read_version(conn: Connection) -> int:
+    return conn.execute(text(f"SELECT MAX(version) FROM {VERSION_TABLE}")).scalar() or 0
+
+
+def current_version(engine: Engine) -> int:
+    """Applied schema version; 0 for a database that predates the version table."""
+    try:
+        with engine.connect() as conn:
+            return _read_version(conn)
+    except (OperationalError, ProgrammingError):
+        return 0
+
+
+def _lock(conn: Connection) -> int | None:
+    """Take the migration lock; on SQLite returns the busy_timeout to restore afterwards."""
+    if conn.dialect.name == "sqlite":
+        previous = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+        conn.exec_driver_sql(f"PRAGMA busy_timeout={_SQLITE_LOCK_WAIT_MS}")
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        return previous
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _PG_LOCK_KEY})
+    return None
+
+
+def run_migrations(engine: Engine) -> int:
+    """Apply pending migrations; returns the resulting schema version."""
+    if current_version(engine) >= LATEST_VERSION:
+        return LATEST_VERSION
+    with engine.connect() as conn:
+        busy_timeout = _lock(conn)
+        try:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} "
+                "(version INTEGER PRIMARY KEY, name VARCHAR(255), applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            ))
+            version = _read_version(conn)  # another worker may have migrated while we waited
+            for number, name, step in MIGRATIONS:
+                if number <= version:
+                    continue
+                logger.info("Applying schema migration %s: %s", number, name)
+                step(conn)
+                conn.execute(text(f"INSERT INTO {VERSION_TABLE} (version, name) VALUES (:v, :n)"), {"v": number, "n": name})
+                version = number
+            conn.commit()
+        finally:
+            if busy_timeout is not None:  # the connection goes back to the pool: don't leak the lock wait
+                conn.rollback()
+                conn.exec_driver_sql(f"PRAGMA busy_timeout={busy_timeout}")
+    return version
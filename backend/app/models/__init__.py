@@ -1,19 +1,42 @@
 from app.models.user import User
-from app.models.workout import Workout, WorkoutPlan
-from app.models.nutrition import Meal, NutritionLog, NutritionPlan
+from app.models.workout import (
+    ExerciseCompletion,
+    ExerciseTotal,
+    PlanDay,
+    Workout,
+    WorkoutPeriodStat,
+    WorkoutPlan,
+    WorkoutUserStat,
+)
+from app.models.nutrition import Ingredient, Meal, NutritionLog, NutritionPlan
 from app.models.progress import ProgressEntry
 from app.models.health import HealthAssessment
 from app.models.chat import ChatMessage, ChatSession
+from app.models.plan_job import PlanJob
+from app.models.exercise_video import ExerciseVideo
+from app.models.api_cache import ApiCacheEntry
+from app.models.achievement import AchievementCounter, UserAchievement
 
 __all__ = [
     "User",
     "Workout",
     "WorkoutPlan",
+    "PlanDay",
+    "ExerciseCompletion",
+    "WorkoutPeriodStat",
+    "ExerciseTotal",
+    "WorkoutUserStat",
     "Meal",
     "NutritionLog",
     "NutritionPlan",
+    "Ingredient",
     "ProgressEntry",
     "HealthAssessment",
     "ChatMessage",
     "ChatSession",
+    "PlanJob",
+    "ExerciseVideo",
+    "ApiCacheEntry",
+    "UserAchievement",
+    "AchievementCounter",
 ]
@@ -0,0 +1,27 @@
+"""Unlocked achievements and the per-user counters they are evaluated against."""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index
+from app.database import Base
+
+
+class UserAchievement(Base):
+    __tablename__ = "user_achievements"
+    __table_args__ = (Index("ix_user_achievements_user_code", "user_id", "code", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    code = Column(String(50), nullable=False)  # rule code in app.services.achievements.RULES
+    unlocked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class AchievementCounter(Base):
+    """Running value of one metric for one user (monotonic), plus the state needed to advance it."""
+    __tablename__ = "achievement_counters"
+    __table_args__ = (Index("ix_achievement_counters_user_metric", "user_id", "metric", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    metric = Column(String(50), nullable=False)
+    value = Column(Float, nullable=False, default=0)
+    current = Column(Float, nullable=True)  # streaks: length of the run ending at last_at; weight: lowest kg
+    last_at = Column(DateTime, nullable=True)  # streaks: last active day; weight_start: time of that weigh-in
@@ -0,0 +1,15 @@
+"""Persistent tier of the third-party API response cache."""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from app.database import Base
+
+
+class ApiCacheEntry(Base):
+    __tablename__ = "api_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(64), unique=True, index=True, nullable=False)  # sha256 of namespace + normalized params
+    namespace = Column(String(100), nullable=False)  # e.g. spoonacular:recipe_info
+    params = Column(JSON, nullable=True)  # normalized params, for inspection
+    value = Column(JSON, nullable=True)
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,16 @@
+"""Cached exercise name -> YouTube video lookups."""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+
+
+class ExerciseVideo(Base):
+    __tablename__ = "exercise_videos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    exercise_key = Column(String(255), unique=True, index=True, nullable=False)  # normalized exercise name
+    video_id = Column(String(32), nullable=True)  # NULL = searched, nothing suitable (negative cache)
+    title = Column(String(255), nullable=True)
+    channel = Column(String(255), nullable=True)
+    duration = Column(String(32), nullable=True)  # ISO 8601, e.g. PT3M20S
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
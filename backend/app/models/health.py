@@ -1,11 +1,12 @@
 """Health assessment model."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, JSON, Index
 from app.database import Base
 
 
 class HealthAssessment(Base):
     __tablename__ = "health_assessments"
+    __table_args__ = (Index("ix_health_assessments_user_updated", "user_id", "updated_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,11 +1,13 @@
 """Nutrition and meal models."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, JSON, Index
+from sqlalchemy.orm import relationship
 from app.database import Base
 
 
 class NutritionPlan(Base):
     __tablename__ = "nutrition_plans"
+    __table_args__ = (Index("ix_nutrition_plans_user_created", "user_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -19,9 +21,22 @@ class NutritionPlan(Base):
     is_active = Column(Integer, default=1)  # 1 = true for SQLite
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Read-only; load with selectinload(NutritionPlan.meals) to avoid per-plan queries.
+    # Only the owner's meals: a meal pointing at someone else's plan never shows up in it.
+    meals = relationship(
+        "Meal",
+        primaryjoin="and_(NutritionPlan.id == foreign(Meal.nutrition_plan_id), NutritionPlan.user_id == foreign(Meal.user_id))",
+        viewonly=True,
+        order_by="Meal.id",
+    )
+
 
 class Meal(Base):
     __tablename__ = "meals"
+    __table_args__ = (
+        Index("ix_meals_user_logged", "user_id", "logged_at"),
+        Index("ix_meals_nutrition_plan", "nutrition_plan_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -39,14 +54,38 @@ class Meal(Base):
 
 
 class NutritionLog(Base):
+    """Daily totals of logged meals (plan meals excluded), maintained by nutrition_service."""
     __tablename__ = "nutrition_logs"
+    __table_args__ = (Index("ix_nutrition_logs_user_date", "user_id", "date", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False)  # UTC day, midnight
     total_calories = Column(Float, nullable=True)
     total_protein = Column(Float, nullable=True)
     total_carbs = Column(Float, nullable=True)
     total_fat = Column(Float, nullable=True)
+    meal_count = Column(Integer, nullable=True, default=0)
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Ingredient(Base):
+    """Local ingredient nutrition (per 100 g) for autocomplete; bulk-imported or filled from Spoonacular."""
+    __tablename__ = "ingredients"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False)
+    name_key = Column(String(255), unique=True, index=True, nullable=False)  # normalized name, prefix search
+    spoonacular_id = Column(Integer, nullable=True, index=True)
+    aisle = Column(String(100), nullable=True)
+    image = Column(String(255), nullable=True)
+    calories = Column(Float, nullable=True)  # NULL = not looked up yet
+    protein = Column(Float, nullable=True)
+    carbs = Column(Float, nullable=True)
+    fat = Column(Float, nullable=True)
+    fiber = Column(Float, nullable=True)
+    sugar = Column(Float, nullable=True)
+    sodium = Column(Float, nullable=True)  # mg
+    source = Column(String(20), nullable=True)  # import, spoonacular
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,26 @@
+"""Background workout-plan generation jobs."""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index
+from app.database import Base
+
+
+class PlanJob(Base):
+    __tablename__ = "plan_jobs"
+    __table_args__ = (
+        Index("ix_plan_jobs_user_created", "user_id", "created_at"),
+        Index("ix_plan_jobs_hash_status", "request_hash", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # sha256 of user + normalized profile, for dedupe
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    source = Column(String(20), nullable=True)  # template, llm
+    params = Column(JSON, nullable=True)  # profile the prompt was built from
+    result = Column(JSON, nullable=True)  # validated { plan_duration, daily_workouts, weekly_summary, tips }
+    error = Column(Text, nullable=True)
+    plan_id = Column(Integer, ForeignKey("workout_plans.id"), nullable=True)
+    attempts = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
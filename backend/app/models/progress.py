@@ -1,11 +1,16 @@
 """Progress tracking model."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, JSON, Index
 from app.database import Base
 
 
 class ProgressEntry(Base):
     __tablename__ = "progress_entries"
+    __table_args__ = (
+        Index("ix_progress_entries_user_recorded", "user_id", "recorded_at"),
+        # covers /progress/series: range scans never visit the table
+        Index("ix_progress_entries_user_type_recorded_value", "user_id", "entry_type", "recorded_at", "value"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
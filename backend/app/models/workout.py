@@ -1,11 +1,12 @@
 """Workout and WorkoutPlan models."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, JSON, Index
 from app.database import Base
 
 
 class WorkoutPlan(Base):
     __tablename__ = "workout_plans"
+    __table_args__ = (Index("ix_workout_plans_user_created", "user_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -17,8 +18,33 @@ class WorkoutPlan(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class PlanDay(Base):
+    """
+    One weekday of a workout plan, written with the plan (workout_service.write_plan_days).
+    Every plan gets all seven rows; days its plan_data leaves out have no exercises.
+    """
+    __tablename__ = "plan_days"
+    __table_args__ = (
+        Index("ix_plan_days_plan_day", "plan_id", "day_of_week", unique=True),
+        # today's workout = the newest plan's row for one weekday: a single index seek
+        Index("ix_plan_days_user_day_plan", "user_id", "day_of_week", "plan_created_at", "plan_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    plan_id = Column(Integer, ForeignKey("workout_plans.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    plan_created_at = Column(DateTime, nullable=True)  # copy of workout_plans.created_at
+    day_of_week = Column(Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    day_name = Column(String(16), nullable=False)
+    focus = Column(String(255), nullable=True)
+    total_duration = Column(Float, nullable=True)
+    exercises = Column(JSON, nullable=True)  # the day's exercises as in plan_data
+    details = Column(JSON, nullable=True)  # remaining day fields: warmup, cooldown, recommended_time, ...
+
+
 class Workout(Base):
     __tablename__ = "workouts"
+    __table_args__ = (Index("ix_workouts_user_created", "user_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -29,3 +55,73 @@ class Workout(Base):
     duration_minutes = Column(Integer, nullable=True)
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ExerciseCompletion(Base):
+    """One completed exercise (typed fact row; the progress_entries JSON row is kept alongside)."""
+    __tablename__ = "exercise_completions"
+    __table_args__ = (
+        Index("ix_exercise_completions_user_completed", "user_id", "completed_at"),
+        Index("ix_exercise_completions_user_exercise", "user_id", "exercise_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    progress_entry_id = Column(Integer, ForeignKey("progress_entries.id"), nullable=True, index=True)
+    exercise_name = Column(String(255), nullable=False)
+    exercise_key = Column(String(255), nullable=False)  # lower-cased, whitespace-collapsed name
+    plan_id = Column(String(64), nullable=True)  # workout plan id as sent (plans can be client-side)
+    sets = Column(Integer, nullable=False, default=0)
+    reps = Column(Integer, nullable=False, default=0)
+    duration_minutes = Column(Integer, nullable=False, default=0)
+    calories_burned = Column(Integer, nullable=False, default=0)
+    completed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class WorkoutPeriodStat(Base):
+    """Completion totals per user and UTC day / week (starting Monday), maintained by workout_stats."""
+    __tablename__ = "workout_period_stats"
+    __table_args__ = (Index("ix_workout_period_stats_user_period_start", "user_id", "period", "start", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    period = Column(String(8), nullable=False)  # day, week
+    start = Column(DateTime, nullable=False)  # midnight UTC
+    completions = Column(Integer, nullable=False, default=0)
+    sets = Column(Integer, nullable=False, default=0)
+    reps = Column(Integer, nullable=False, default=0)
+    duration_minutes = Column(Integer, nullable=False, default=0)
+    calories_burned = Column(Integer, nullable=False, default=0)
+
+
+class ExerciseTotal(Base):
+    """All-time totals per user and exercise, maintained by workout_stats."""
+    __tablename__ = "exercise_totals"
+    __table_args__ = (Index("ix_exercise_totals_user_exercise", "user_id", "exercise_key", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    exercise_key = Column(String(255), nullable=False)
+    exercise_name = Column(String(255), nullable=False)  # as last sent
+    completions = Column(Integer, nullable=False, default=0)
+    sets = Column(Integer, nullable=False, default=0)
+    reps = Column(Integer, nullable=False, default=0)
+    duration_minutes = Column(Integer, nullable=False, default=0)
+    calories_burned = Column(Integer, nullable=False, default=0)
+    last_completed_at = Column(DateTime, nullable=True)
+
+
+class WorkoutUserStat(Base):
+    """Per-user all-time totals and streaks, maintained by workout_stats."""
+    __tablename__ = "workout_user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    completions = Column(Integer, nullable=False, default=0)
+    sets = Column(Integer, nullable=False, default=0)
+    reps = Column(Integer, nullable=False, default=0)
+    duration_minutes = Column(Integer, nullable=False, default=0)
+    calories_burned = Column(Integer, nullable=False, default=0)
+    active_days = Column(Integer, nullable=False, default=0)
+    current_streak = Column(Integer, nullable=False, default=0)  # consecutive days ending last_active_date
+    longest_streak = Column(Integer, nullable=False, default=0)
+    last_active_date = Column(DateTime, nullable=True)  # midnight UTC
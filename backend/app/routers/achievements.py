@@ -0,0 +1,21 @@
+"""Achievements (badges) unlocked by workouts, progress entries and meals."""
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.models.user import User
+from app.core.deps import get_current_user
+from app.services.achievements import list_achievements
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_achievements(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Every achievement with unlocked state and progress towards it, plus points earned."""
+    result = await list_achievements(db, current_user.id)
+    await db.commit()  # first call for a user stores the seeded counters
+    return result
@@ -1,39 +1,169 @@
 """Admin-only routes."""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import date
 
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+
+from app.database import get_async_db, get_pool_stats
 from app.models.user import User
-from app.core.deps import get_current_user
+from app.core.deps import auth_cache_stats, get_current_user, invalidate_user
+from app.core.security import password_hasher_stats
+from app.services.achievements import achievement_stats
+from app.services.ai_agent import ai_metrics
+from app.services.dashboard_service import dashboard_stats
+from app.services.plan_jobs import plan_job_stats
+from app.services.workout_service import coverage_report
+from app.services.api_cache import api_cache_stats
+from app.services.http_client import http_client_stats
+from app.services.nutrition_service import check_rollups, ingredient_stats, rebuild_rollups
+from app.services.workout_stats import rebuild_workout_stats
+from app.services.youtube_service import youtube_stats
+from app.core.pagination import PageParams, paginate
 
 router = APIRouter()
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: User = Depends(get_current_user)) -> User:
     if not getattr(current_user, "is_admin", False):
         raise HTTPException(403, "Admin only")
     return current_user
 
 
 @router.get("/users")
-def list_users(
-    db: Session = Depends(get_db),
+async def list_users(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    admin: User = Depends(require_admin),
+):
+    return await paginate(
+        db, response, User, order_by=(User.id,), page=page,
+        descending=False, exclude=("hashed_password",),
+    )
+
+
+class UserAdminUpdate(BaseModel):
+    is_active: bool | None = None
+    is_admin: bool | None = None
+
+
+@router.patch("/users/{user_id}", response_model=dict)
+async def update_user(
+    user_id: int,
+    data: UserAdminUpdate,
+    db: AsyncSession = Depends(get_async_db),
     admin: User = Depends(require_admin),
 ):
-    return db.query(User).all()
+    """Activate/deactivate a user or change admin rights."""
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(404, "User not found")
+    for k, v in data.model_dump(exclude_unset=True).items():
+        setattr(user, k, v)
+    await db.commit()
+    invalidate_user(user_id)
+    return {"id": user.id, "is_active": user.is_active, "is_admin": user.is_admin}
 
 
 @router.get("/stats")
-def stats(
-    db: Session = Depends(get_db),
+async def stats(
+    db: AsyncSession = Depends(get_async_db),
     admin: User = Depends(require_admin),
 ):
     from app.models.workout import Workout
     from app.models.nutrition import Meal
     from app.models.chat import ChatSession
+
+    async def _count(model) -> int:
+        return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+    return {
+        "users": await _count(User),
+        "workouts": await _count(Workout),
+        "meals": await _count(Meal),
+        "chat_sessions": await _count(ChatSession),
+    }
+
+
+@router.get("/plan-templates/coverage")
+async def plan_template_coverage(
+    db: AsyncSession = Depends(get_async_db),
+    admin: User = Depends(require_admin),
+):
+    """How many stored assessments (and form combinations) the template plan engine answers."""
+    from app.models.health import HealthAssessment
+
+    cols = (
+        HealthAssessment.fitness_level, HealthAssessment.activity_level, HealthAssessment.fitness_goal,
+        HealthAssessment.workout_preference, HealthAssessment.bmi,
+        HealthAssessment.injuries, HealthAssessment.health_conditions,
+    )
+    rows = (await db.execute(select(*cols))).all()
+    assessments = [
+        {
+            "fitness_level": r.fitness_level or r.activity_level or "intermediate",
+            "fitness_goal": r.fitness_goal or "general fitness",
+            "workout_preference": r.workout_preference or "home",
+            "bmi": r.bmi,
+            "injuries": r.injuries,
+            "health_conditions": r.health_conditions,
+        }
+        for r in rows
+    ]
+    return {"assessments": coverage_report(assessments), "form_combinations": coverage_report()}
+
+
+@router.get("/nutrition-rollups/check")
+async def check_nutrition_rollups(
+    user_id: int | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    admin: User = Depends(require_admin),
+):
+    """Days whose stored nutrition rollup disagrees with the raw meals."""
+    mismatches = await check_rollups(db, user_id, start, end)
+    return {"mismatched_days": len(mismatches), "mismatches": mismatches[:limit]}
+
+
+@router.post("/nutrition-rollups/rebuild")
+async def rebuild_nutrition_rollups(
+    user_id: int | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    admin: User = Depends(require_admin),
+):
+    """Recompute nutrition rollups from raw meals (all users and days unless narrowed)."""
+    return {"days_rebuilt": await rebuild_rollups(db, user_id, start, end)}
+
+
+@router.post("/workout-stats/rebuild")
+async def rebuild_workout_aggregates(
+    user_id: int | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    admin: User = Depends(require_admin),
+):
+    """Recompute workout totals, day/week aggregates and streaks from exercise_completions."""
+    return {"users_rebuilt": await rebuild_workout_stats(db, user_id)}
+
+
+@router.get("/metrics")
+async def metrics(admin: User = Depends(require_admin)):
+    """Runtime counters for monitoring."""
     return {
-        "users": db.query(User).count(),
-        "workouts": db.query(Workout).count(),
-        "meals": db.query(Meal).count(),
-        "chat_sessions": db.query(ChatSession).count(),
+        "db_pool": get_pool_stats(),
+        "auth_cache": auth_cache_stats(),
+        "password_hasher": password_hasher_stats(),
+        "llm": ai_metrics(),
+        "plan_jobs": plan_job_stats(),
+        "http": http_client_stats(),
+        "youtube": youtube_stats(),
+        "ingredients": ingredient_stats(),
+        "api_cache": api_cache_stats(),
+        "achievements": achievement_stats(),
+        "dashboard": dashboard_stats(),
     }
@@ -1,15 +1,34 @@
 """AI coach (AROMI) chat - Groq LLaMA."""
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import json
+import logging
+import time
+from datetime import datetime
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_async_db
 from app.models.user import User
+from app.models.chat import ChatMessage, ChatSession
 from app.core.deps import get_current_user
-from app.services.ai_agent import get_ai_response
+from app.core.pagination import PageParams, paginate
+from app.services.ai_agent import AIServiceUnavailable, get_ai_response, stream_ai_response
+from app.services.chat_context import build_context, refresh_summary
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+AROMI_SYSTEM_PROMPT = (
+    "You are AROMI, the AI fitness and wellness coach of ArogyaMitra. "
+    "Give practical, encouraging, safe advice on workouts, nutrition, sleep and recovery. "
+    "Keep answers concise and suggest seeing a doctor for medical concerns."
+)
+
 
 class ChatRequest(BaseModel):
     message: str
@@ -21,33 +40,139 @@ class ChatResponse(BaseModel):
     session_id: int
 
 
+async def _load_session(db: AsyncSession, user_id: int, session_id: int | None) -> ChatSession | None:
+    if session_id is None:
+        return None
+    session = (await db.execute(select(ChatSession).where(ChatSession.id == session_id, ChatSession.user_id == user_id))).scalars().first()
+    if not session:
+        raise HTTPException(404, "Chat session not found")
+    return session
+
+
+async def _persist_turn(db: AsyncSession, user_id: int, session_id: int | None, message: str, reply: str) -> int:
+    """Write the user and assistant messages (and a new session if needed) in one transaction."""
+    now = datetime.utcnow()
+    session = await db.get(ChatSession, session_id) if session_id is not None else None
+    if session is None:
+        session = ChatSession(user_id=user_id, title=message[:80], created_at=now)
+        db.add(session)
+        await db.flush()
+    session.updated_at = now
+    db.add_all([
+        ChatMessage(session_id=session.id, role="user", content=message, created_at=now),
+        ChatMessage(session_id=session.id, role="assistant", content=reply, created_at=datetime.utcnow()),
+    ])
+    await db.commit()
+    return session.id
+
+
+def _cache_scope(user_id: int, session: ChatSession | None) -> str | None:
+    """Follow-ups carry the user's conversation, so only fresh questions share cache entries."""
+    return f"user:{user_id}" if session is not None else None
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/chat", response_model=ChatResponse)
-def chat(
+async def chat(
     data: ChatRequest,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    reply, session_id = get_ai_response(db, current_user.id, data.message, data.session_id)
+    session = await _load_session(db, current_user.id, data.session_id)
+    messages = await build_context(db, session, data.message, AROMI_SYSTEM_PROMPT)
+    # Hand the pooled connection back before waiting on Groq; the turn is saved on a fresh session
+    await db.close()
+    try:
+        reply = await get_ai_response(messages, cache_scope=_cache_scope(current_user.id, session))
+    except AIServiceUnavailable as e:
+        raise HTTPException(503, str(e))
+    async with AsyncSessionLocal() as write_db:
+        session_id = await _persist_turn(write_db, current_user.id, data.session_id, data.message, reply)
+    background_tasks.add_task(refresh_summary, session_id)
     return ChatResponse(reply=reply, session_id=session_id)
 
 
+@router.post("/chat/stream")
+async def chat_stream(
+    data: ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Server-sent events: `token` events with {"delta"} as Groq produces them, then `done`
+    with {"session_id", "ttft_ms", "total_ms"} once both turns are saved, or `error`.
+    """
+    session = await _load_session(db, current_user.id, data.session_id)
+    messages = await build_context(db, session, data.message, AROMI_SYSTEM_PROMPT)
+    user_id, session_id = current_user.id, data.session_id
+    cache_scope = _cache_scope(user_id, session)
+    await db.close()  # nothing else to read; don't hold a connection for the whole stream
+    saved: dict = {}
+
+    async def events():
+        started = time.perf_counter()
+        ttft_ms = None
+        parts: list[str] = []
+        try:
+            async for delta in stream_ai_response(messages, cache_scope=cache_scope):
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                    logger.info("AROMI stream time-to-first-token: %sms", ttft_ms)
+                parts.append(delta)
+                yield _sse("token", {"delta": delta})
+        except AIServiceUnavailable as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        # The request-scoped session is closed once the response starts; use a fresh one
+        async with AsyncSessionLocal() as write_db:
+            saved["id"] = await _persist_turn(write_db, user_id, session_id, data.message, "".join(parts))
+        yield _sse("done", {
+            "session_id": saved["id"],
+            "ttft_ms": ttft_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+
+    async def after_stream():
+        if "id" in saved:
+            await refresh_summary(saved["id"])
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(after_stream),
+    )
+
+
 @router.get("/sessions")
-def list_sessions(
-    db: Session = Depends(get_db),
+async def list_sessions(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    from app.models.chat import ChatSession
-    return db.query(ChatSession).filter(ChatSession.user_id == current_user.id).order_by(ChatSession.updated_at.desc()).all()
+    return await paginate(
+        db, response, ChatSession, ChatSession.user_id == current_user.id,
+        order_by=(ChatSession.updated_at, ChatSession.id), page=page,
+    )
 
 
 @router.get("/sessions/{session_id}/messages")
-def get_messages(
+async def get_messages(
     session_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    from app.models.chat import ChatSession, ChatMessage
-    session = db.query(ChatSession).filter(ChatSession.id == session_id, ChatSession.user_id == current_user.id).first()
+    session = (await db.execute(select(ChatSession).where(ChatSession.id == session_id, ChatSession.user_id == current_user.id))).scalars().first()
     if not session:
         return []
-    return db.query(ChatMessage).filter(ChatMessage.session_id == session_id).order_by(ChatMessage.created_at).all()
+    return await paginate(
+        db, response, ChatMessage, ChatMessage.session_id == session_id,
+        order_by=(ChatMessage.created_at, ChatMessage.id), page=page, descending=False,
+    )
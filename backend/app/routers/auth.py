@@ -1,14 +1,18 @@
 """JWT-based auth: register, login, me."""
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
-from app.core.security import get_password_hash, verify_password, create_access_token
-from app.core.deps import get_current_user
+from app.core.security import hash_password_async, verify_and_update_password_async, create_access_token
+from app.core.deps import get_current_user, invalidate_user
 
 router = APIRouter()
+# Hashing can wait for a hasher worker, so handlers end their transaction before awaiting
+# it: a login spike then fills the hasher queue (503) instead of the connection pool.
 
 
 class UserCreate(BaseModel):
@@ -42,28 +46,46 @@ class UserUpdate(BaseModel):
 
 
 @router.post("/register", response_model=TokenResponse)
-def register(data: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == data.email).first():
+async def register(data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    taken = (await db.execute(select(User.id).where(User.email == data.email))).first()
+    await db.commit()
+    if taken:
         raise HTTPException(status_code=400, detail="Email already registered")
     user = User(
         email=data.email,
-        hashed_password=get_password_hash(data.password),
+        hashed_password=await hash_password_async(data.password),
         full_name=data.full_name,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    try:
+        await db.commit()
+    except IntegrityError:  # registered by a concurrent request while we were hashing
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
     token = create_access_token(data={"sub": str(user.id)})
     return TokenResponse(access_token=token)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not verify_password(data.password, user.hashed_password):
+async def login(data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(User).where(User.email == data.email))).scalars().first()
+    await db.commit()
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    valid, new_hash = await verify_and_update_password_async(data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     if not user.is_active:
         raise HTTPException(status_code=403, detail="User inactive")
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS; upgrade it while we have the password,
+        # unless the password changed while we were verifying.
+        await db.execute(
+            update(User)
+            .where(User.id == user.id, User.hashed_password == user.hashed_password)
+            .values(hashed_password=new_hash)
+        )
+        await db.commit()
     token = create_access_token(data={"sub": str(user.id)})
     return TokenResponse(access_token=token)
 
@@ -72,18 +94,22 @@ GUEST_EMAIL = "guest@arogyamitra.local"
 
 
 @router.post("/guest", response_model=TokenResponse)
-def guest_login(db: Session = Depends(get_db)):
+async def guest_login(db: AsyncSession = Depends(get_async_db)):
     """Create or reuse a shared guest user and return a token. No email/password required."""
-    user = db.query(User).filter(User.email == GUEST_EMAIL).first()
+    user = (await db.execute(select(User).where(User.email == GUEST_EMAIL))).scalars().first()
+    await db.commit()
     if not user:
         user = User(
             email=GUEST_EMAIL,
-            hashed_password=get_password_hash("guest-placeholder-no-login"),
+            hashed_password=await hash_password_async("guest-placeholder-no-login"),
             full_name="Guest",
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        try:
+            await db.commit()
+        except IntegrityError:  # created by a concurrent request while we were hashing
+            await db.rollback()
+            user = (await db.execute(select(User).where(User.email == GUEST_EMAIL))).scalars().one()
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Guest access disabled")
     token = create_access_token(data={"sub": str(user.id)})
@@ -96,13 +122,15 @@ def me(current_user: User = Depends(get_current_user)):
 
 
 @router.patch("/me", response_model=UserResponse)
-def update_me(
+async def update_me(
     data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
+    user = await db.get(User, current_user.id)
     if data.full_name is not None:
-        current_user.full_name = data.full_name
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+        user.full_name = data.full_name
+    await db.commit()
+    await db.refresh(user)
+    invalidate_user(user.id)
+    return user
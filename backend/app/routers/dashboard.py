@@ -0,0 +1,29 @@
+"""Dashboard home-page summary."""
+from datetime import date
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.models.user import User
+from app.core.deps import get_current_user, local_date
+from app.core.etag import etag_response
+from app.services.dashboard_service import dashboard_summary
+
+router = APIRouter()
+
+
+@router.get("/summary")
+async def get_summary(
+    request: Request,
+    today: date = Depends(local_date),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Today's workout and exercise totals, today's macros against plan targets, the latest
+    assessment, recent progress, streak and achievements in one document. Send the ETag
+    back as If-None-Match to get a 304 when nothing changed. ?tz= picks the day of the plan
+    shown as today's workout.
+    """
+    return etag_response(request, await dashboard_summary(db, current_user, local_today=today))
@@ -1,9 +1,10 @@
 """Health assessment."""
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.models.health import HealthAssessment
 from app.core.deps import get_current_user
@@ -32,29 +33,28 @@ class HealthAssessmentCreate(BaseModel):
 
 
 @router.get("/")
-def get_assessment(
-    db: Session = Depends(get_db),
+async def get_assessment(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    a = db.query(HealthAssessment).filter(HealthAssessment.user_id == current_user.id).order_by(HealthAssessment.updated_at.desc()).first()
+    result = await db.execute(select(HealthAssessment).where(HealthAssessment.user_id == current_user.id).order_by(HealthAssessment.updated_at.desc()).limit(1))
+    a = result.scalars().first()
     return a or {}
 
 
 @router.post("/", response_model=dict)
-def upsert_assessment(
+async def upsert_assessment(
     data: HealthAssessmentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    existing = db.query(HealthAssessment).filter(HealthAssessment.user_id == current_user.id).first()
+    existing = (await db.execute(select(HealthAssessment).where(HealthAssessment.user_id == current_user.id).limit(1))).scalars().first()
     if existing:
         for k, v in data.model_dump(exclude_unset=True).items():
             setattr(existing, k, v)
-        db.commit()
-        db.refresh(existing)
+        await db.commit()
         return {"id": existing.id, "updated": True}
     assessment = HealthAssessment(user_id=current_user.id, **data.model_dump())
     db.add(assessment)
-    db.commit()
-    db.refresh(assessment)
+    await db.commit()
     return {"id": assessment.id, "updated": False}
@@ -1,13 +1,26 @@
 """Nutrition and meals."""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
 from typing import Any
+from datetime import date, datetime, timedelta
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.models.nutrition import Meal, NutritionLog, NutritionPlan
 from app.core.deps import get_current_user
+from app.core.bulk import bulk_result, insert_rows, read_rows, utc_naive
+from app.core.pagination import PageParams, paginate
+from app.services.achievements import on_meals
+from app.services.nutrition_service import (
+    get_daily_range,
+    get_nutrition_for_ingredient,
+    search_nutrition,
+    update_rollups,
+)
+from app.services.spoonacular_service import SpoonacularError, get_meal_plan_week, get_recipe_info
 
 router = APIRouter()
 
@@ -35,61 +48,73 @@ class MealCreate(BaseModel):
     nutrition_plan_id: int | None = None
 
 
+class MealBulkItem(MealCreate):
+    logged_at: datetime | None = None  # when the meal was eaten (offline replays); default now
+
+
+def _norm_ingredients(ing: Any) -> list:
+    if not ing:
+        return []
+    if isinstance(ing, list):
+        out = []
+        for x in ing:
+            if isinstance(x, dict):
+                out.append({"name": x.get("name", str(x)), "quantity": x.get("quantity", "as needed")})
+            else:
+                out.append({"name": str(x), "quantity": "as needed"})
+        return out
+    return []
+
+
+def _plan_meal_dict(m: Meal) -> dict:
+    return {
+        "id": str(m.id),
+        "name": m.name,
+        "meal_type": m.meal_type,
+        "calories": m.calories,
+        "protein_grams": m.protein,
+        "carbs_grams": m.carbs,
+        "fat_grams": m.fat,
+        "ingredients": _norm_ingredients(m.ingredients),
+        "day_of_week": m.day_of_week,
+    }
+
+
+def _plan_dict(p: NutritionPlan) -> dict:
+    return {
+        "id": str(p.id),
+        "name": p.name,
+        "description": p.description,
+        "daily_calories": p.daily_calories,
+        "protein_grams": p.protein_grams,
+        "carbs_grams": p.carbs_grams,
+        "fat_grams": p.fat_grams,
+        "dietary_type": p.dietary_type,
+        "is_active": bool(p.is_active),
+        "created_at": p.created_at.isoformat() if p.created_at else None,
+        "meals": [_plan_meal_dict(m) for m in p.meals],
+    }
+
+
 @router.get("/plans")
-def list_plans(
-    db: Session = Depends(get_db),
+async def list_plans(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    """List all nutrition plans with their meals."""
-    plans = db.query(NutritionPlan).filter(NutritionPlan.user_id == current_user.id).order_by(NutritionPlan.created_at.desc()).all()
-    result = []
-    for p in plans:
-        meals = db.query(Meal).filter(Meal.nutrition_plan_id == p.id, Meal.user_id == current_user.id).all()
-        def _norm_ingredients(ing: Any) -> list:
-            if not ing:
-                return []
-            if isinstance(ing, list):
-                out = []
-                for x in ing:
-                    if isinstance(x, dict):
-                        out.append({"name": x.get("name", str(x)), "quantity": x.get("quantity", "as needed")})
-                    else:
-                        out.append({"name": str(x), "quantity": "as needed"})
-                return out
-            return []
-        result.append({
-            "id": str(p.id),
-            "name": p.name,
-            "description": p.description,
-            "daily_calories": p.daily_calories,
-            "protein_grams": p.protein_grams,
-            "carbs_grams": p.carbs_grams,
-            "fat_grams": p.fat_grams,
-            "dietary_type": p.dietary_type,
-            "is_active": bool(p.is_active),
-            "created_at": p.created_at.isoformat() if p.created_at else None,
-            "meals": [
-                {
-                    "id": str(m.id),
-                    "name": m.name,
-                    "meal_type": m.meal_type,
-                    "calories": m.calories,
-                    "protein_grams": m.protein,
-                    "carbs_grams": m.carbs,
-                    "fat_grams": m.fat,
-                    "ingredients": _norm_ingredients(m.ingredients),
-                    "day_of_week": m.day_of_week,
-                }
-                for m in meals
-            ],
-        })
-    return result
+    """List all nutrition plans with their meals (two queries regardless of plan count)."""
+    result = await db.execute(
+        select(NutritionPlan)
+        .where(NutritionPlan.user_id == current_user.id)
+        .order_by(NutritionPlan.created_at.desc())
+        .options(selectinload(NutritionPlan.meals))
+    )
+    return [_plan_dict(p) for p in result.scalars().all()]
 
 
 @router.post("/plans", response_model=dict)
-def create_plan(
+async def create_plan(
     data: NutritionPlanCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     plan = NutritionPlan(
@@ -104,8 +129,7 @@ def create_plan(
         is_active=1 if data.is_active else 0,
     )
     db.add(plan)
-    db.commit()
-    db.refresh(plan)
+    await db.commit()
     return {"id": plan.id, "name": plan.name}
 
 
@@ -122,98 +146,227 @@ class PlanMealItem(BaseModel):
 
 
 @router.post("/plans/{plan_id}/meals", response_model=dict)
-def add_plan_meals(
+async def add_plan_meals(
     plan_id: int,
     meals_data: list[PlanMealItem],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    plan = db.query(NutritionPlan).filter(NutritionPlan.id == plan_id, NutritionPlan.user_id == current_user.id).first()
+    plan = (await db.execute(select(NutritionPlan).where(NutritionPlan.id == plan_id, NutritionPlan.user_id == current_user.id))).scalars().first()
     if not plan:
         raise HTTPException(404, "Plan not found")
-    for m in meals_data:
-        meal = Meal(
-            user_id=current_user.id,
-            nutrition_plan_id=plan_id,
-            name=m.name,
-            meal_type=m.meal_type,
-            calories=m.calories,
-            protein=m.protein_g,
-            carbs=m.carbs_g,
-            fat=m.fat_g,
-            ingredients=m.ingredients,
-            day_of_week=m.day_of_week,
-        )
-        db.add(meal)
-    db.commit()
+    if meals_data:
+        await db.execute(insert(Meal), [
+            {
+                "user_id": current_user.id,
+                "nutrition_plan_id": plan_id,
+                "name": m.name,
+                "meal_type": m.meal_type,
+                "calories": m.calories,
+                "protein": m.protein_g,
+                "carbs": m.carbs_g,
+                "fat": m.fat_g,
+                "ingredients": m.ingredients,
+                "day_of_week": m.day_of_week,
+            }
+            for m in meals_data
+        ])
+        await db.commit()
     return {"added": len(meals_data)}
 
 
 @router.delete("/plans/{plan_id}")
-def delete_plan(
+async def delete_plan(
     plan_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    plan = db.query(NutritionPlan).filter(NutritionPlan.id == plan_id, NutritionPlan.user_id == current_user.id).first()
+    plan = (await db.execute(select(NutritionPlan).where(NutritionPlan.id == plan_id, NutritionPlan.user_id == current_user.id))).scalars().first()
     if not plan:
         raise HTTPException(404, "Plan not found")
-    db.query(Meal).filter(Meal.nutrition_plan_id == plan_id).delete()
-    db.delete(plan)
-    db.commit()
+    await db.execute(delete(Meal).where(Meal.nutrition_plan_id == plan_id))
+    await db.delete(plan)
+    await db.commit()
     return {"ok": True}
 
 
 @router.get("/meals")
-def list_meals(
-    db: Session = Depends(get_db),
+async def list_meals(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    return db.query(Meal).filter(Meal.user_id == current_user.id).order_by(Meal.logged_at.desc()).all()
+    return await paginate(
+        db, response, Meal, Meal.user_id == current_user.id,
+        order_by=(Meal.logged_at, Meal.id), page=page,
+    )
+
+
+async def _owned_plan_ids(db: AsyncSession, user_id: int, plan_ids: set[int]) -> set[int]:
+    """The subset of plan_ids that belong to user_id."""
+    if not plan_ids:
+        return set()
+    return set((await db.execute(
+        select(NutritionPlan.id).where(NutritionPlan.id.in_(plan_ids), NutritionPlan.user_id == user_id)
+    )).scalars())
 
 
 @router.post("/meals", response_model=dict)
-def log_meal(
+async def log_meal(
     data: MealCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
+    if data.nutrition_plan_id is not None and not await _owned_plan_ids(db, current_user.id, {data.nutrition_plan_id}):
+        raise HTTPException(404, "Plan not found")
     meal = Meal(user_id=current_user.id, **data.model_dump())
     db.add(meal)
-    db.commit()
-    db.refresh(meal)
-    return {"id": meal.id, "name": meal.name}
+    await db.flush()
+    await update_rollups(db, [meal])
+    unlocked = await on_meals(db, current_user.id, [meal])
+    await db.commit()
+    return {"id": meal.id, "name": meal.name, "unlocked_achievements": unlocked}
+
+
+@router.post("/meals/bulk", response_model=dict)
+async def log_meals_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Log many meals in one transaction. Body: JSON array or NDJSON of meal objects (optional
+    logged_at). Invalid rows are skipped and reported by index; the rest are inserted.
+    """
+    valid, errors, received = await read_rows(request, MealBulkItem)
+    owned = await _owned_plan_ids(db, current_user.id, {m.nutrition_plan_id for _, m in valid if m.nutrition_plan_id is not None})
+    now = datetime.utcnow()
+    indexes, rows = [], []
+    for i, m in valid:
+        if m.nutrition_plan_id is not None and m.nutrition_plan_id not in owned:
+            errors.append({"index": i, "errors": ["nutrition_plan_id: Plan not found"]})
+            continue
+        indexes.append(i)
+        rows.append({**m.model_dump(), "user_id": current_user.id, "logged_at": utc_naive(m.logged_at) or now})
+    ids = await insert_rows(db, Meal, rows)
+    await update_rollups(db, [Meal(**r) for r in rows])
+    unlocked = await on_meals(db, current_user.id, rows) if rows else []
+    await db.commit()
+    return {**bulk_result(received, indexes, ids, errors), "unlocked_achievements": unlocked}
 
 
 @router.get("/logs")
-def list_nutrition_logs(
-    db: Session = Depends(get_db),
+async def list_nutrition_logs(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await paginate(
+        db, response, NutritionLog, NutritionLog.user_id == current_user.id,
+        order_by=(NutritionLog.date, NutritionLog.id), page=page,
+    )
+
+
+MAX_RANGE_DAYS = 366
+
+
+@router.get("/daily-totals")
+async def daily_totals(
+    start: date | None = Query(None, description="First day (UTC), default 6 days before end"),
+    end: date | None = Query(None, description="Last day (UTC), default today"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    return db.query(NutritionLog).filter(NutritionLog.user_id == current_user.id).all()
+    """Calories and macros per day for a window, read from the daily rollups in one query."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=6)
+    if start > end:
+        raise HTTPException(400, "start must not be after end")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(400, f"Range is limited to {MAX_RANGE_DAYS} days")
+    return await get_daily_range(db, current_user.id, start, end)
 
 
 @router.get("/meals/{meal_id}")
-def get_meal(
+async def get_meal(
     meal_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    m = db.query(Meal).filter(Meal.id == meal_id, Meal.user_id == current_user.id).first()
+    m = (await db.execute(select(Meal).where(Meal.id == meal_id, Meal.user_id == current_user.id))).scalars().first()
     if not m:
         raise HTTPException(404, "Meal not found")
     return m
 
 
 @router.delete("/meals/{meal_id}")
-def delete_meal(
+async def delete_meal(
     meal_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    m = db.query(Meal).filter(Meal.id == meal_id, Meal.user_id == current_user.id).first()
+    m = (await db.execute(select(Meal).where(Meal.id == meal_id, Meal.user_id == current_user.id))).scalars().first()
     if not m:
         raise HTTPException(404, "Meal not found")
-    db.delete(m)
-    db.commit()
+    await update_rollups(db, [m], sign=-1)
+    await db.delete(m)
+    await db.commit()
     return {"ok": True}
+
+
+@router.get("/ingredients")
+async def search_ingredients(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Ingredient autocomplete from the local database (Spoonacular only on a miss)."""
+    return await search_nutrition(db, q, limit)
+
+
+@router.get("/ingredients/{ingredient_id}")
+async def get_ingredient(
+    ingredient_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Nutrition per 100 g for one ingredient."""
+    ingredient = await get_nutrition_for_ingredient(db, ingredient_id)
+    if ingredient is None:
+        raise HTTPException(404, "Ingredient not found")
+    return ingredient
+
+
+def _spoonacular_failed(e: SpoonacularError) -> HTTPException:
+    if e.status_code == 404:
+        return HTTPException(404, "Not found")
+    return HTTPException(503, str(e))
+
+
+@router.get("/meal-plan/week")
+async def meal_plan_week(
+    calories: int = Query(2000, ge=800, le=6000),
+    diet: str | None = Query(None, max_length=50),
+    exclude: str | None = Query(None, max_length=200),
+    current_user: User = Depends(get_current_user),
+):
+    """Spoonacular 7-day meal plan (cached; identical targets share one upstream call)."""
+    try:
+        return await get_meal_plan_week(calories, diet, exclude)
+    except SpoonacularError as e:
+        raise _spoonacular_failed(e)
+
+
+@router.get("/recipes/{recipe_id}")
+async def recipe_info(
+    recipe_id: int,
+    current_user: User = Depends(get_current_user),
+):
+    """Spoonacular recipe details (cached)."""
+    try:
+        return await get_recipe_info(recipe_id)
+    except SpoonacularError as e:
+        raise _spoonacular_failed(e)
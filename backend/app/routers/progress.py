@@ -1,13 +1,19 @@
 """Progress entries (weight, measurements, etc.)."""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Any
+from datetime import datetime
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.models.progress import ProgressEntry
 from app.core.deps import get_current_user
+from app.core.bulk import bulk_result, insert_rows, read_rows, utc_naive
+from app.core.pagination import PageParams, paginate
+from app.services.achievements import on_progress
+from app.services.progress_service import BUCKETS, progress_series
 
 router = APIRouter()
 
@@ -20,18 +26,27 @@ class ProgressCreate(BaseModel):
     notes: str | None = None
 
 
+class ProgressBulkItem(ProgressCreate):
+    recorded_at: datetime | None = None  # when it was measured (offline replays, wearables); default now
+
+
 @router.get("/")
-def list_progress(
-    db: Session = Depends(get_db),
+async def list_progress(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    return db.query(ProgressEntry).filter(ProgressEntry.user_id == current_user.id).order_by(ProgressEntry.recorded_at.desc()).all()
+    return await paginate(
+        db, response, ProgressEntry, ProgressEntry.user_id == current_user.id,
+        order_by=(ProgressEntry.recorded_at, ProgressEntry.id), page=page,
+    )
 
 
 @router.post("/", response_model=dict)
-def create_progress(
+async def create_progress(
     data: ProgressCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     entry = ProgressEntry(
@@ -43,18 +58,82 @@ def create_progress(
         notes=data.notes,
     )
     db.add(entry)
-    db.commit()
-    db.refresh(entry)
-    return {"id": entry.id, "entry_type": entry.entry_type}
+    await db.flush()
+    unlocked = await on_progress(db, current_user.id, [entry])
+    await db.commit()
+    return {"id": entry.id, "entry_type": entry.entry_type, "unlocked_achievements": unlocked}
+
+
+@router.post("/bulk", response_model=dict)
+async def create_progress_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Record many entries in one transaction. Body: JSON array or NDJSON of entries (optional
+    recorded_at). Invalid rows are skipped and reported by index; the rest are inserted.
+    """
+    valid, errors, received = await read_rows(request, ProgressBulkItem)
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": current_user.id,
+            "entry_type": e.entry_type,
+            "value": e.value,
+            "unit": e.unit,
+            "metadata_": e.metadata,
+            "notes": e.notes,
+            "recorded_at": utc_naive(e.recorded_at) or now,
+        }
+        for _, e in valid
+    ]
+    ids = await insert_rows(db, ProgressEntry, rows)
+    unlocked = await on_progress(db, current_user.id, rows) if rows else []
+    await db.commit()
+    return {**bulk_result(received, [i for i, _ in valid], ids, errors), "unlocked_achievements": unlocked}
+
+
+MAX_MOVING_AVERAGES = 4
+
+
+@router.get("/series")
+async def get_series(
+    entry_type: str = Query(..., max_length=50),
+    start: datetime | None = Query(None, description="Inclusive, default the first entry"),
+    end: datetime | None = Query(None, description="Exclusive, default after the last entry"),
+    bucket: str = Query("day", description="day, week (starting Monday) or month, UTC"),
+    points: int = Query(300, ge=3, le=2000, description="Maximum points in the downsampled line"),
+    ma: str | None = Query(None, description="Comma-separated moving-average windows in buckets, e.g. 7,30"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Per-bucket min/max/avg/last with moving averages, plus an LTTB-downsampled line for charts."""
+    if bucket not in BUCKETS:
+        raise HTTPException(400, f"bucket must be one of {', '.join(BUCKETS)}")
+    start, end = utc_naive(start), utc_naive(end)
+    if start and end and start >= end:
+        raise HTTPException(400, "start must be before end")
+    windows = None
+    if ma:
+        try:
+            windows = tuple(sorted({int(w) for w in ma.split(",") if w.strip()}))
+        except ValueError:
+            raise HTTPException(400, "ma must be comma-separated integers")
+        if len(windows) > MAX_MOVING_AVERAGES or any(not 1 < w <= 365 for w in windows):
+            raise HTTPException(400, f"ma takes up to {MAX_MOVING_AVERAGES} windows between 2 and 365")
+    return await progress_series(
+        db, current_user.id, entry_type, start=start, end=end, bucket=bucket, points=points, moving_averages=windows,
+    )
 
 
 @router.get("/{entry_id}")
-def get_progress(
+async def get_progress(
     entry_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    e = db.query(ProgressEntry).filter(ProgressEntry.id == entry_id, ProgressEntry.user_id == current_user.id).first()
+    e = (await db.execute(select(ProgressEntry).where(ProgressEntry.id == entry_id, ProgressEntry.user_id == current_user.id))).scalars().first()
     if not e:
         raise HTTPException(404, "Progress entry not found")
     return e
@@ -1,15 +1,33 @@
 """Workouts and workout plans."""
 import json
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Any
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_async_db
 from app.models.user import User
 from app.models.workout import Workout, WorkoutPlan
 from app.models.progress import ProgressEntry
-from app.core.deps import get_current_user
+from app.models.health import HealthAssessment
+from app.models.plan_job import PlanJob
+from app.services.plan_jobs import (
+    PROFILE_DEFAULTS,
+    TERMINAL_STATUSES,
+    PlanProfile,
+    job_dict,
+    submit_job,
+    wait_for_change,
+)
+from app.services.achievements import on_workouts
+from app.services.workout_service import DAY_NAMES, get_today_workout, write_plan_days
+from app.services.workout_stats import completion_row, get_workout_stats, record_completions
+from app.core.deps import get_current_user, local_date
+from app.core.bulk import bulk_result, insert_rows, read_rows, utc_naive
+from app.core.pagination import PageParams, paginate
 
 router = APIRouter()
 
@@ -45,11 +63,11 @@ class WorkoutCreate(BaseModel):
 
 
 @router.get("/plans")
-def list_plans(
-    db: Session = Depends(get_db),
+async def list_plans(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    plans = db.query(WorkoutPlan).filter(WorkoutPlan.user_id == current_user.id).all()
+    plans = (await db.execute(select(WorkoutPlan).where(WorkoutPlan.user_id == current_user.id))).scalars().all()
     return [
         {
             "id": p.id,
@@ -65,9 +83,9 @@ def list_plans(
 
 
 @router.post("/plans", response_model=dict)
-def create_plan(
+async def create_plan(
     data: WorkoutPlanCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     payload = data.model_dump()
@@ -79,29 +97,121 @@ def create_plan(
             payload["plan_data"] = None
     plan = WorkoutPlan(user_id=current_user.id, **payload)
     db.add(plan)
-    db.commit()
-    db.refresh(plan)
+    await db.flush()
+    await write_plan_days(db, plan)
+    await db.commit()
     return {"id": plan.id, "name": plan.name, "plan_data": _normalize_plan_data(plan)}
 
 
+PLAN_JOB_EVENT_POLL_SECONDS = 2.0
+
+
+async def _plan_profile(db: AsyncSession, user_id: int, overrides: PlanProfile) -> dict:
+    """Request fields, else the latest health assessment, else the defaults."""
+    assessment = (await db.execute(
+        select(HealthAssessment).where(HealthAssessment.user_id == user_id).order_by(HealthAssessment.updated_at.desc()).limit(1)
+    )).scalars().first()
+    given = overrides.model_dump(exclude_none=True)
+    profile = {}
+    for field in PlanProfile.model_fields:
+        value = given.get(field)
+        if value is None and assessment is not None:
+            value = getattr(assessment, field, None)
+        if value is None and field == "fitness_level" and assessment is not None:
+            value = assessment.activity_level
+        profile[field] = value if value is not None else PROFILE_DEFAULTS.get(field)
+    return profile
+
+
+async def _get_job(db: AsyncSession, user_id: int, job_id: int) -> PlanJob:
+    job = (await db.execute(select(PlanJob).where(PlanJob.id == job_id, PlanJob.user_id == user_id))).scalars().first()
+    if not job:
+        raise HTTPException(404, "Plan job not found")
+    return job
+
+
+@router.post("/plans/generate", status_code=202)
+async def generate_plan(
+    data: PlanProfile,
+    response: Response,
+    engine: str = Query("auto", pattern="^(auto|llm)$"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Queue 7-day plan generation and return the job at once. Poll /plans/jobs/{id} or stream
+    /plans/jobs/{id}/events; on success the job carries the plan and the saved plan_id.
+    Profiles the template engine covers come back already succeeded (engine=llm skips it).
+    """
+    profile = await _plan_profile(db, current_user.id, data)
+    job, created = await submit_job(db, current_user.id, profile, engine)
+    response.headers["Location"] = f"/workouts/plans/jobs/{job.id}"
+    if job.status == "succeeded":
+        response.status_code = 201
+    return {**job_dict(job), "deduplicated": not created}
+
+
+@router.get("/plans/jobs/{job_id}")
+async def get_plan_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return job_dict(await _get_job(db, current_user.id, job_id))
+
+
+@router.get("/plans/jobs/{job_id}/events")
+async def plan_job_events(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Server-sent `status` events on every change; the stream ends after succeeded/failed."""
+    await _get_job(db, current_user.id, job_id)
+    user_id = current_user.id
+
+    async def events():
+        last = None
+        while True:
+            async with AsyncSessionLocal() as read_db:
+                job = await _get_job(read_db, user_id, job_id)
+                payload = job_dict(job)
+            if payload["status"] != last:
+                last = payload["status"]
+                yield f"event: status\ndata: {json.dumps(payload, default=str)}\n\n"
+            if last in TERMINAL_STATUSES:
+                return
+            await wait_for_change(job_id, PLAN_JOB_EVENT_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/")
-def list_workouts(
-    db: Session = Depends(get_db),
+async def list_workouts(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    return db.query(Workout).filter(Workout.user_id == current_user.id).all()
+    return await paginate(
+        db, response, Workout, Workout.user_id == current_user.id,
+        order_by=(Workout.created_at, Workout.id), page=page,
+    )
 
 
 @router.post("/", response_model=dict)
-def create_workout(
+async def create_workout(
     data: WorkoutCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     workout = Workout(user_id=current_user.id, **data.model_dump())
     db.add(workout)
-    db.commit()
-    db.refresh(workout)
+    await db.commit()
     return {"id": workout.id, "name": workout.name}
 
 
@@ -114,40 +224,101 @@ class WorkoutCompleteBody(BaseModel):
     calories_burned: int = 0
 
 
-@router.post("/complete", response_model=dict)
-def complete_exercise(
-    data: WorkoutCompleteBody,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """Record exercise completion for email/JWT users (stored in progress_entries)."""
-    entry = ProgressEntry(
-        user_id=current_user.id,
-        entry_type="workout_exercise",
-        value=float(data.sets_completed),
-        unit="sets",
-        metadata_={
+class WorkoutCompleteBulkItem(WorkoutCompleteBody):
+    completed_at: datetime | None = None  # offline replays; default now
+
+
+def _completion_row(user_id: int, data: WorkoutCompleteBody, recorded_at: datetime | None = None) -> dict:
+    return {
+        "user_id": user_id,
+        "entry_type": "workout_exercise",
+        "value": float(data.sets_completed),
+        "unit": "sets",
+        "metadata_": {
             "exercise_name": data.exercise_name,
             "plan_id": data.plan_id,
             "reps_completed": data.reps_completed,
             "duration_minutes": data.duration_minutes,
             "calories_burned": data.calories_burned,
         },
-        notes=None,
-    )
+        "notes": None,
+        "recorded_at": recorded_at or datetime.utcnow(),
+    }
+
+
+@router.post("/complete", response_model=dict)
+async def complete_exercise(
+    data: WorkoutCompleteBody,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Record exercise completion for email/JWT users (progress_entries plus the workout stats)."""
+    entry = ProgressEntry(**_completion_row(current_user.id, data))
     db.add(entry)
-    db.commit()
-    db.refresh(entry)
-    return {"success": True, "id": entry.id}
+    await db.flush()
+    await record_completions(db, [completion_row(current_user.id, data.model_dump(), entry.recorded_at, entry.id)])
+    unlocked = await on_workouts(db, current_user.id)
+    await db.commit()
+    return {"success": True, "id": entry.id, "unlocked_achievements": unlocked}
+
+
+@router.post("/complete/bulk", response_model=dict)
+async def complete_exercises_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Record many exercise completions in one transaction. Body: JSON array or NDJSON of
+    completion objects (optional completed_at); invalid rows are reported by index.
+    """
+    valid, errors, received = await read_rows(request, WorkoutCompleteBulkItem)
+    now = datetime.utcnow()
+    rows = [_completion_row(current_user.id, c, utc_naive(c.completed_at) or now) for _, c in valid]
+    ids = await insert_rows(db, ProgressEntry, rows)
+    await record_completions(db, [
+        completion_row(current_user.id, c.model_dump(), row["recorded_at"], entry_id)
+        for (_, c), row, entry_id in zip(valid, rows, ids)
+    ])
+    unlocked = await on_workouts(db, current_user.id) if rows else []
+    await db.commit()
+    return {**bulk_result(received, [i for i, _ in valid], ids, errors), "unlocked_achievements": unlocked}
+
+
+@router.get("/stats")
+async def workout_stats(
+    days: int = Query(7, ge=1, le=92, description="Daily totals for the last N days"),
+    weeks: int = Query(8, ge=1, le=104, description="Weekly totals for the last N weeks"),
+    exercises: int = Query(10, ge=0, le=100, description="Top exercises by completions"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Totals, streaks, daily/weekly volume and per-exercise totals from the maintained aggregates."""
+    return await get_workout_stats(db, current_user.id, days=days, weeks=weeks, exercises=exercises)
+
+
+@router.get("/today")
+async def today_workout(
+    today: date = Depends(local_date),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Today's day (in ?tz=, default UTC) of the newest workout plan, from its plan_days row.
+    status is scheduled, rest_day (the plan has no exercises that day) or no_plan.
+    """
+    workout = await get_today_workout(db, current_user.id, today)
+    status = "no_plan" if workout is None else "scheduled" if workout["exercises"] else "rest_day"
+    return {"date": today.isoformat(), "day_name": DAY_NAMES[today.weekday()], "status": status, "workout": workout}
 
 
 @router.get("/{workout_id}")
-def get_workout(
+async def get_workout(
     workout_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    w = db.query(Workout).filter(Workout.id == workout_id, Workout.user_id == current_user.id).first()
+    w = (await db.execute(select(Workout).where(Workout.id == workout_id, Workout.user_id == current_user.id))).scalars().first()
     if not w:
         raise HTTPException(404, "Workout not found")
     return w
@@ -0,0 +1,307 @@
+"""
+Achievements: declarative rules evaluated incrementally on write events.
+
+Each rule is a threshold on one per-user metric: progress entries, consecutive days logging
+progress, exercises, workout days, sets, workout streak, best steps day, kg lost and meals.
+RULES is compiled once into sorted thresholds per metric. Write events (/progress/,
+/workouts/complete, /nutrition/meals) advance only the metrics they touch, starting from the
+counters in achievement_counters. They unlock the rules whose threshold lies between the
+old value and the new one, found with a bisect. Evaluation therefore costs the same however
+long the user's history is. The counters are seeded from history the first time a user needs
+them (existing users after the upgrade); that is the only full scan.
+
+    python -m benchmarks.achievements [--history N ...]   # evaluation cost vs history size
+"""
+import bisect
+import time
+from datetime import date, datetime
+from typing import Any, Iterable, NamedTuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import LatencyStats
+from app.models.achievement import AchievementCounter, UserAchievement
+from app.models.nutrition import Meal
+from app.models.progress import ProgressEntry
+from app.models.workout import WorkoutUserStat
+from app.services.workout_stats import streak_walk
+
+WORKOUT_ENTRY_TYPE = "workout_exercise"  # progress_entries rows written by /workouts/complete
+_LB_TO_KG = 0.45359237
+
+
+class Rule(NamedTuple):
+    code: str
+    title: str
+    description: str
+    icon: str
+    category: str
+    points: int
+    charity_amount: int
+    metric: str
+    threshold: float
+
+
+RULES: tuple[Rule, ...] = (
+    Rule("first_steps", "First Steps", "Log your first progress entry", "footprints", "progress", 10, 5, "progress_entries", 1),
+    Rule("week_warrior", "Week Warrior", "Log progress for 7 consecutive days", "flame", "consistency", 50, 25, "progress_streak", 7),
+    Rule("first_exercise", "Warm Up", "Complete your first exercise", "dumbbell", "fitness", 10, 5, "exercises", 1),
+    Rule("iron_will", "Iron Will", "Work out on 10 different days", "dumbbell", "fitness", 75, 50, "workout_days", 10),
+    Rule("sets_100", "Century", "Complete 100 sets", "medal", "fitness", 40, 20, "sets", 100),
+    Rule("sets_1000", "Thousand Sets", "Complete 1,000 sets", "trophy", "fitness", 150, 100, "sets", 1000),
+    Rule("workout_streak_3", "On a Roll", "Work out 3 days in a row", "flame", "consistency", 20, 10, "workout_streak", 3),
+    Rule("workout_streak_7", "Unstoppable", "Work out 7 days in a row", "flame", "consistency", 60, 30, "workout_streak", 7),
+    Rule("workout_streak_30", "Habit Formed", "Work out 30 days in a row", "trophy", "consistency", 200, 150, "workout_streak", 30),
+    Rule("steps_10k", "10K Steps Club", "Hit 10,000 steps in a single day", "target", "fitness", 40, 20, "steps_day_max", 10_000),
+    Rule("weight_loss_1", "First Kilo", "Lose 1 kg from your first weigh-in", "zap", "progress", 20, 10, "weight_lost_kg", 1),
+    Rule("weight_loss_5", "Five Down", "Lose 5 kg from your first weigh-in", "zap", "progress", 60, 40, "weight_lost_kg", 5),
+    Rule("weight_loss_10", "Transformation Master", "Lose 10 kg from your first weigh-in", "zap", "progress", 100, 100, "weight_lost_kg", 10),
+    Rule("first_meal", "Bon Appetit", "Log your first meal", "star", "nutrition", 10, 5, "meals", 1),
+    Rule("meals_50", "Nutrition Guru", "Log 50 meals", "star", "nutrition", 60, 30, "meals", 50),
+    Rule("meals_250", "Mindful Eater", "Log 250 meals", "star", "nutrition", 120, 80, "meals", 250),
+)
+RULES_BY_CODE = {r.code: r for r in RULES}
+# weight_start holds the first weigh-in (kg); no rule reads it directly
+METRICS = tuple(dict.fromkeys([*(r.metric for r in RULES), "weight_start"]))
+
+
+def _compile(rules: Iterable[Rule]) -> dict[str, tuple[list[float], list[Rule]]]:
+    by_metric: dict[str, list[Rule]] = {}
+    for rule in sorted(rules, key=lambda r: r.threshold):
+        by_metric.setdefault(rule.metric, []).append(rule)
+    return {m: ([r.threshold for r in rs], rs) for m, rs in by_metric.items()}
+
+
+_COMPILED = _compile(RULES)
+_counters = {"evaluations": 0, "seeded_users": 0, "unlocked": 0}
+_eval_latency = LatencyStats()
+
+
+def crossed(metric: str, old: float, new: float) -> list[Rule]:
+    """Rules on `metric` whose threshold is in (old, new]."""
+    if metric not in _COMPILED or new <= old:
+        return []
+    thresholds, rules = _COMPILED[metric]
+    return rules[bisect.bisect_right(thresholds, old):bisect.bisect_right(thresholds, new)]
+
+
+def _field(row: Any, name: str) -> Any:
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def _day_start(value: datetime | date) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+
+def _kg(value: float, unit: str | None) -> float:
+    return value * _LB_TO_KG if (unit or "").strip().lower() in ("lb", "lbs", "pound", "pounds") else value
+
+
+def _insert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+async def _load(db: AsyncSession, user_id: int) -> dict[str, AchievementCounter] | None:
+    """The user's counters, locked for this transaction (Postgres); None if not seeded yet."""
+    rows = (await db.execute(
+        select(AchievementCounter).where(AchievementCounter.user_id == user_id)
+        .with_for_update().execution_options(populate_existing=True)
+    )).scalars().all()
+    if not rows:
+        return None
+    counters = {c.metric: c for c in rows}
+    for metric in METRICS:  # metrics added to RULES after the user was seeded start at 0
+        if metric not in counters:
+            counters[metric] = AchievementCounter(user_id=user_id, metric=metric, value=0)
+            db.add(counters[metric])
+    return counters
+
+
+async def _progress_days(db: AsyncSession, user_id: int) -> list[datetime]:
+    day = func.date(ProgressEntry.recorded_at)
+    rows = (await db.execute(
+        select(day).where(ProgressEntry.user_id == user_id, ProgressEntry.entry_type != WORKOUT_ENTRY_TYPE)
+        .group_by(day).order_by(day)
+    )).scalars()
+    return [_day_start(date.fromisoformat(str(d)[:10])) for d in rows if d is not None]
+
+
+async def _history(db: AsyncSession, user_id: int) -> list[dict]:
+    """Counter rows computed from the user's whole history (seeding only)."""
+    logged = (ProgressEntry.user_id == user_id, ProgressEntry.entry_type != WORKOUT_ENTRY_TYPE)
+    entries = (await db.execute(select(func.count()).where(*logged))).scalar_one()
+    steps = (await db.execute(
+        select(func.max(ProgressEntry.value)).where(ProgressEntry.user_id == user_id, ProgressEntry.entry_type == "steps")
+    )).scalar()
+    weights = [
+        (_kg(v, unit), at) for v, unit, at in (await db.execute(
+            select(ProgressEntry.value, ProgressEntry.unit, ProgressEntry.recorded_at)
+            .where(ProgressEntry.user_id == user_id, ProgressEntry.entry_type == "weight", ProgressEntry.value.isnot(None))
+            .order_by(ProgressEntry.recorded_at, ProgressEntry.id)
+        )).all()
+    ]
+    meals = (await db.execute(
+        select(func.count()).where(Meal.user_id == user_id, Meal.nutrition_plan_id.is_(None))
+    )).scalar_one()
+    workouts = (await db.execute(select(WorkoutUserStat).where(WorkoutUserStat.user_id == user_id))).scalar_one_or_none()
+    current, longest, last = streak_walk(await _progress_days(db, user_id))
+    values = {
+        "progress_entries": {"value": entries},
+        "progress_streak": {"value": longest, "current": current, "last_at": last},
+        "exercises": {"value": workouts.completions if workouts else 0},
+        "workout_days": {"value": workouts.active_days if workouts else 0},
+        "sets": {"value": workouts.sets if workouts else 0},
+        "workout_streak": {"value": workouts.longest_streak if workouts else 0},
+        "steps_day_max": {"value": steps or 0},
+        "weight_start": {"value": weights[0][0], "last_at": weights[0][1]} if weights else {"value": 0},
+        "weight_lost_kg": {
+            "value": max(weights[0][0] - min(w for w, _ in weights), 0), "current": min(w for w, _ in weights),
+        } if weights else {"value": 0},
+        "meals": {"value": meals},
+    }
+    return [{"user_id": user_id, "metric": m, "current": None, "last_at": None, **values[m]} for m in METRICS]
+
+
+async def _unlock(db: AsyncSession, user_id: int, rules: list[Rule]) -> list[dict]:
+    if not rules:
+        return []
+    now = datetime.utcnow()
+    stmt = _insert(db.get_bind().dialect.name)(UserAchievement).on_conflict_do_nothing(index_elements=["user_id", "code"])
+    await db.execute(stmt, [{"user_id": user_id, "code": r.code, "unlocked_at": now} for r in rules])
+    _counters["unlocked"] += len(rules)
+    return [achievement_dict(r, now) for r in rules]
+
+
+async def _seed(db: AsyncSession, user_id: int) -> list[dict]:
+    """First evaluation for a user: counters from history, and every rule they already meet."""
+    rows = await _history(db, user_id)
+    stmt = _insert(db.get_bind().dialect.name)(AchievementCounter).on_conflict_do_nothing(index_elements=["user_id", "metric"])
+    await db.execute(stmt, rows)
+    _counters["seeded_users"] += 1
+    return await _unlock(db, user_id, [r for row in rows for r in crossed(row["metric"], 0, row["value"])])
+
+
+async def _evaluate(db: AsyncSession, user_id: int, advance) -> list[dict]:
+    """
+    Run `advance(counters)` (which moves counter values forward for the new event) and unlock
+    the rules crossed, in the caller's transaction. The event's rows must already be flushed:
+    a user without counters is seeded from history, which then includes them.
+    """
+    started = time.perf_counter()
+    _counters["evaluations"] += 1
+    counters = await _load(db, user_id)
+    if counters is None:
+        unlocked = await _seed(db, user_id)
+    else:
+        old = {m: c.value or 0 for m, c in counters.items()}
+        await advance(counters)
+        unlocked = await _unlock(db, user_id, [r for m, c in counters.items() for r in crossed(m, old[m], c.value or 0)])
+        await db.flush()
+    _eval_latency.observe((time.perf_counter() - started) * 1000)
+    return unlocked
+
+
+async def on_progress(db: AsyncSession, user_id: int, entries: Iterable) -> list[dict]:
+    """New progress entries (ProgressEntry objects or row dicts) -> newly unlocked achievements."""
+    logged = [e for e in entries if _field(e, "entry_type") != WORKOUT_ENTRY_TYPE]
+
+    async def advance(counters: dict[str, AchievementCounter]) -> None:
+        counters["progress_entries"].value += len(logged)
+        streak = counters["progress_streak"]
+        days = sorted({_day_start(_field(e, "recorded_at") or datetime.utcnow()) for e in logged})
+        walked = streak_walk(days, int(streak.current or 0), int(streak.value or 0), streak.last_at)
+        if walked is None:  # a backfilled day can join two runs: recount from the entry days
+            walked = streak_walk(await _progress_days(db, user_id))
+        streak.current, streak.value, streak.last_at = walked
+        start, lost, steps = counters["weight_start"], counters["weight_lost_kg"], counters["steps_day_max"]
+        for e in sorted(logged, key=lambda e: _field(e, "recorded_at") or datetime.utcnow()):
+            value = _field(e, "value")
+            if value is None:
+                continue
+            if _field(e, "entry_type") == "steps":
+                steps.value = max(steps.value or 0, value)
+            elif _field(e, "entry_type") == "weight":
+                kg = _kg(value, _field(e, "unit"))
+                at = _field(e, "recorded_at") or datetime.utcnow()
+                if start.last_at is None or at < start.last_at:
+                    start.value, start.last_at = kg, at
+                lost.current = kg if lost.current is None else min(lost.current, kg)
+        if lost.current is not None:  # loss = first weigh-in - lowest weigh-in, never decreasing
+            lost.value = max(lost.value or 0, start.value - lost.current)
+
+    return await _evaluate(db, user_id, advance)
+
+
+async def on_workouts(db: AsyncSession, user_id: int) -> list[dict]:
+    """After record_completions: exercise, day, set and streak metrics from workout_user_stats."""
+
+    async def advance(counters: dict[str, AchievementCounter]) -> None:
+        stat = (await db.execute(
+            select(WorkoutUserStat).where(WorkoutUserStat.user_id == user_id).execution_options(populate_existing=True)
+        )).scalar_one_or_none()
+        if stat is None:
+            return
+        for metric, value in (
+            ("exercises", stat.completions), ("workout_days", stat.active_days),
+            ("sets", stat.sets), ("workout_streak", stat.longest_streak),
+        ):
+            counters[metric].value = max(counters[metric].value or 0, value or 0)
+
+    return await _evaluate(db, user_id, advance)
+
+
+async def on_meals(db: AsyncSession, user_id: int, meals: Iterable) -> list[dict]:
+    """New meals (Meal objects or row dicts); meals inside a nutrition plan are not eaten meals."""
+    eaten = sum(1 for m in meals if _field(m, "nutrition_plan_id") is None)
+
+    async def advance(counters: dict[str, AchievementCounter]) -> None:
+        counters["meals"].value += eaten
+
+    return await _evaluate(db, user_id, advance)
+
+
+def achievement_dict(rule: Rule, unlocked_at: datetime | None, value: float | None = None) -> dict:
+    out = {
+        "id": rule.code,
+        "title": rule.title,
+        "description": rule.description,
+        "icon": rule.icon,
+        "category": rule.category,
+        "points": rule.points,
+        "charity_amount": rule.charity_amount,
+        "unlocked": unlocked_at is not None,
+        "unlocked_at": unlocked_at.isoformat() if unlocked_at else None,
+    }
+    if value is not None:
+        out["progress"] = {"value": round(min(value, rule.threshold), 2), "target": rule.threshold}
+    return out
+
+
+async def list_achievements(db: AsyncSession, user_id: int) -> dict:
+    """Every rule with unlocked state and progress; seeds the user's counters on first use."""
+    counters = await _load(db, user_id)
+    if counters is None:
+        await _seed(db, user_id)
+        counters = await _load(db, user_id)
+    unlocked = dict((await db.execute(
+        select(UserAchievement.code, UserAchievement.unlocked_at).where(UserAchievement.user_id == user_id)
+    )).all())
+    items = [achievement_dict(r, unlocked.get(r.code), counters[r.metric].value or 0) for r in RULES]
+    earned = [r for r in RULES if r.code in unlocked]
+    return {
+        "unlocked": len(earned),
+        "total": len(RULES),
+        "points": sum(r.points for r in earned),
+        "charity_amount": sum(r.charity_amount for r in earned),
+        "achievements": items,
+    }
+
+
+def achievement_stats() -> dict:
+    return {**_counters, "evaluation": _eval_latency.snapshot()}
+
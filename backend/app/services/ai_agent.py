@@ -1,23 +1,60 @@
 import os
 import json
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.metrics import LatencyStats
+from app.services.ai_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # override to point at a local fake/proxy
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+# Client tuning (env): connection pool, per-call timeout, in-flight cap, retries.
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT_SECONDS", "30"))
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "16"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+GROQ_BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE_SECONDS", "0.5"))
+GROQ_BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX_SECONDS", "8"))
+# Retry budget: each call earns this fraction of a retry, capped, so an outage
+# cannot multiply upstream load by (1 + GROQ_MAX_RETRIES).
+GROQ_RETRY_RATIO = float(os.getenv("GROQ_RETRY_RATIO", "0.2"))
+GROQ_RETRY_BUDGET_MAX = float(os.getenv("GROQ_RETRY_BUDGET_MAX", "10"))
+
 _client: Optional[Any] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_retry_tokens = GROQ_RETRY_BUDGET_MAX
+_latency = LatencyStats()
+_counters = {"retries": 0, "retries_denied": 0, "rejected_unconfigured": 0,
+             "prompt_tokens": 0, "completion_tokens": 0}
+_ttft = LatencyStats()
+
+
+class AIServiceUnavailable(Exception):
+    """Groq is not configured or the request failed after retries."""
+
 
 def _get_client() -> Optional[Any]:
-    """Lazy-init Groq client to avoid import-time errors (e.g. httpx proxies compatibility on Render)."""
+    """Lazy-init the shared AsyncGroq client (one pooled httpx.AsyncClient for all calls)."""
     global _client
     if _client is not None:
         return _client
     if not GROQ_API_KEY:
         return None
     try:
-        from groq import Groq
-        _client = Groq(api_key=GROQ_API_KEY)
+        import httpx
+        from groq import AsyncGroq
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GROQ_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(max_connections=GROQ_MAX_CONCURRENCY, max_keepalive_connections=GROQ_MAX_CONCURRENCY),
+        )
+        # max_retries=0: retries are handled here so they share the budget and metrics
+        _client = AsyncGroq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, http_client=http_client, max_retries=0)
         return _client
     except TypeError as e:
         logger.warning("Groq client init failed (e.g. httpx version): %s", e)
@@ -26,27 +63,192 @@ def _get_client() -> Optional[Any]:
         logger.warning("Groq client init failed: %s", e)
         return None
 
-def get_ai_response(messages: List[Dict[str, str]], model: str = "llama-3.3-70b-versatile") -> str:
-    """Get a chat completion from Groq"""
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def close_ai_client() -> None:
+    global _client, _semaphore
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _semaphore = None
+
+
+def _is_retryable(e: Exception) -> bool:
+    import groq
+    if isinstance(e, (groq.APIConnectionError, groq.APITimeoutError)):
+        return True
+    status = getattr(e, "status_code", None)
+    return status == 429 or (isinstance(status, int) and status >= 500)
+
+
+def _backoff_delay(e: Exception, attempt: int) -> float:
+    response = getattr(e, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), GROQ_BACKOFF_MAX)
+        except ValueError:
+            pass
+    delay = min(GROQ_BACKOFF_BASE * (2 ** attempt), GROQ_BACKOFF_MAX)
+    return delay * (0.5 + random.random() / 2)  # jitter
+
+
+def _earn_retry_credit() -> None:
+    global _retry_tokens
+    _retry_tokens = min(GROQ_RETRY_BUDGET_MAX, _retry_tokens + GROQ_RETRY_RATIO)
+
+
+def _spend_retry_credit() -> bool:
+    global _retry_tokens
+    if _retry_tokens >= 1:
+        _retry_tokens -= 1
+        _counters["retries"] += 1
+        return True
+    _counters["retries_denied"] += 1
+    return False
+
+
+async def _create_with_retries(client: Any, **kwargs: Any) -> Any:
+    """chat.completions.create with exponential backoff on 429/5xx/connection errors."""
+    _earn_retry_credit()
+    attempt = 0
+    while True:
+        try:
+            return await client.chat.completions.create(**kwargs)
+        except Exception as e:
+            if attempt >= GROQ_MAX_RETRIES or not _is_retryable(e) or not _spend_retry_credit():
+                raise
+            delay = _backoff_delay(e, attempt)
+            logger.warning("Groq call failed (%s); retry %s in %.2fs", e, attempt + 1, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def _record_usage(usage: Any) -> None:
+    if usage is None:
+        return
+    _counters["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+    _counters["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+
+async def get_ai_response(
+    messages: List[Dict[str, str]],
+    model: str = DEFAULT_MODEL,
+    *,
+    use_cache: bool = True,
+    cache_scope: str | None = None,
+    max_tokens: int = 1024,
+    json_mode: bool = False,
+) -> str:
+    """
+    Get a chat completion from Groq. Raises AIServiceUnavailable on failure.
+    Pass cache_scope (e.g. "user:42") when the prompt contains personal context,
+    use_cache=False to always hit the model, json_mode=True to request a JSON object.
+    """
+    if use_cache:
+        cached = response_cache.lookup(messages, model, cache_scope)
+        if cached is not None:
+            return cached
     client = _get_client()
     if not client:
+        _counters["rejected_unconfigured"] += 1
         logger.warning("GROQ_API_KEY not found in environment")
-        return "AI response unavailable: API key missing."
-    
-    try:
-        completion = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=0.7,
-            max_tokens=1024,
-        )
-        return completion.choices[0].message.content
-    except Exception as e:
-        logger.error(f"Groq API error: {e}")
-        return f"Error connecting to AI service: {str(e)}"
+        raise AIServiceUnavailable("AI response unavailable: API key missing.")
+
+    extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+    async with _get_semaphore():
+        started = time.perf_counter()
+        try:
+            completion = await _create_with_retries(
+                client,
+                model=model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=max_tokens,
+                **extra,
+            )
+        except Exception as e:
+            _latency.observe((time.perf_counter() - started) * 1000, ok=False)
+            logger.error(f"Groq API error: {e}")
+            raise AIServiceUnavailable(f"Error connecting to AI service: {str(e)}") from e
+        _latency.observe((time.perf_counter() - started) * 1000)
+        _record_usage(getattr(completion, "usage", None))
+        reply = completion.choices[0].message.content
+    if use_cache:
+        response_cache.store(messages, model, reply, cache_scope)
+    return reply
+
+
+async def stream_ai_response(
+    messages: List[Dict[str, str]],
+    model: str = DEFAULT_MODEL,
+    *,
+    use_cache: bool = True,
+    cache_scope: str | None = None,
+) -> AsyncIterator[str]:
+    """Yield completion text deltas as Groq streams them (a cached reply arrives as one delta)."""
+    if use_cache:
+        cached = response_cache.lookup(messages, model, cache_scope)
+        if cached is not None:
+            yield cached
+            return
+    client = _get_client()
+    if not client:
+        _counters["rejected_unconfigured"] += 1
+        raise AIServiceUnavailable("AI response unavailable: API key missing.")
+    parts: list[str] = []
+    async with _get_semaphore():
+        started = time.perf_counter()
+        first = True
+        try:
+            stream = await _create_with_retries(
+                client,
+                model=model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1024,
+                stream=True,
+            )
+            async for chunk in stream:
+                x_groq = getattr(chunk, "x_groq", None)
+                _record_usage(getattr(x_groq, "usage", None) if x_groq else None)
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    if first:
+                        _ttft.observe((time.perf_counter() - started) * 1000)
+                        first = False
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            _latency.observe((time.perf_counter() - started) * 1000, ok=False)
+            logger.error(f"Groq streaming error: {e}")
+            raise AIServiceUnavailable(f"Error connecting to AI service: {str(e)}") from e
+        _latency.observe((time.perf_counter() - started) * 1000)
+    if use_cache:
+        response_cache.store(messages, model, "".join(parts), cache_scope)
+
+
+def ai_metrics() -> dict:
+    return {
+        "latency": _latency.snapshot(),
+        "stream_ttft": _ttft.snapshot(),
+        "in_flight": (GROQ_MAX_CONCURRENCY - _semaphore._value) if _semaphore else 0,
+        "max_concurrency": GROQ_MAX_CONCURRENCY,
+        "retry_budget": round(_retry_tokens, 2),
+        **_counters,
+        "cache": response_cache.stats(),
+    }
+
 
-def generate_health_summary(data: Dict[str, Any]) -> str:
+async def generate_health_summary(data: Dict[str, Any], user_id: int | None = None, use_cache: bool = True) -> str:
     """Generate a summary of user's health metrics"""
-    prompt = f"Analyze these health metrics and provide a brief, professional summary: {json.dumps(data)}"
+    prompt = f"Analyze these health metrics and provide a brief, professional summary: {json.dumps(data, sort_keys=True)}"
     messages = [{"role": "user", "content": prompt}]
-    return get_ai_response(messages)
+    scope = f"user:{user_id}" if user_id is not None else None
+    return await get_ai_response(messages, use_cache=use_cache, cache_scope=scope)
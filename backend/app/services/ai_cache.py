@@ -0,0 +1,195 @@
+"""
+Response cache in front of ai_agent.
+
+Exact tier: normalized messages + model (+ optional scope, e.g. "user:42" when the prompt
+carries personal context) -> reply, TTL and LRU bounded.
+Similarity tier (opt-in with AI_CACHE_SEMANTIC=true, needs numpy): single-question, unscoped
+prompts are embedded as hashed character trigrams and matched by cosine similarity against
+recent questions asked under the same model and system prompt. Trigrams cannot tell
+"with knee pain" from "without knee pain", so a near match also needs the same content
+words and numbers; only wording, punctuation, plurals and filler words may differ.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+from app.core.cache import TTLCache
+
+try:
+    import numpy as np
+except ImportError:  # similarity tier disabled
+    np = None
+
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() == "true"
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL_SECONDS", str(6 * 3600)))
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "2048"))
+AI_CACHE_SEMANTIC = os.getenv("AI_CACHE_SEMANTIC", "false").lower() == "true" and np is not None
+AI_CACHE_SIMILARITY = float(os.getenv("AI_CACHE_SIMILARITY", "0.95"))
+_EMBED_DIM = 512
+
+_WS = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"[\s?!.]+$")
+_WORDS = re.compile(r"[a-z0-9]+(?:'[a-z]+)?(?:\.[0-9]+)?")
+# Words that never change what a question asks. Negations (no, not, without, ...) and
+# comparatives (more, less) are deliberately absent.
+_FILLER = frozenset(
+    "a an the is are am was were be been do does did i im i'm me my you your it its it's of for to "
+    "in on at by with and or what what's whats how which who when where why can could should would "
+    "will some any that this these those there as about per so just please tell give".split()
+)
+
+
+def normalize_prompt(text: str) -> str:
+    return _TRAILING_PUNCT.sub("", _WS.sub(" ", text.strip().lower()))
+
+
+def _key(messages: List[Dict[str, str]], model: str, scope: str | None) -> str:
+    canonical = json.dumps(
+        [model, scope, [(m.get("role"), normalize_prompt(m.get("content") or "")) for m in messages]],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _question(messages: List[Dict[str, str]]) -> str | None:
+    """The user text of a stateless prompt (optional system message + one user message)."""
+    convo = [m for m in messages if m.get("role") != "system"]
+    if len(convo) == 1 and convo[0].get("role") == "user":
+        return normalize_prompt(convo[0].get("content") or "")
+    return None
+
+
+def _content_key(question: str) -> int:
+    """Hash of the question's content words (crudely singularized) and numbers, order-free."""
+    words = set()
+    for word in _WORDS.findall(question):
+        if word in _FILLER:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    digest = hashlib.blake2b(" ".join(sorted(words)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def _index_key(messages: List[Dict[str, str]], model: str) -> str:
+    """Near matches stay within one model and one system prompt."""
+    system = [normalize_prompt(m.get("content") or "") for m in messages if m.get("role") == "system"]
+    return hashlib.sha256(json.dumps([model, system]).encode()).hexdigest()
+
+
+def _embed(text: str):
+    vec = np.zeros(_EMBED_DIM, dtype=np.float32)
+    padded = f"  {text} "
+    for i in range(len(padded) - 2):
+        h = int.from_bytes(hashlib.blake2b(padded[i:i + 3].encode(), digest_size=4).digest(), "little")
+        vec[h % _EMBED_DIM] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class _VectorIndex:
+    """
+    Fixed-capacity matrix of unit vectors; nearest neighbour by a single matrix-vector product,
+    restricted to rows with the same content key.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._slots: OrderedDict[str, int] = OrderedDict()  # cache key -> row, oldest first
+        self._matrix = np.zeros((capacity, _EMBED_DIM), dtype=np.float32)
+        self._keys: list[str | None] = [None] * capacity
+        self._content = np.zeros(capacity, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def add(self, key: str, vec, content: int) -> None:
+        with self._lock:
+            if key in self._slots:
+                row = self._slots.pop(key)
+            elif len(self._slots) < self.capacity:
+                row = len(self._slots)
+            else:
+                _, row = self._slots.popitem(last=False)
+            self._slots[key] = row
+            self._matrix[row] = vec
+            self._keys[row] = key
+            self._content[row] = content
+
+    def nearest(self, vec, content: int) -> tuple[str | None, float]:
+        with self._lock:
+            n = len(self._slots)
+            if not n:
+                return None, 0.0
+            scores = np.where(self._content[:n] == content, self._matrix[:n] @ vec, -1.0)
+            row = int(np.argmax(scores))
+            if scores[row] < 0:
+                return None, 0.0
+            return self._keys[row], float(scores[row])
+
+
+class ResponseCache:
+    def __init__(self):
+        self._exact = TTLCache(maxsize=AI_CACHE_SIZE, ttl=AI_CACHE_TTL)
+        self._indexes: dict[str, _VectorIndex] = {}  # per model and system prompt
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def lookup(self, messages: List[Dict[str, str]], model: str, scope: str | None = None) -> str | None:
+        if not AI_CACHE_ENABLED:
+            return None
+        reply = self._exact.get(_key(messages, model, scope))
+        if reply is not None:
+            self.exact_hits += 1
+            return reply
+        question = _question(messages) if scope is None and AI_CACHE_SEMANTIC else None
+        index = self._indexes.get(_index_key(messages, model)) if question else None
+        if index is not None:
+            near_key, score = index.nearest(_embed(question), _content_key(question))
+            if near_key and score >= AI_CACHE_SIMILARITY:
+                # Values live in the exact tier, so TTL/eviction there also retires the vector
+                reply = self._exact.get(near_key)
+                if reply is not None:
+                    self.semantic_hits += 1
+                    return reply
+        self.misses += 1
+        return None
+
+    def store(self, messages: List[Dict[str, str]], model: str, reply: str, scope: str | None = None) -> None:
+        if not AI_CACHE_ENABLED or not reply:
+            return
+        key = _key(messages, model, scope)
+        self._exact.set(key, reply)
+        self.stores += 1
+        if scope is None and AI_CACHE_SEMANTIC:
+            question = _question(messages)
+            if question:
+                index = self._indexes.setdefault(_index_key(messages, model), _VectorIndex(AI_CACHE_SIZE))
+                index.add(key, _embed(question), _content_key(question))
+
+    def clear(self) -> None:
+        self._exact.clear()
+        self._indexes.clear()
+
+    def stats(self) -> dict:
+        exact = self._exact.stats()
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "enabled": AI_CACHE_ENABLED,
+            "semantic_enabled": AI_CACHE_SEMANTIC,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "size": exact["size"],
+            "evictions": exact["evictions"],
+        }
+
+
+response_cache = ResponseCache()
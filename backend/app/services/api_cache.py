@@ -0,0 +1,160 @@
+"""
+Two-tier read-through cache for third-party API responses.
+
+Tier 1 is an in-process TTLCache; tier 2 is the api_cache table, so entries survive restarts
+and are shared by workers. An entry is fresh for `ttl` seconds, then served stale for up to
+`stale_ttl` more while one background call refreshes it (stale-while-revalidate). Concurrent
+misses for the same key share a single upstream call. Failed calls are never cached.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.cache import TTLCache
+from app.database import AsyncSessionLocal
+from app.models.api_cache import ApiCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class ReadThroughCache:
+    def __init__(self, namespace: str, ttl: float, stale_ttl: float, maxsize: int = 1024):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.memory = TTLCache(maxsize, ttl + stale_ttl)  # key -> (fetched_at epoch, value)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.counters = {
+            "lookups": 0, "memory_hits": 0, "db_hits": 0, "stale_served": 0, "misses": 0,
+            "coalesced": 0, "upstream_calls": 0, "upstream_errors": 0, "refreshes": 0,
+        }
+
+    def key(self, params: dict) -> str:
+        canonical = json.dumps([self.namespace, params], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    async def get(self, params: dict, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for `params`; `fetch()` is called on a miss and to refresh stale entries."""
+        key = self.key(params)
+        self.counters["lookups"] += 1
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.counters["memory_hits"] += 1
+        else:
+            entry = await self._load(key)
+            if entry is not None:
+                self.counters["db_hits"] += 1
+                self.memory.set(key, entry, ttl=entry[0] + self.ttl + self.stale_ttl - time.time())
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age <= self.ttl:
+                return entry[1]
+            if age <= self.ttl + self.stale_ttl:
+                self.counters["stale_served"] += 1
+                self._refresh(key, params, fetch)
+                return entry[1]
+        self.counters["misses"] += 1
+        return await asyncio.shield(self._call(key, params, fetch))
+
+    def _call(self, key: str, params: dict, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """The upstream call in flight for `key`, started if there is none (single flight)."""
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            self.counters["coalesced"] += 1
+            return task
+        task = asyncio.ensure_future(self._fetch_and_store(key, params, fetch))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    def _refresh(self, key: str, params: dict, fetch: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._inflight:
+            return
+        self.counters["refreshes"] += 1
+
+        def _done(task: asyncio.Future) -> None:
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning("%s refresh failed, keeping the stale entry: %s", self.namespace, task.exception())
+
+        self._call(key, params, fetch).add_done_callback(_done)
+
+    async def _fetch_and_store(self, key: str, params: dict, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        self.counters["upstream_calls"] += 1
+        try:
+            value = await fetch()
+        except Exception:
+            self.counters["upstream_errors"] += 1
+            raise
+        fetched_at = time.time()
+        self.memory.set(key, (fetched_at, value))
+        await self._store(key, params, value, fetched_at)
+        return value
+
+    async def _load(self, key: str) -> tuple[float, Any] | None:
+        try:
+            async with AsyncSessionLocal() as db:
+                row = (await db.execute(
+                    select(ApiCacheEntry.fetched_at, ApiCacheEntry.value).where(ApiCacheEntry.key == key)
+                )).first()
+        except SQLAlchemyError as e:
+            logger.warning("%s cache read failed: %s", self.namespace, e)
+            return None
+        if row is None:
+            return None
+        fetched_at = row.fetched_at.replace(tzinfo=timezone.utc).timestamp()
+        if time.time() - fetched_at > self.ttl + self.stale_ttl:
+            return None
+        return fetched_at, row.value
+
+    async def _store(self, key: str, params: dict, value: Any, fetched_at: float) -> None:
+        """Upsert the persistent entry; a failed write only costs a future miss."""
+        try:
+            async with AsyncSessionLocal() as db:
+                if db.get_bind().dialect.name == "postgresql":
+                    from sqlalchemy.dialects.postgresql import insert
+                else:
+                    from sqlalchemy.dialects.sqlite import insert
+                stmt = insert(ApiCacheEntry).values(
+                    key=key, namespace=self.namespace, params=params, value=value,
+                    fetched_at=datetime.fromtimestamp(fetched_at, timezone.utc).replace(tzinfo=None),
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["key"],
+                    set_={c: stmt.excluded[c] for c in ("params", "value", "fetched_at")},
+                )
+                await db.execute(stmt)
+                await db.commit()
+        except SQLAlchemyError as e:
+            logger.warning("%s cache write failed: %s", self.namespace, e)
+
+    def stats(self) -> dict:
+        c = self.counters
+        hits = c["memory_hits"] + c["db_hits"]
+        return {
+            **c,
+            "hit_ratio": round((c["lookups"] - c["misses"]) / c["lookups"], 4) if c["lookups"] else 0.0,
+            "memory_hit_ratio": round(c["memory_hits"] / hits, 4) if hits else 0.0,
+            "in_flight": len(self._inflight),
+            "memory": self.memory.stats(),
+        }
+
+
+_caches: dict[str, ReadThroughCache] = {}
+
+
+def register_cache(namespace: str, **options: Any) -> ReadThroughCache:
+    """Create (once) the named cache; integrations call this at import time."""
+    if namespace not in _caches:
+        _caches[namespace] = ReadThroughCache(namespace, **options)
+    return _caches[namespace]
+
+
+def api_cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in _caches.items()}
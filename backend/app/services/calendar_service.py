@@ -1,10 +1,16 @@
 """Google Calendar API for schedule syncing."""
 import os
+from datetime import datetime, timezone
 from typing import Any
 
+from app.services.http_client import UpstreamError, register_upstream
+
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/auth/google/callback")
+GOOGLE_CALENDAR_BASE_URL = os.getenv("GOOGLE_CALENDAR_BASE_URL", "https://www.googleapis.com/calendar/v3")
+
+upstream = register_upstream("google_calendar", GOOGLE_CALENDAR_BASE_URL, timeout=10.0)
 
 
 def get_auth_url(state: str | None = None) -> str:
@@ -32,24 +38,17 @@ def get_auth_url(state: str | None = None) -> str:
         return ""
 
 
-def list_events(access_token: str, max_results: int = 50) -> list[dict[str, Any]]:
+async def list_events(access_token: str, max_results: int = 50) -> list[dict[str, Any]]:
     """Fetch upcoming events using access token (simplified; full flow would store refresh token)."""
     if not access_token:
         return []
+    now = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
     try:
-        from google.oauth2.credentials import Credentials
-        from googleapiclient.discovery import build
-        creds = Credentials(token=access_token)
-        service = build("calendar", "v3", credentials=creds)
-        from datetime import datetime, timezone
-        now = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
-        events_result = service.events().list(
-            calendarId="primary",
-            timeMin=now,
-            maxResults=max_results,
-            singleEvents=True,
-            orderBy="startTime",
-        ).execute()
-        return events_result.get("items", [])
-    except Exception:
+        data = await upstream.get_json(
+            "/calendars/primary/events",
+            params={"timeMin": now, "maxResults": max_results, "singleEvents": "true", "orderBy": "startTime"},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        return data.get("items", [])
+    except UpstreamError:
         return []
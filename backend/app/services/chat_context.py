@@ -0,0 +1,140 @@
+"""
+Token-budgeted conversation context for AROMI chat sessions.
+
+The prompt is: system prompt + rolling summary of older turns (stored on the session)
++ as many of the newest not-yet-summarized messages as fit in CHAT_CONTEXT_TOKEN_BUDGET
++ the new message. The summary is extended incrementally with only the turns that have
+aged out of the recent window since it was last updated; until a batch of them has
+accumulated they stay in the prompt, so no turn is ever in neither place.
+"""
+import logging
+import os
+from functools import lru_cache
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models.chat import ChatMessage, ChatSession
+
+logger = logging.getLogger(__name__)
+
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "6000"))
+HISTORY_MESSAGES = int(os.getenv("AROMI_HISTORY_MESSAGES", "20"))
+# Fold aged-out turns into the summary once this many have accumulated
+SUMMARY_BATCH_MESSAGES = int(os.getenv("CHAT_SUMMARY_BATCH_MESSAGES", "10"))
+SUMMARY_MAX_TOKENS = 400
+_MESSAGE_OVERHEAD_TOKENS = 4  # role/separator tokens per chat message
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken's cl100k_base when installed and loadable; it approximates LLaMA's tokenizer well."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # not installed, or the BPE file can't be fetched offline
+        logger.info("tiktoken unavailable (%s); using character-based token estimate", e)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: dict) -> int:
+    return count_tokens(message.get("content") or "") + _MESSAGE_OVERHEAD_TOKENS
+
+
+async def _recent_messages(db: AsyncSession, session_id: int, limit: int, after_id: int | None = None) -> list[ChatMessage]:
+    """Newest `limit` messages (after after_id), oldest first (served by ix_chat_messages_session_created)."""
+    result = await db.execute(
+        select(ChatMessage)
+        .where(ChatMessage.session_id == session_id, ChatMessage.id > (after_id or 0))
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+        .limit(limit)
+    )
+    return list(reversed(result.scalars().all()))
+
+
+async def build_context(
+    db: AsyncSession,
+    session: ChatSession | None,
+    message: str,
+    system_prompt: str,
+    budget: int = CHAT_CONTEXT_TOKEN_BUDGET,
+) -> list[dict]:
+    """Chat messages for the model, newest history first to be dropped last."""
+    head = [{"role": "system", "content": system_prompt}]
+    if session is not None and session.summary:
+        head.append({"role": "system", "content": f"Summary of the earlier conversation: {session.summary}"})
+    tail = [{"role": "user", "content": message}]
+    remaining = budget - sum(message_tokens(m) for m in head + tail)
+
+    history: list[dict] = []
+    if session is not None:
+        # Everything the summary does not cover yet: the recent window plus up to a batch of
+        # aged-out turns waiting for refresh_summary (more only if summarizing keeps failing).
+        unsummarized = await _recent_messages(
+            db, session.id, HISTORY_MESSAGES + SUMMARY_BATCH_MESSAGES, after_id=session.summary_through_id,
+        )
+        for m in reversed(unsummarized):
+            item = {"role": m.role, "content": m.content}
+            cost = message_tokens(item)
+            if cost > remaining:
+                break
+            remaining -= cost
+            history.append(item)
+        history.reverse()
+    return head + history + tail
+
+
+async def refresh_summary(session_id: int) -> None:
+    """
+    Fold turns older than the recent window into session.summary. Runs after the reply
+    is sent, on its own DB sessions; only messages newer than summary_through_id are read.
+    A concurrent refresh that got there first wins (the update is conditional).
+    """
+    from app.services.ai_agent import AIServiceUnavailable, get_ai_response
+
+    async with AsyncSessionLocal() as db:
+        session = await db.get(ChatSession, session_id)
+        if session is None:
+            return
+        window = await _recent_messages(db, session_id, HISTORY_MESSAGES)
+        if len(window) < HISTORY_MESSAGES:
+            return
+        result = await db.execute(
+            select(ChatMessage)
+            .where(
+                ChatMessage.session_id == session_id,
+                ChatMessage.id > (session.summary_through_id or 0),
+                ChatMessage.id < window[0].id,
+            )
+            .order_by(ChatMessage.id)
+        )
+        aged_out = result.scalars().all()
+    if len(aged_out) < SUMMARY_BATCH_MESSAGES:
+        return
+    transcript = "\n".join(f"{m.role}: {m.content}" for m in aged_out)
+    prompt = (
+        "Update the running summary of a fitness coaching conversation with the new turns below. "
+        "Keep the user's goals, constraints, preferences and any advice already given. "
+        f"Reply with the updated summary only, under {SUMMARY_MAX_TOKENS} tokens.\n\n"
+        f"Current summary:\n{session.summary or '(none)'}\n\nNew turns:\n{transcript}"
+    )
+    try:
+        summary = await get_ai_response([{"role": "user", "content": prompt}], use_cache=False)
+    except AIServiceUnavailable as e:
+        logger.warning("Chat summary refresh skipped for session %s: %s", session_id, e)
+        return
+    async with AsyncSessionLocal() as db:  # no connection held while the model was summarizing
+        await db.execute(
+            update(ChatSession)
+            .where(ChatSession.id == session_id, ChatSession.summary_through_id.is_not_distinct_from(session.summary_through_id))
+            .values(summary=summary.strip(), summary_through_id=aged_out[-1].id)
+        )
+        await db.commit()
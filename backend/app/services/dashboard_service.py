@@ -0,0 +1,118 @@
+"""
+Home-page summary: everything the dashboard shows, in one request.
+
+The user is resolved once by the route and each component below is one or two indexed
+lookups, run one after another on the request's session: the request holds a single
+pooled connection and costs a handful of index seeks instead of one authenticated round
+trip per widget.
+
+    python -m benchmarks.dashboard [--runs N]   # summary vs the per-widget fan-out
+"""
+import time
+from datetime import date, datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import LatencyStats
+from app.models.achievement import UserAchievement
+from app.models.health import HealthAssessment
+from app.models.nutrition import NutritionPlan
+from app.models.progress import ProgressEntry
+from app.services.achievements import RULES_BY_CODE, WORKOUT_ENTRY_TYPE
+from app.services.nutrition_service import get_daily_totals
+from app.services.workout_service import get_today_workout
+from app.services.workout_stats import get_today_summary
+
+RECENT_PROGRESS = 5
+RECENT_ACHIEVEMENTS = 3
+_summary_latency = LatencyStats()
+
+
+async def _nutrition(db: AsyncSession, user_id: int, today: date) -> dict:
+    """Today's totals (rollup row) against the newest active plan's targets."""
+    totals = await get_daily_totals(db, user_id, today)
+    plan = (await db.execute(
+        select(NutritionPlan.name, NutritionPlan.daily_calories, NutritionPlan.protein_grams,
+               NutritionPlan.carbs_grams, NutritionPlan.fat_grams)
+        .where(NutritionPlan.user_id == user_id, NutritionPlan.is_active == 1)
+        .order_by(NutritionPlan.created_at.desc()).limit(1)
+    )).first()
+    targets = None
+    if plan is not None:
+        targets = {"plan": plan.name, "calories": plan.daily_calories, "protein": plan.protein_grams,
+                   "carbs": plan.carbs_grams, "fat": plan.fat_grams}
+    return {**totals, "targets": targets}
+
+
+async def _assessment(db: AsyncSession, user_id: int) -> dict | None:
+    a = (await db.execute(
+        select(HealthAssessment).where(HealthAssessment.user_id == user_id)
+        .order_by(HealthAssessment.updated_at.desc()).limit(1)
+    )).scalars().first()
+    if a is None:
+        return None
+    return {
+        "bmi": a.bmi, "bmi_category": a.bmi_category, "weight_kg": a.weight_kg, "height_cm": a.height_cm,
+        "sleep_hours": a.sleep_hours, "stress_level": a.stress_level, "fitness_goal": a.fitness_goal,
+        "fitness_level": a.fitness_level, "updated_at": a.updated_at,
+    }
+
+
+async def _recent_progress(db: AsyncSession, user_id: int) -> list[dict]:
+    rows = (await db.execute(
+        select(ProgressEntry.id, ProgressEntry.entry_type, ProgressEntry.value, ProgressEntry.unit, ProgressEntry.recorded_at)
+        .where(ProgressEntry.user_id == user_id, ProgressEntry.entry_type != WORKOUT_ENTRY_TYPE)
+        .order_by(ProgressEntry.recorded_at.desc(), ProgressEntry.id.desc()).limit(RECENT_PROGRESS)
+    )).all()
+    return [r._asdict() for r in rows]
+
+
+async def _achievements(db: AsyncSession, user_id: int) -> dict:
+    rows = (await db.execute(
+        select(UserAchievement.code, UserAchievement.unlocked_at)
+        .where(UserAchievement.user_id == user_id).order_by(UserAchievement.unlocked_at.desc(), UserAchievement.id.desc())
+    )).all()
+    rules = [(RULES_BY_CODE[code], at) for code, at in rows if code in RULES_BY_CODE]
+    return {
+        "unlocked": len(rules),
+        "points": sum(r.points for r, _ in rules),
+        "recent": [{"id": r.code, "title": r.title, "icon": r.icon, "points": r.points, "unlocked_at": at}
+                   for r, at in rules[:RECENT_ACHIEVEMENTS]],
+    }
+
+
+async def dashboard_summary(
+    db: AsyncSession, user, today: date | None = None, local_today: date | None = None,
+) -> dict:
+    """
+    The dashboard document for an already-resolved user, read on one session.
+    Totals and streaks use UTC days (today); the planned workout uses the caller's local day.
+    """
+    started = time.perf_counter()
+    today = today or datetime.utcnow().date()
+    local_today = local_today or today
+    uid = user.id
+    workout = await get_today_workout(db, uid, local_today)
+    nutrition = await _nutrition(db, uid, today)
+    assessment = await _assessment(db, uid)
+    progress = await _recent_progress(db, uid)
+    workouts = await get_today_summary(db, uid, today)
+    achievements = await _achievements(db, uid)
+    _summary_latency.observe((time.perf_counter() - started) * 1000)
+    return {
+        "date": today.isoformat(),
+        "user": {"id": uid, "full_name": user.full_name, "email": user.email},
+        "today_workout": workout,
+        "today_exercise": workouts["today"],
+        "streak": workouts["streak"],
+        "nutrition": nutrition,
+        "assessment": assessment,
+        "recent_progress": progress,
+        "achievements": achievements,
+    }
+
+
+def dashboard_stats() -> dict:
+    return {"summary": _summary_latency.snapshot()}
+
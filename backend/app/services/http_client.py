@@ -0,0 +1,256 @@
+"""
+Shared outbound HTTP for third-party integrations (Spoonacular, YouTube, Google Calendar).
+
+One process-wide httpx.AsyncClient (keep-alive connections pooled per host, HTTP/2 when the
+h2 package is installed), opened lazily and closed from main.lifespan. Each upstream gets
+its own timeout, circuit breaker, retry budget and latency/error metrics.
+Groq keeps its own client in ai_agent: the SDK manages that transport itself.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Optional
+
+from app.core.metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+_RETRY_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Statuses that say the upstream is unusable for now, not that the request was wrong:
+# 402 = quota exhausted (Spoonacular), 429 = rate limited. Both count against the breaker;
+# only 429 (and 5xx) is worth retrying.
+_FAILURE_STATUSES = {402, 429}
+_client: Optional[Any] = None
+
+
+class UpstreamError(Exception):
+    """An outbound call failed (transport error, timeout or error status)."""
+
+    def __init__(self, upstream: str, message: str, status_code: int | None = None):
+        super().__init__(f"{upstream}: {message}")
+        self.upstream = upstream
+        self.status_code = status_code
+
+
+class CircuitOpen(UpstreamError):
+    """The upstream's breaker is open; the call was not attempted."""
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_http_client():
+    global _client
+    if _client is None:
+        import httpx
+        _client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for `reset_after` seconds,
+    then lets a single probe through (half-open): success closes it, failure re-opens it.
+    """
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """The probe ended without recording an outcome (cancelled, unexpected error)."""
+        self._probing = False
+
+    def record(self, ok: bool) -> None:
+        self._probing = False
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.threshold:
+            if self.opened_at is None:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """Each call earns `ratio` of a retry (capped at `cap`), so retries stay a fraction of traffic."""
+
+    def __init__(self, ratio: float, cap: float):
+        self.ratio = ratio
+        self.cap = cap
+        self.tokens = cap
+
+    def earn(self) -> None:
+        self.tokens = min(self.cap, self.tokens + self.ratio)
+
+    def spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class Upstream:
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        *,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        max_retries: int = 2,
+        retry_ratio: float = 0.2,
+        retry_budget: float = 10.0,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.budget = RetryBudget(retry_ratio, retry_budget)
+        self.latency = LatencyStats()
+        self.counters = {"retries": 0, "retries_denied": 0, "short_circuited": 0, "client_errors": 0}
+
+    def _url(self, path: str) -> str:
+        return path if path.startswith("http") else f"{self.base_url}{path}"
+
+    async def request(self, method: str, path: str, **kwargs: Any):
+        """
+        Send a request; returns the httpx.Response for 2xx-4xx (other 4xx are the caller's
+        business). Raises CircuitOpen when the breaker is open and UpstreamError on transport
+        errors, timeouts, 402, 429 and 5xx once retries (idempotent methods only) are exhausted.
+        """
+        probe = self.breaker.state != "closed"
+        if not self.breaker.allow():
+            self.counters["short_circuited"] += 1
+            raise CircuitOpen(self.name, "circuit open")
+        self.budget.earn()
+        try:
+            return await self._send(method, path, kwargs)
+        finally:
+            if probe:  # whatever happened (cancelled, unexpected error), let the next probe through
+                self.breaker.release()
+
+    async def _send(self, method: str, path: str, kwargs: dict):
+        import httpx
+
+        kwargs.setdefault("timeout", httpx.Timeout(self.timeout, connect=self.connect_timeout))
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            error: UpstreamError | None = None
+            try:
+                res = await get_http_client().request(method, self._url(path), **kwargs)
+                if res.status_code in _FAILURE_STATUSES or res.status_code >= 500:
+                    error = UpstreamError(self.name, f"HTTP {res.status_code}", res.status_code)
+            except httpx.HTTPError as e:
+                res = None
+                error = UpstreamError(self.name, type(e).__name__)  # str(e) may carry the URL and its api key
+            self.latency.observe((time.perf_counter() - started) * 1000, ok=error is None)
+            if error is None:
+                self.breaker.record(True)
+                if res.status_code >= 400:
+                    self.counters["client_errors"] += 1
+                return res
+            if (
+                attempt >= self.max_retries
+                or method.upper() not in _RETRY_METHODS
+                or error.status_code == 402
+                or self.breaker.state != "closed"
+            ):
+                self.breaker.record(False)
+                raise error
+            if not self.budget.spend():
+                self.counters["retries_denied"] += 1
+                self.breaker.record(False)
+                raise error
+            self.counters["retries"] += 1
+            delay = min(0.2 * (2 ** attempt), 2.0) * (0.5 + random.random() / 2)
+            logger.info("%s %s failed (%s); retry %s in %.2fs", self.name, method, error, attempt + 1, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get_json(self, path: str, **kwargs: Any) -> Any:
+        """GET and decode JSON; error statuses (including 4xx) raise UpstreamError."""
+        res = await self.request("GET", path, **kwargs)
+        if res.status_code >= 400:
+            raise UpstreamError(self.name, f"HTTP {res.status_code}", res.status_code)
+        return res.json()
+
+    def stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "circuit": self.breaker.state,
+            "circuit_trips": self.breaker.trips,
+            "retry_budget": round(self.budget.tokens, 2),
+            **self.counters,
+            "latency": self.latency.snapshot(),
+        }
+
+
+_upstreams: dict[str, Upstream] = {}
+
+
+def register_upstream(name: str, base_url: str, **options: Any) -> Upstream:
+    """Create (once) the named upstream; integrations call this at import time."""
+    if name not in _upstreams:
+        _upstreams[name] = Upstream(name, base_url, **options)
+    return _upstreams[name]
+
+
+def http_client_stats() -> dict:
+    return {
+        "http2": bool(_client is not None and HTTP2_ENABLED and _http2_available()),
+        "upstreams": {name: u.stats() for name, u in _upstreams.items()},
+    }
@@ -1,41 +1,469 @@
-"""Nutrition logic: aggregate meals, use Spoonacular for lookups."""
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-
-from app.models.nutrition import Meal
-from app.services.spoonacular_service import search_ingredients, get_ingredient_info
-
-
-def get_daily_totals(db: Session, user_id: int, date: datetime | None = None) -> dict:
-    """Aggregate calories, protein, carbs, fat for a day."""
-    date = date or datetime.utcnow()
-    start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-    end = start + timedelta(days=1)
-    row = (
-        db.query(
-            func.coalesce(func.sum(Meal.calories), 0).label("calories"),
-            func.coalesce(func.sum(Meal.protein), 0).label("protein"),
-            func.coalesce(func.sum(Meal.carbs), 0).label("carbs"),
-            func.coalesce(func.sum(Meal.fat), 0).label("fat"),
+"""
+Nutrition logic: daily meal rollups and the local ingredient database.
+
+nutrition_logs holds one row per user and UTC day with the totals of the meals logged that
+day. Logging or deleting a meal updates its row in the same transaction, so charts read one
+row per day; check_rollups/rebuild_rollups compare against and recompute from raw meals.
+
+Ingredient autocomplete and lookups read the ingredients table: a prefix range on the
+normalized name first, then word-prefix search (FTS5 on SQLite, pg_trgm on Postgres, LIKE
+when neither index exists). Spoonacular is only asked on a miss, and whatever it returns is
+stored so the next lookup stays local.
+
+    python -m scripts.import_ingredients FILE     # CSV / JSON / NDJSON bulk import
+"""
+import csv
+import json
+import os
+import re
+import time
+import unicodedata
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from sqlalchemy import DateTime, and_, case, func, select, text, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.metrics import LatencyStats
+from app.migrations import INGREDIENTS_FTS
+from app.models.nutrition import Ingredient, Meal, NutritionLog
+from app.services.spoonacular_service import SPOONACULAR_API_KEY, get_ingredient_info, search_ingredients
+
+INGREDIENT_FALLBACK_MIN_RESULTS = int(os.getenv("INGREDIENT_FALLBACK_MIN_RESULTS", "1"))
+INGREDIENT_REMOTE_TTL = float(os.getenv("INGREDIENT_REMOTE_TTL_SECONDS", "86400"))  # don't resend a query for a day
+IMPORT_BATCH_SIZE = 1000
+_ROLLUP_TOTALS = ("total_calories", "total_protein", "total_carbs", "total_fat")
+_NUTRIENT_FIELDS = ("calories", "protein", "carbs", "fat", "fiber", "sugar", "sodium")
+# Spoonacular nutrient name -> column (amounts come back per the requested 100 g; sodium in mg)
+_SPOONACULAR_NUTRIENTS = {
+    "Calories": "calories", "Protein": "protein", "Carbohydrates": "carbs", "Fat": "fat",
+    "Fiber": "fiber", "Sugar": "sugar", "Sodium": "sodium",
+}
+# Accepted bulk-import column names (lower-cased) per field
+_IMPORT_COLUMNS = {
+    "name": ("name", "description", "food", "ingredient"),
+    "calories": ("calories", "kcal", "energy_kcal", "energy"),
+    "protein": ("protein", "protein_g"),
+    "carbs": ("carbs", "carbohydrates", "carbohydrate", "carbs_g", "carbohydrate_g"),
+    "fat": ("fat", "total_fat", "fat_g"),
+    "fiber": ("fiber", "fibre", "fiber_g"),
+    "sugar": ("sugar", "sugars", "sugar_g"),
+    "sodium": ("sodium", "sodium_mg"),
+    "aisle": ("aisle", "category"),
+    "spoonacular_id": ("spoonacular_id",),  # never a generic "id": FDC and Open Food Facts ids are not Spoonacular's
+}
+
+_remote_queries = TTLCache(maxsize=10_000, ttl=INGREDIENT_REMOTE_TTL)  # query keys already sent to Spoonacular
+_search_latency = LatencyStats()
+_backends: dict[str, str] = {}
+_counters = {"searches": 0, "remote_searches": 0, "remote_rows": 0, "lookups": 0, "remote_lookups": 0}
+
+
+# --- daily rollups (nutrition_logs) ---
+
+def meal_day(dialect: str):
+    """SQL for the UTC day of Meal.logged_at, in the same form Python datetimes are stored in."""
+    if dialect == "sqlite":
+        return type_coerce(func.strftime("%Y-%m-%d 00:00:00.000000", Meal.logged_at), DateTime)
+    return func.date_trunc("day", Meal.logged_at)
+
+
+def _day_start(value: datetime | date) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+
+def daily_totals_select(dialect: str, *where):
+    """Per (user, day) sums over logged meals; meals that belong to a nutrition plan are not eaten meals."""
+    day = meal_day(dialect).label("date")
+    return (
+        select(
+            Meal.user_id.label("user_id"),
+            day,
+            func.coalesce(func.sum(Meal.calories), 0).label("total_calories"),
+            func.coalesce(func.sum(Meal.protein), 0).label("total_protein"),
+            func.coalesce(func.sum(Meal.carbs), 0).label("total_carbs"),
+            func.coalesce(func.sum(Meal.fat), 0).label("total_fat"),
+            func.count().label("meal_count"),
         )
-        .filter(Meal.user_id == user_id, Meal.logged_at >= start, Meal.logged_at < end)
-        .first()
+        .where(Meal.nutrition_plan_id.is_(None), *where)
+        .group_by(Meal.user_id, day)
     )
+
+
+def rollup_upsert(dialect: str, increment: bool):
+    """
+    Upsert into nutrition_logs on (user_id, date), executed with row dicts. increment=True adds
+    the deltas (negative when meals are deleted) and snaps totals to 0 when the day's last meal
+    goes; otherwise the given totals replace the stored ones.
+    """
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(NutritionLog)
+    if increment:
+        remaining = func.coalesce(NutritionLog.meal_count, 0) + stmt.excluded.meal_count
+        set_ = {
+            c: case((remaining <= 0, 0.0), else_=func.coalesce(getattr(NutritionLog, c), 0) + stmt.excluded[c])
+            for c in _ROLLUP_TOTALS
+        }
+        set_["meal_count"] = case((remaining <= 0, 0), else_=remaining)
+    else:
+        set_ = {c: stmt.excluded[c] for c in (*_ROLLUP_TOTALS, "meal_count")}
+    return stmt.on_conflict_do_update(index_elements=["user_id", "date"], set_=set_)
+
+
+async def update_rollups(db: AsyncSession, meals: Iterable[Meal], sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) meals from their days' rollups, in the caller's
+    transaction: flush new meals first (logged_at is set on insert), commit afterwards.
+    """
+    deltas: dict[tuple[int, datetime], dict] = {}
+    for m in meals:
+        if m.nutrition_plan_id is not None:
+            continue
+        key = (m.user_id, _day_start(m.logged_at or datetime.utcnow()))
+        row = deltas.setdefault(key, {"user_id": key[0], "date": key[1], "meal_count": 0, **dict.fromkeys(_ROLLUP_TOTALS, 0.0)})
+        row["meal_count"] += sign
+        for col, field in zip(_ROLLUP_TOTALS, ("calories", "protein", "carbs", "fat")):
+            row[col] += sign * (getattr(m, field) or 0)
+    if deltas:
+        await db.execute(rollup_upsert(db.get_bind().dialect.name, increment=True), list(deltas.values()))
+
+
+def _window(user_col, time_col, user_id: int | None, start: date | None, end: date | None) -> list:
+    where = []
+    if user_id is not None:
+        where.append(user_col == user_id)
+    if start is not None:
+        where.append(time_col >= _day_start(start))
+    if end is not None:
+        where.append(time_col < _day_start(end) + timedelta(days=1))
+    return where
+
+
+async def check_rollups(
+    db: AsyncSession, user_id: int | None = None, start: date | None = None, end: date | None = None
+) -> list[dict]:
+    """Days whose stored rollup differs from the sums over raw meals (missing rows count as zeros)."""
+    dialect = db.get_bind().dialect.name
+    expected = {
+        (r.user_id, _day_start(r.date)): r
+        for r in (await db.execute(daily_totals_select(dialect, *_window(Meal.user_id, Meal.logged_at, user_id, start, end)))).all()
+    }
+    stored = {
+        (r.user_id, _day_start(r.date)): r
+        for r in (await db.execute(
+            select(NutritionLog.user_id, NutritionLog.date, NutritionLog.meal_count, *(getattr(NutritionLog, c) for c in _ROLLUP_TOTALS))
+            .where(*_window(NutritionLog.user_id, NutritionLog.date, user_id, start, end))
+        )).all()
+    }
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys()):
+        want, have = expected.get(key), stored.get(key)
+        diff = {}
+        for col in (*_ROLLUP_TOTALS, "meal_count"):
+            a = float(getattr(want, col) or 0) if want else 0.0
+            b = float(getattr(have, col) or 0) if have else 0.0
+            if abs(a - b) > 0.01:
+                diff[col] = {"expected": a, "stored": b}
+        if diff:
+            mismatches.append({"user_id": key[0], "date": key[1].date().isoformat(), "diff": diff})
+    return mismatches
+
+
+async def rebuild_rollups(
+    db: AsyncSession, user_id: int | None = None, start: date | None = None, end: date | None = None
+) -> int:
+    """Recompute rollups in the window from raw meals (rows keep their notes); returns days written."""
+    dialect = db.get_bind().dialect.name
+    await db.execute(
+        update(NutritionLog)
+        .where(*_window(NutritionLog.user_id, NutritionLog.date, user_id, start, end))
+        .values(meal_count=0, **dict.fromkeys(_ROLLUP_TOTALS, 0.0))
+    )
+    rows = [
+        {**r._asdict(), "date": _day_start(r.date)}
+        for r in (await db.execute(daily_totals_select(dialect, *_window(Meal.user_id, Meal.logged_at, user_id, start, end)))).all()
+    ]
+    if rows:
+        await db.execute(rollup_upsert(dialect, increment=False), rows)
+    await db.commit()
+    return len(rows)
+
+
+def _totals_dict(day: datetime, row: NutritionLog | None) -> dict:
     return {
-        "date": start.isoformat()[:10],
-        "calories": float(row.calories or 0),
-        "protein": float(row.protein or 0),
-        "carbs": float(row.carbs or 0),
-        "fat": float(row.fat or 0),
-    } if row else {"date": start.isoformat()[:10], "calories": 0, "protein": 0, "carbs": 0, "fat": 0}
+        "date": day.date().isoformat(),
+        "calories": float(row.total_calories or 0) if row else 0.0,
+        "protein": float(row.total_protein or 0) if row else 0.0,
+        "carbs": float(row.total_carbs or 0) if row else 0.0,
+        "fat": float(row.total_fat or 0) if row else 0.0,
+        "meals": int(row.meal_count or 0) if row else 0,
+    }
+
+
+async def get_daily_range(db: AsyncSession, user_id: int, start: date, end: date) -> list[dict]:
+    """Totals for every day from start to end inclusive (zeros for days without meals), one query."""
+    rows = {
+        _day_start(r.date): r
+        for r in (await db.execute(
+            select(NutritionLog).where(*_window(NutritionLog.user_id, NutritionLog.date, user_id, start, end))
+        )).scalars()
+    }
+    first = _day_start(start)
+    return [_totals_dict(day, rows.get(day)) for day in (first + timedelta(days=i) for i in range((end - start).days + 1))]
+
+
+async def get_daily_totals(db: AsyncSession, user_id: int, day: datetime | date | None = None) -> dict:
+    """Calories, protein, carbs, fat for one (UTC) day, from its rollup row."""
+    day = day or datetime.utcnow()
+    return (await get_daily_range(db, user_id, day, day))[0]
+
+
+def ingredient_key(name: str) -> str:
+    """Search key: ASCII-folded lowercase words ("Jalapeño  Peppers" -> "jalapeno peppers")."""
+    folded = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return " ".join(re.findall(r"[a-z0-9]+", folded.lower()))[:255]
+
+
+def ingredient_dict(i: Ingredient) -> dict:
+    return {
+        "id": i.id,
+        "name": i.name,
+        "aisle": i.aisle,
+        "image": i.image,
+        "spoonacular_id": i.spoonacular_id,
+        "per": "100g",
+        **{f: getattr(i, f) for f in _NUTRIENT_FIELDS},
+        "source": i.source,
+    }
+
+
+async def _search_backend(db: AsyncSession) -> str:
+    """fts5, trgm or like, depending on which index migration 7 managed to create."""
+    bind = db.get_bind()
+    url = str(bind.url)
+    if url not in _backends:
+        if bind.dialect.name == "sqlite":
+            sql, backend = "SELECT 1 FROM sqlite_master WHERE name = :n", "fts5"
+            name = INGREDIENTS_FTS
+        elif bind.dialect.name == "postgresql":
+            sql, backend = "SELECT 1 FROM pg_indexes WHERE indexname = :n", "trgm"
+            name = "ix_ingredients_name_key_trgm"
+        else:
+            sql = None
+        found = sql is not None and (await db.execute(text(sql), {"n": name})).scalar() is not None
+        _backends[url] = backend if found else "like"
+    return _backends[url]
+
+
+def _prefix_clause(dialect: str, key: str):
+    if dialect == "sqlite":  # a range uses the name_key index; SQLite's LIKE (case-insensitive) can't
+        return and_(Ingredient.name_key >= key, Ingredient.name_key < key[:-1] + chr(ord(key[-1]) + 1))
+    return Ingredient.name_key.like(key + "%")
+
+
+async def _local_search(db: AsyncSession, key: str, limit: int, backend: str | None = None) -> list[Ingredient]:
+    """Names starting with the query first, then names whose words start with each query word."""
+    dialect = db.get_bind().dialect.name
+    rows = list((await db.execute(
+        select(Ingredient).where(_prefix_clause(dialect, key)).order_by(Ingredient.name_key).limit(limit)
+    )).scalars().all())
+    if len(rows) >= limit:
+        return rows
+    backend = backend or await _search_backend(db)
+    words = key.split()
+    want = limit + len(rows)
+    if backend == "fts5":
+        match = " ".join(f'"{w}"*' for w in words)  # words are [a-z0-9]+, so quoting is safe
+        ids = (await db.execute(
+            text(f"SELECT rowid FROM {INGREDIENTS_FTS} WHERE {INGREDIENTS_FTS} MATCH :q ORDER BY rank LIMIT :n"),
+            {"q": match, "n": want},
+        )).scalars().all()
+        found = {i.id: i for i in (await db.execute(select(Ingredient).where(Ingredient.id.in_(ids)))).scalars()}
+        more = [found[i] for i in ids if i in found]
+    else:
+        contains = and_(*(Ingredient.name_key.like(f"%{w}%") for w in words))
+        stmt = select(Ingredient).limit(want)
+        if backend == "trgm":  # also tolerates typos ("brocoli")
+            stmt = stmt.where(contains | Ingredient.name_key.op("%")(key)).order_by(
+                func.similarity(Ingredient.name_key, key).desc()
+            )
+        else:
+            stmt = stmt.where(contains).order_by(func.length(Ingredient.name_key))
+        more = list((await db.execute(stmt)).scalars().all())
+    seen = {r.id for r in rows}
+    rows.extend(r for r in more if r.id not in seen)
+    return rows[:limit]
+
+
+def _upsert_stmt(dialect: str, columns: Iterable[str], overwrite: bool):
+    """
+    Insert-or-update on name_key, executed with a list of row dicts. overwrite=True (bulk
+    import) replaces the stored values; otherwise (Spoonacular results) only fills columns
+    that are still empty.
+    """
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(Ingredient)
+    columns = [c for c in columns if c != "name_key"]
+    if overwrite:
+        set_ = {c: stmt.excluded[c] for c in columns}
+    else:
+        set_ = {c: func.coalesce(getattr(Ingredient, c), stmt.excluded[c]) for c in columns if c not in ("name", "source")}
+    return stmt.on_conflict_do_update(index_elements=["name_key"], set_={**set_, "updated_at": datetime.utcnow()})
+
+
+async def search_nutrition(db: AsyncSession, query: str, limit: int = 10) -> list[dict]:
+    """
+    Ingredient autocomplete from the local table. When it has fewer than
+    INGREDIENT_FALLBACK_MIN_RESULTS matches, Spoonacular is searched once per query
+    (remembered for INGREDIENT_REMOTE_TTL) and its results are stored locally.
+    """
+    key = ingredient_key(query)
+    if not key:
+        return []
+    _counters["searches"] += 1
+    started = time.perf_counter()
+    rows = await _local_search(db, key, limit)
+    _search_latency.observe((time.perf_counter() - started) * 1000)
+    if (
+        len(rows) < min(limit, INGREDIENT_FALLBACK_MIN_RESULTS)
+        and len(key) >= 3
+        and SPOONACULAR_API_KEY
+        and _remote_queries.get(key) is None
+    ):
+        _remote_queries.set(key, True)
+        _counters["remote_searches"] += 1
+        await db.commit()  # end the read so the pooled connection is free while Spoonacular answers
+        results = await search_ingredients(query, number=limit)
+        fetched = {}
+        for r in results:
+            name_key = ingredient_key(r.get("name") or "")
+            if name_key:
+                fetched[name_key] = {
+                    "name": r["name"][:255], "name_key": name_key, "spoonacular_id": r.get("id"),
+                    "image": r.get("image"), "source": "spoonacular",
+                }
+        if fetched:
+            _counters["remote_rows"] += len(fetched)
+            new = list(fetched.values())
+            await db.execute(_upsert_stmt(db.get_bind().dialect.name, new[0], overwrite=False), new)
+            await db.commit()
+            rows = await _local_search(db, key, limit)
+    return [ingredient_dict(r) for r in rows]
+
+
+async def get_nutrition_for_ingredient(db: AsyncSession, ingredient_id: int) -> dict | None:
+    """Nutrition per 100 g for a local ingredient; fetched from Spoonacular (once) if not known yet."""
+    _counters["lookups"] += 1
+    row = await db.get(Ingredient, ingredient_id)
+    if row is None:
+        return None
+    if row.calories is None and row.spoonacular_id:
+        _counters["remote_lookups"] += 1
+        await db.commit()  # release the connection during the remote call (row stays loaded)
+        info = await get_ingredient_info(row.spoonacular_id, amount=100, unit="grams")
+        if info:
+            for n in (info.get("nutrition") or {}).get("nutrients") or []:
+                field = _SPOONACULAR_NUTRIENTS.get(n.get("name"))
+                if field:
+                    setattr(row, field, n.get("amount"))
+            row.calories = row.calories or 0.0  # looked up: don't ask again
+            row.aisle = row.aisle or (info.get("aisle") or "")[:100] or None
+            row.image = row.image or info.get("image")
+            await db.commit()
+    return ingredient_dict(row)
+
+
+def ingredient_stats() -> dict:
+    return {
+        **_counters,
+        "local_search": _search_latency.snapshot(),
+        "backends": dict(_backends),
+        "remote_query_cache": _remote_queries.stats(),
+    }
+
+
+# --- bulk import ---
+
+def _float(value) -> float | None:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _import_row(raw: dict) -> dict | None:
+    """Map one dataset record onto Ingredient columns; None when it has no usable name."""
+    lowered = {str(k).strip().lower(): v for k, v in raw.items() if k is not None}
+    row: dict = {}
+    for field, names in _IMPORT_COLUMNS.items():
+        value = next((lowered[n] for n in names if lowered.get(n) not in (None, "")), None)
+        if field == "name":
+            row[field] = str(value).strip()[:255] if value else None
+        elif field == "aisle":
+            row[field] = str(value).strip()[:100] if value else None
+        elif field == "spoonacular_id":
+            row[field] = int(value) if str(value or "").strip().isdigit() else None
+        else:
+            row[field] = _float(value)
+    if not row["name"] or not (key := ingredient_key(row["name"])):
+        return None
+    return {**row, "name_key": key, "source": "import"}
+
+
+def _read_records(path: Path) -> Iterator[dict]:
+    if path.suffix == ".json":
+        yield from json.loads(path.read_text(encoding="utf-8"))
+        return
+    with path.open(encoding="utf-8", newline="") as f:
+        if path.suffix in (".ndjson", ".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        dialect = csv.Sniffer().sniff(f.read(4096), delimiters=",;\t")
+        f.seek(0)
+        yield from csv.DictReader(f, dialect=dialect)
+
+
+def import_records(records: Iterable[dict], engine=None, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """Upsert dataset records in batches (one transaction each); returns counts."""
+    if engine is None:
+        from app.database import engine
+    counts = {"records": 0, "imported": 0, "skipped": 0}
+
+    def flush(batch: dict[str, dict]) -> None:
+        if batch:
+            with engine.begin() as conn:
+                rows = list(batch.values())
+                conn.execute(_upsert_stmt(engine.dialect.name, rows[0], overwrite=True), rows)
+            counts["imported"] += len(batch)
 
+    batch: dict[str, dict] = {}  # keyed by name_key: one statement can't touch a row twice
+    for raw in records:
+        counts["records"] += 1
+        row = _import_row(raw)
+        if row is None:
+            counts["skipped"] += 1
+            continue
+        batch[row["name_key"]] = row
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = {}
+    flush(batch)
+    return counts
 
-def search_nutrition(query: str, api_key: str | None = None) -> list[dict]:
-    """Search Spoonacular for ingredients (for autocomplete / logging)."""
-    return search_ingredients(query, api_key)
 
+def import_ingredients(path: str | Path, engine=None) -> dict:
+    """Bulk-load a dataset file: CSV (, ; or tab separated), a JSON array or NDJSON."""
+    return import_records(_read_records(Path(path)), engine)
 
-def get_nutrition_for_ingredient(ingredient_id: int, api_key: str | None = None) -> dict | None:
-    """Get detailed nutrition for an ingredient."""
-    return get_ingredient_info(ingredient_id, api_key)
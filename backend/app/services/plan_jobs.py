@@ -0,0 +1,425 @@
+"""
+Background workout-plan generation.
+
+Jobs are persisted in plan_jobs and executed by an in-process asyncio worker pool, so a
+slow LLM call never holds an HTTP request open: clients submit, then poll or stream status.
+Profiles the template engine (workout_service.template_plan) covers are answered at
+submit time without the LLM. Identical in-flight requests (same user + profile) share one
+job. The model output is validated against WorkoutPlanSchema before a WorkoutPlan row is created.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import LatencyStats
+from app.database import AsyncSessionLocal
+from app.models.plan_job import PlanJob
+from app.models.workout import WorkoutPlan
+from app.services.workout_service import attach_plan_videos, template_plan, write_plan_days
+
+logger = logging.getLogger(__name__)
+
+PLAN_JOB_WORKERS = int(os.getenv("PLAN_JOB_WORKERS", "2"))
+PLAN_JOB_TIMEOUT = float(os.getenv("PLAN_JOB_TIMEOUT_SECONDS", "120"))
+PLAN_JOB_MAX_ATTEMPTS = int(os.getenv("PLAN_JOB_MAX_ATTEMPTS", "2"))  # re-prompts after invalid output
+PLAN_JOB_MAX_TOKENS = 6000
+
+ACTIVE_STATUSES = ("queued", "running")
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class ExerciseSchema(BaseModel):
+    name: str
+    sets: int = Field(ge=0)
+    reps: str
+    rest_seconds: int = Field(ge=0)
+    difficulty: str
+    instructions: str
+
+
+class DailyWorkoutSchema(BaseModel):
+    day: int = Field(ge=1, le=7)
+    day_name: str
+    focus: str
+    total_duration: int = Field(ge=0)
+    recommended_time: str
+    warmup: str
+    exercises: list[ExerciseSchema]
+    cooldown: str
+
+
+class WorkoutPlanSchema(BaseModel):
+    plan_duration: str
+    daily_workouts: list[DailyWorkoutSchema] = Field(min_length=1, max_length=7)
+    weekly_summary: str
+    tips: list[str]
+
+
+class PlanProfile(BaseModel):
+    """Inputs to plan generation; unset fields come from the user's health assessment."""
+    age: int | None = None
+    gender: str | None = None
+    fitness_level: str | None = None
+    fitness_goal: str | None = None
+    workout_preference: str | None = None
+    workout_time_preference: str | None = None
+    bmi: float | None = None
+    available_time_per_day: int | None = None
+    health_conditions: list[str] | None = None
+    injuries: list[str] | None = None
+
+
+PROFILE_DEFAULTS = {
+    "fitness_level": "intermediate",
+    "fitness_goal": "general fitness",
+    "workout_preference": "home",
+    "workout_time_preference": "morning",
+    "available_time_per_day": 45,
+    "health_conditions": [],
+    "injuries": [],
+}
+
+
+def build_prompt(profile: dict) -> str:
+    health = ", ".join(profile.get("health_conditions") or []) or "None"
+    injuries = ", ".join(profile.get("injuries") or []) or "None"
+    where = profile.get("workout_preference") or "home"
+    return f"""You are an expert fitness coach. Generate a detailed 7-day workout plan.
+
+User Profile:
+- Age: {profile.get("age") or "Not specified"}, Gender: {profile.get("gender") or "Not specified"}
+- Fitness Level: {profile.get("fitness_level")}
+- Goal: {profile.get("fitness_goal")}
+- Workout Location: {where}
+- Preferred Time: {profile.get("workout_time_preference")}
+- BMI: {profile.get("bmi") or "Not calculated"}
+- Available Time: {profile.get("available_time_per_day")} minutes/day
+- Health Considerations: {health}
+- Injuries to avoid: {injuries}
+
+Generate a JSON object with this EXACT structure:
+{{
+  "plan_duration": "7 days",
+  "daily_workouts": [
+    {{
+      "day": 1,
+      "day_name": "Monday",
+      "focus": "Upper Body and Cardio",
+      "total_duration": 45,
+      "recommended_time": "6:00 AM - 7:00 AM",
+      "warmup": "5-minute jogging in place or jumping jacks",
+      "exercises": [
+        {{
+          "name": "Diamond push-ups",
+          "sets": 3,
+          "reps": "12-15",
+          "rest_seconds": 60,
+          "difficulty": "intermediate",
+          "instructions": "Start in a plank position with your hands closer together than shoulder-width apart..."
+        }}
+      ],
+      "cooldown": "5-minute stretching focusing on arms and chest"
+    }}
+  ],
+  "weekly_summary": "This plan targets full-body fitness with emphasis on...",
+  "tips": ["Stay hydrated", "Focus on form over speed", "Rest adequately"]
+}}
+
+Rules:
+- Include 5 days of workouts, 2 rest days
+- Each workout day has 3-5 exercises
+- Adapt exercises for {where} environment
+- Consider health conditions and injuries
+- Include proper warmup/cooldown
+- Vary muscle groups daily
+- Return ONLY valid JSON, no markdown or extra text."""
+
+
+def request_hash(user_id: int, profile: dict) -> str:
+    canonical = json.dumps([user_id, profile], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def parse_plan(text: str | None) -> dict:
+    """Validate model output; raises ValueError with a message suitable for a re-prompt."""
+    if not text or not text.strip():
+        raise ValueError("Output was empty; return the plan as a JSON object")
+    raw = _FENCE.sub("", text.strip())
+    try:
+        return WorkoutPlanSchema.model_validate_json(raw).model_dump()
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'body'}: {err['msg']}" for err in e.errors()[:5]
+        )
+        raise ValueError(f"Output did not match the schema: {problems}") from e
+
+
+def job_dict(job: PlanJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "source": job.source,
+        "plan_id": job.plan_id,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "result": job.result if job.status == "succeeded" else None,
+    }
+
+
+# --- worker pool -------------------------------------------------------------
+
+_queue: asyncio.Queue | None = None
+_workers: list[asyncio.Task] = []
+_changed: dict[int, asyncio.Event] = {}
+_busy = 0
+_background: set[asyncio.Task] = set()  # post-save video enrichment for inline (template) plans
+_counters = {"template_plans": 0, "submitted": 0, "deduplicated": 0, "succeeded": 0, "failed": 0, "invalid_outputs": 0, "recovered": 0}
+_queue_wait = LatencyStats()
+_run_time = LatencyStats()
+_template_time = LatencyStats()
+
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def _notify(job_id: int) -> None:
+    event = _changed.pop(job_id, None)
+    if event is not None:
+        event.set()
+
+
+async def wait_for_change(job_id: int, timeout: float) -> None:
+    """Wake on a status change made by this process, or after `timeout` (jobs run elsewhere)."""
+    event = _changed.setdefault(job_id, asyncio.Event())
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        if _changed.get(job_id) is event:
+            del _changed[job_id]  # don't keep events for jobs another process is running
+
+
+def _enqueue(job_id: int) -> None:
+    if _queue is None:
+        logger.warning("Plan job %s queued but no workers are running", job_id)
+        return
+    _queue.put_nowait((job_id, time.perf_counter()))
+
+
+async def submit_job(db: AsyncSession, user_id: int, profile: dict, engine: str = "auto") -> tuple[PlanJob, bool]:
+    """
+    Create a job, or return the in-flight one for the same request. Returns (job, created).
+    With engine="auto" profiles the template engine covers are answered inline: the job is
+    stored already succeeded and nothing is queued. engine="llm" always asks the model.
+    """
+    if engine == "auto":
+        started = time.perf_counter()
+        plan = template_plan(profile)
+        if plan is not None:
+            now = datetime.utcnow()
+            job = PlanJob(
+                user_id=user_id, request_hash=request_hash(user_id, profile), status="queued", source="template",
+                params=profile, attempts=0, created_at=now, started_at=now, finished_at=now,
+            )
+            db.add(job)
+            await _save_plan(db, job, plan)
+            await db.commit()
+            _spawn(attach_plan_videos(job.plan_id))
+            _template_time.observe((time.perf_counter() - started) * 1000)
+            _counters["template_plans"] += 1
+            return job, True
+    digest = request_hash(user_id, profile)
+    existing = (await db.execute(
+        select(PlanJob)
+        .where(PlanJob.request_hash == digest, PlanJob.status.in_(ACTIVE_STATUSES))
+        .order_by(PlanJob.id.desc())
+        .limit(1)
+    )).scalars().first()
+    if existing:
+        _counters["deduplicated"] += 1
+        return existing, False
+    job = PlanJob(user_id=user_id, request_hash=digest, status="queued", source="llm", params=profile, attempts=0)
+    db.add(job)
+    await db.commit()
+    _counters["submitted"] += 1
+    _enqueue(job.id)
+    return job, True
+
+
+async def _claim(job_id: int) -> PlanJob | None:
+    """queued -> running, atomically, so a job re-queued on two workers runs once."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(PlanJob)
+            .where(PlanJob.id == job_id, PlanJob.status == "queued")
+            .values(status="running", started_at=datetime.utcnow())
+        )
+        await db.commit()
+        if result.rowcount != 1:
+            return None
+        return await db.get(PlanJob, job_id)
+
+
+async def _generate(profile: dict, job_id: int) -> tuple[dict, int]:
+    from app.services.ai_agent import get_ai_response
+
+    messages = [{"role": "user", "content": build_prompt(profile)}]
+    attempts = 0
+    while True:
+        attempts += 1
+        reply = await get_ai_response(messages, use_cache=False, max_tokens=PLAN_JOB_MAX_TOKENS, json_mode=True)
+        try:
+            return parse_plan(reply), attempts
+        except ValueError as e:
+            _counters["invalid_outputs"] += 1
+            logger.warning("Plan job %s attempt %s returned invalid output: %s", job_id, attempts, e)
+            if attempts >= PLAN_JOB_MAX_ATTEMPTS:
+                raise
+            messages = messages + [
+                {"role": "assistant", "content": reply or ""},
+                {"role": "user", "content": f"{e}. Return the corrected JSON object only."},
+            ]
+
+
+async def _save_plan(db: AsyncSession, job: PlanJob, plan: dict) -> None:
+    """Create the WorkoutPlan for a validated plan and mark the job succeeded (caller commits)."""
+    workout_plan = WorkoutPlan(
+        user_id=job.user_id,
+        name="AI Generated 7-Day Plan" if job.source == "llm" else "7-Day Workout Plan",
+        description=plan["weekly_summary"],
+        difficulty=job.params.get("fitness_level") if job.params else None,
+        duration_minutes=sum(d["total_duration"] for d in plan["daily_workouts"]),
+        plan_data={k: plan[k] for k in ("daily_workouts", "weekly_summary", "tips")},
+    )
+    db.add(workout_plan)
+    await db.flush()
+    await write_plan_days(db, workout_plan)
+    job.status, job.result, job.plan_id = "succeeded", plan, workout_plan.id
+
+
+async def _finish(job_id: int, plan: dict | None, attempts: int, error: str | None) -> int | None:
+    """Store the outcome; on success the WorkoutPlan is created in the same transaction. Returns its id."""
+    async with AsyncSessionLocal() as db:
+        job = await db.get(PlanJob, job_id)
+        job.attempts = attempts
+        job.finished_at = datetime.utcnow()
+        if plan is not None:
+            await _save_plan(db, job, plan)
+        else:
+            job.status, job.error = "failed", error
+        await db.commit()
+        return job.plan_id
+
+
+async def _run(job_id: int) -> None:
+    from app.services.ai_agent import AIServiceUnavailable
+
+    job = await _claim(job_id)
+    if job is None:
+        return
+    _notify(job_id)
+    started = time.perf_counter()
+    plan, error, attempts = None, None, job.attempts or 0
+    try:
+        plan, tries = await asyncio.wait_for(_generate(job.params or {}, job_id), PLAN_JOB_TIMEOUT)
+        attempts += tries
+    except asyncio.TimeoutError:
+        error = f"Generation timed out after {PLAN_JOB_TIMEOUT:.0f}s"
+    except (AIServiceUnavailable, ValueError) as e:
+        error = str(e)
+    except Exception:  # any other failure still ends the job, or SSE clients poll until a restart
+        logger.exception("Plan job %s failed", job_id)
+        error = "Plan generation failed unexpectedly"
+    ok = plan is not None
+    _run_time.observe((time.perf_counter() - started) * 1000, ok=ok)
+    _counters["succeeded" if ok else "failed"] += 1
+    try:
+        plan_id = await _finish(job_id, plan, max(attempts, 1), error)
+    except Exception:
+        if plan is None:
+            raise
+        logger.exception("Plan job %s: saving the plan failed", job_id)
+        plan_id = await _finish(job_id, None, max(attempts, 1), "The generated plan could not be saved")
+    _notify(job_id)
+    if plan_id is not None:
+        await attach_plan_videos(plan_id)
+
+
+async def _worker() -> None:
+    global _busy
+    while True:
+        job_id, enqueued = await _queue.get()
+        _queue_wait.observe((time.perf_counter() - enqueued) * 1000)
+        _busy += 1
+        try:
+            await _run(job_id)
+        except Exception:
+            logger.exception("Plan job %s crashed", job_id)
+        finally:
+            _busy -= 1
+            _queue.task_done()
+
+
+async def _recover() -> None:
+    """
+    Re-queue jobs left behind by a previous process. The queue lives in this process, so at
+    startup nothing is running any job yet: every "running" row was orphaned, however recent.
+    """
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(PlanJob).where(PlanJob.status == "running").values(status="queued", started_at=None)
+        )
+        await db.commit()
+        ids = (await db.execute(select(PlanJob.id).where(PlanJob.status == "queued").order_by(PlanJob.id))).scalars().all()
+    for job_id in ids:
+        _enqueue(job_id)
+    _counters["recovered"] += len(ids)
+
+
+async def start_plan_workers() -> None:
+    global _queue
+    if _queue is not None:
+        return
+    _queue = asyncio.Queue()
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(PLAN_JOB_WORKERS))
+    await _recover()
+
+
+async def stop_plan_workers() -> None:
+    """Cancel workers; unfinished jobs stay queued/running in the table and are recovered on restart."""
+    global _queue
+    tasks = [*_workers, *_background]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+
+
+def plan_job_stats() -> dict:
+    return {
+        "workers": len(_workers),
+        "queue_depth": _queue.qsize() if _queue is not None else 0,
+        "running": _busy,
+        **_counters,
+        "queue_wait": _queue_wait.snapshot(),
+        "run_time": _run_time.snapshot(),  # LLM path
+        "template_time": _template_time.snapshot(),  # template path, including the DB write
+    }
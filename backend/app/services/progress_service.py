@@ -0,0 +1,287 @@
+"""
+Progress time series: per-bucket aggregates, moving averages and a downsampled line.
+
+Buckets are day / week starting Monday / month, in UTC. A range with up to SERIES_RAW_LIMIT
+entries is read as is; a larger one is grouped in SQL into time slots (min, max, sum, count)
+on a slot key that is a prefix of the stored timestamp, so the database never ships more than
+SERIES_RAW_LIMIT rows and the covering index answers without touching the table. Buckets fold
+from those rows, and the line is Largest-Triangle-Three-Buckets downsampled to at most
+`points` points from each slot's min and max (MinMaxLTTB). Moving averages span calendar
+buckets (ma_7 on days is the last seven days, however many have entries). LTTB and the
+moving averages use numpy when it is installed and plain Python otherwise.
+
+    python -m benchmarks.progress_series [--rows N]   # benchmark
+"""
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.progress import ProgressEntry
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python LTTB and moving averages
+    np = None
+
+BUCKETS = ("day", "week", "month")
+DEFAULT_MOVING_AVERAGES = {"day": (7, 30), "week": (4, 12), "month": (3, 6)}
+SERIES_RAW_LIMIT = int(os.getenv("SERIES_RAW_LIMIT", "20000"))
+_EPOCH = datetime(1970, 1, 1)
+
+
+# Time-slot keys that group without per-row date math: SQLite stores DateTime as
+# "YYYY-MM-DD HH:MM:SS.ffffff", so a slot is a prefix of the stored text.
+_SLOTS = {"minute": (16, 60), "hour": (13, 3600), "day": (10, 86400), "month": (7, 30 * 86400)}
+
+
+def slot_key(dialect: str, slot: str, column=ProgressEntry.recorded_at):
+    if dialect == "sqlite":
+        return func.substr(column, 1, _SLOTS[slot][0])
+    return func.date_trunc(slot, column)
+
+
+def _slot_start(key) -> datetime:
+    """Slot key (text prefix on SQLite, timestamp on Postgres) -> the slot's start."""
+    if isinstance(key, datetime):
+        return key
+    if len(key) == 7:
+        key += "-01"
+    elif len(key) == 13:
+        key += ":00"
+    return datetime.fromisoformat(key)
+
+
+def _epoch(value: datetime) -> float:
+    return (value - _EPOCH).total_seconds()
+
+
+def _from_epoch(seconds: float) -> str:
+    return (_EPOCH + timedelta(seconds=seconds)).isoformat(timespec="seconds")
+
+
+def _lttb_edges(n: int, threshold: int) -> list[int]:
+    """Start indexes of the threshold-2 inner buckets over points 1..n-2, then n-1 (the last point)."""
+    step = (n - 2) / (threshold - 2)
+    return [int(i * step) + 1 for i in range(threshold - 2)] + [n - 1]
+
+
+def lttb(xs, ys, threshold: int) -> tuple[list[float], list[float]]:
+    """
+    Largest-Triangle-Three-Buckets: `threshold` points that keep the shape of (xs, ys).
+    Each bucket's pick depends on the previous pick, so both paths walk the buckets in
+    order; numpy computes every next-bucket average up front and each bucket's triangle
+    areas in one operation. Both paths pick the same points.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(xs), list(ys)
+    edges = _lttb_edges(n, threshold)
+    if np is not None:
+        x = np.asarray(xs, dtype=np.float64)
+        y = np.asarray(ys, dtype=np.float64)
+        starts = np.asarray(edges[1:], dtype=np.int64)  # bucket i is averaged while picking in bucket i-1
+        sizes = np.diff(np.append(starts, n))
+        avg_x, avg_y = np.add.reduceat(x, starts) / sizes, np.add.reduceat(y, starts) / sizes
+        keep = [0]
+        a = 0
+        for i in range(threshold - 2):
+            lo, hi = edges[i], edges[i + 1]
+            area = np.abs((x[a] - avg_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i] - y[a]))
+            a = lo + int(area.argmax())
+            keep.append(a)
+        keep.append(n - 1)
+        return x[keep].tolist(), y[keep].tolist()
+    out = [0]
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = range(hi, edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = sum(xs[j] for j in nxt) / len(nxt)
+        avg_y = sum(ys[j] for j in nxt) / len(nxt)
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        a = best
+        out.append(a)
+    out.append(n - 1)
+    return [xs[i] for i in out], [ys[i] for i in out]
+
+
+def moving_average(values: list[float], positions: list[int], window: int) -> list[float | None]:
+    """
+    Trailing mean of `values` over the last `window` calendar buckets: positions are bucket
+    ordinals, so buckets without entries shrink the sample instead of stretching the window.
+    None until `window` buckets have passed since the first one.
+    """
+    if window <= 0:
+        return [None] * len(values)
+    if np is not None and values:
+        pos = np.asarray(positions, dtype=np.int64)
+        sums = np.concatenate(([0.0], np.cumsum(np.asarray(values, dtype=np.float64))))
+        first = np.searchsorted(pos, pos - window + 1, side="left")
+        last = np.arange(1, len(values) + 1)
+        means = (sums[last] - sums[first]) / (last - first)
+        return [round(float(m), 3) if p - positions[0] >= window - 1 else None for m, p in zip(means, positions)]
+    out: list[float | None] = []
+    lo, total = 0, 0.0
+    for i, (value, p) in enumerate(zip(values, positions)):
+        total += value
+        while positions[lo] <= p - window:
+            total -= values[lo]
+            lo += 1
+        out.append(round(total / (i + 1 - lo), 3) if p - positions[0] >= window - 1 else None)
+    return out
+
+
+def _bucket_ordinal(start: str, bucket: str) -> int:
+    """Consecutive integers for consecutive buckets (start is the bucket's ISO date)."""
+    day = datetime.fromisoformat(start)
+    if bucket == "month":
+        return day.year * 12 + day.month
+    return day.toordinal() // 7 if bucket == "week" else day.toordinal()
+
+
+def _bucket_of(at: datetime, bucket: str) -> str:
+    if bucket == "week":
+        at -= timedelta(days=at.weekday())
+    elif bucket == "month":
+        at = at.replace(day=1)
+    return at.date().isoformat()
+
+
+async def _slot_rows(db: AsyncSession, dialect: str, where, count: int, span: float, bucket: str) -> list[tuple]:
+    """
+    (slot start, min, max, sum, count, first at, last at, last value or None) per time slot.
+    Small ranges come back one row per entry; larger ones are grouped in SQL on the finest
+    slot (minute/hour/day/month, never coarser than the bucket) that keeps the result
+    under SERIES_RAW_LIMIT min/max points.
+    """
+    if count <= SERIES_RAW_LIMIT:
+        rows = (await db.execute(
+            select(ProgressEntry.recorded_at, ProgressEntry.value)
+            .where(*where).order_by(ProgressEntry.recorded_at, ProgressEntry.id)
+        )).all()
+        return [(at, v, v, v, 1, at, at, v) for at, v in rows]
+    allowed = [s for s in _SLOTS if bucket == "month" or s != "month"]
+    slot = next((s for s in allowed if 2 * span / _SLOTS[s][1] <= SERIES_RAW_LIMIT), allowed[-1])
+    key = slot_key(dialect, slot).label("slot")
+    rows = (await db.execute(
+        select(
+            key,
+            func.min(ProgressEntry.value),
+            func.max(ProgressEntry.value),
+            func.sum(ProgressEntry.value),
+            func.count(),
+            func.min(ProgressEntry.recorded_at),
+            func.max(ProgressEntry.recorded_at),
+        ).where(*where).group_by(key).order_by(key)
+    )).all()
+    return [(_slot_start(k), *rest, None) for k, *rest in rows]
+
+
+async def _buckets(db: AsyncSession, rows: list[tuple], bucket: str, where) -> list[dict]:
+    """min/max/avg/count/last per bucket; last values missing from grouped slots are one lookup."""
+    out: dict[str, dict] = {}
+    for start, lo, hi, total, n, _, last_at, last in rows:
+        name = _bucket_of(start, bucket)
+        b = out.get(name)
+        if b is None:
+            out[name] = {"start": name, "min": lo, "max": hi, "sum": total, "count": n, "last_at": last_at, "last": last}
+            continue
+        b["min"], b["max"] = min(b["min"], lo), max(b["max"], hi)
+        b["sum"] += total
+        b["count"] += n
+        b["last_at"], b["last"] = last_at, last  # rows are in time order
+    missing = [b["last_at"] for b in out.values() if b["last"] is None]
+    last_values: dict[datetime, float] = {}
+    for i in range(0, len(missing), 500):
+        for at, value in (await db.execute(
+            select(ProgressEntry.recorded_at, ProgressEntry.value)
+            .where(*where, ProgressEntry.recorded_at.in_(missing[i:i + 500]))
+            .order_by(ProgressEntry.id)
+        )).all():
+            last_values[at] = value  # ties on recorded_at: the later id wins
+    return [
+        {
+            "start": b["start"], "min": b["min"], "max": b["max"], "avg": round(b["sum"] / b["count"], 3),
+            "last": b["last"] if b["last"] is not None else last_values.get(b["last_at"]), "count": b["count"],
+        }
+        for b in out.values()
+    ]
+
+
+def _line_points(rows: list[tuple]) -> tuple[list[float], list[float]]:
+    """
+    (xs, ys) for LTTB. A grouped slot contributes its min at its first time and its max at
+    its last (MinMaxLTTB), so every extreme survives the downsampling.
+    """
+    xs, ys = [], []
+    for _, lo, hi, _, _, t0, t1, _ in rows:
+        if lo == hi:
+            xs.append(_epoch(t0 + (t1 - t0) / 2))
+            ys.append(lo)
+        else:
+            xs.extend((_epoch(t0), _epoch(t1)))
+            ys.extend((lo, hi))
+    return xs, ys
+
+
+async def progress_series(
+    db: AsyncSession,
+    user_id: int,
+    entry_type: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    bucket: str = "day",
+    points: int = 300,
+    moving_averages: tuple[int, ...] | None = None,
+) -> dict:
+    """Aggregates per bucket, trailing moving averages of the bucket means and an LTTB line."""
+    dialect = db.get_bind().dialect.name
+    where = [
+        ProgressEntry.user_id == user_id,
+        ProgressEntry.entry_type == entry_type,
+        ProgressEntry.value.isnot(None),
+    ]
+    if start is not None:
+        where.append(ProgressEntry.recorded_at >= start)
+    if end is not None:
+        where.append(ProgressEntry.recorded_at < end)
+    # separate scalar subqueries: min/max become single index probes instead of a scan
+    count, first, last = (await db.execute(select(
+        select(func.count()).where(*where).scalar_subquery(),
+        select(func.min(ProgressEntry.recorded_at)).where(*where).scalar_subquery(),
+        select(func.max(ProgressEntry.recorded_at)).where(*where).scalar_subquery(),
+    ))).one()
+    windows = tuple(moving_averages or DEFAULT_MOVING_AVERAGES[bucket])
+    result = {
+        "entry_type": entry_type,
+        "bucket": bucket,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "count": count,
+        "moving_averages": list(windows),
+        "buckets": [],
+        "series": [],
+        "downsampled": False,
+    }
+    if not count:
+        return result
+    rows = await _slot_rows(db, dialect, where, count, (last - first).total_seconds(), bucket)
+    buckets = await _buckets(db, rows, bucket, where)
+    means = [b["avg"] for b in buckets]
+    positions = [_bucket_ordinal(b["start"], bucket) for b in buckets]
+    for w in windows:
+        for b, ma in zip(buckets, moving_average(means, positions, w)):
+            b[f"ma_{w}"] = ma
+    xs, ys = _line_points(rows)
+    line_x, line_y = lttb(xs, ys, points)
+    result["buckets"] = buckets
+    result["series"] = [[_from_epoch(x), y] for x, y in zip(line_x, line_y)]
+    result["downsampled"] = len(line_x) < count
+    return result
+
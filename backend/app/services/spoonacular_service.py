@@ -1,61 +1,133 @@
-"""Spoonacular API for nutrition data."""
+"""Spoonacular API for nutrition data, recipes and meal plans (over the shared HTTP client)."""
+import logging
 import os
 from typing import Any
 
+from app.services.api_cache import register_cache
+from app.services.http_client import UpstreamError, register_upstream
+
+logger = logging.getLogger(__name__)
+
 SPOONACULAR_API_KEY = os.getenv("SPOONACULAR_API_KEY")
-BASE_URL = "https://api.spoonacular.com"
+BASE_URL = os.getenv("SPOONACULAR_BASE_URL", "https://api.spoonacular.com")
+
+upstream = register_upstream(
+    "spoonacular",
+    BASE_URL,
+    timeout=float(os.getenv("SPOONACULAR_TIMEOUT_SECONDS", "10")),
+)
+
+MEAL_PLAN_CALORIE_STEP = int(os.getenv("MEAL_PLAN_CALORIE_STEP", "50"))  # targets are rounded so users share entries
+meal_plan_cache = register_cache(
+    "spoonacular:meal_plan_week",
+    ttl=float(os.getenv("MEAL_PLAN_CACHE_TTL_SECONDS", str(24 * 3600))),
+    stale_ttl=float(os.getenv("MEAL_PLAN_CACHE_STALE_SECONDS", str(6 * 24 * 3600))),
+)
+recipe_cache = register_cache(
+    "spoonacular:recipe_info",
+    ttl=float(os.getenv("RECIPE_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    stale_ttl=float(os.getenv("RECIPE_CACHE_STALE_SECONDS", str(30 * 24 * 3600))),
+    maxsize=4096,
+)
+
+
+class SpoonacularError(Exception):
+    """Spoonacular is not configured or the call failed (status_code: upstream HTTP status, if any)."""
 
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
 
-def search_ingredients(query: str, api_key: str | None = None, number: int = 10) -> list[dict[str, Any]]:
+
+async def search_ingredients(query: str, api_key: str | None = None, number: int = 10) -> list[dict[str, Any]]:
     """Search ingredients for nutrition info."""
     key = api_key or SPOONACULAR_API_KEY
     if not key:
         return []
     try:
-        import httpx
-        r = httpx.get(
-            f"{BASE_URL}/food/ingredients/search",
-            params={"apiKey": key, "query": query, "number": number},
-            timeout=10,
-        )
-        r.raise_for_status()
-        return r.json().get("results", [])
-    except Exception as e:
-        print(f"ERROR: Spoonacular search_ingredients failed: {e}")
+        data = await upstream.get_json("/food/ingredients/search", params={"apiKey": key, "query": query, "number": number})
+        return data.get("results", [])
+    except UpstreamError as e:
+        logger.warning("Spoonacular search_ingredients failed: %s", e)
         return []
 
 
-def get_ingredient_info(id: int, api_key: str | None = None) -> dict | None:
-    """Get nutrition info for an ingredient by ID."""
+async def get_ingredient_info(
+    id: int, api_key: str | None = None, amount: float = 1, unit: str = "serving"
+) -> dict | None:
+    """Get nutrition info for an ingredient by ID (for `amount` `unit`, default one serving)."""
     key = api_key or SPOONACULAR_API_KEY
     if not key:
         return None
     try:
-        import httpx
-        r = httpx.get(
-            f"{BASE_URL}/food/ingredients/{id}/information",
-            params={"apiKey": key, "amount": 1, "unit": "serving"},
-            timeout=10,
+        return await upstream.get_json(
+            f"/food/ingredients/{id}/information",
+            params={"apiKey": key, "amount": amount, "unit": unit},
         )
-        r.raise_for_status()
-        return r.json()
-    except Exception:
+    except UpstreamError as e:
+        logger.warning("Spoonacular get_ingredient_info failed: %s", e)
         return None
 
 
-def get_recipe_nutrition(recipe_id: int, api_key: str | None = None) -> dict | None:
+async def get_recipe_nutrition(recipe_id: int, api_key: str | None = None) -> dict | None:
     """Get nutrition summary for a recipe."""
     key = api_key or SPOONACULAR_API_KEY
     if not key:
         return None
     try:
-        import httpx
-        r = httpx.get(
-            f"{BASE_URL}/recipes/{recipe_id}/nutritionWidget.json",
-            params={"apiKey": key},
-            timeout=10,
-        )
-        r.raise_for_status()
-        return r.json()
-    except Exception:
+        return await upstream.get_json(f"/recipes/{recipe_id}/nutritionWidget.json", params={"apiKey": key})
+    except UpstreamError as e:
+        logger.warning("Spoonacular get_recipe_nutrition failed: %s", e)
         return None
+
+
+def _csv_param(value: str | None) -> str | None:
+    """Lowercased, de-duplicated, sorted comma list ("Nuts, dairy,nuts" -> "dairy,nuts")."""
+    items = sorted({v.strip().lower() for v in (value or "").split(",") if v.strip()})
+    return ",".join(items) or None
+
+
+async def get_meal_plan_week(calories: int, diet: str | None = None, exclude: str | None = None) -> dict[str, Any]:
+    """
+    7-day meal plan, cached per normalized (calories rounded to MEAL_PLAN_CALORIE_STEP, diet,
+    exclude). Raises SpoonacularError when not configured or when a miss fails upstream.
+    """
+    if not SPOONACULAR_API_KEY:
+        logger.warning("SPOONACULAR_API_KEY not found in environment")
+        raise SpoonacularError("Spoonacular API key missing")
+    step = max(MEAL_PLAN_CALORIE_STEP, 1)
+    params = {
+        "calories": max(step, round(calories / step) * step),
+        "diet": (diet or "").strip().lower() or None,
+        "exclude": _csv_param(exclude),
+    }
+    return await meal_plan_cache.get(params, lambda: _fetch_meal_plan_week(**params))
+
+
+async def get_recipe_info(recipe_id: int) -> dict[str, Any]:
+    """Recipe details, cached per id. Raises SpoonacularError when not configured or on failure."""
+    if not SPOONACULAR_API_KEY:
+        raise SpoonacularError("Spoonacular API key missing")
+    return await recipe_cache.get({"id": int(recipe_id)}, lambda: _fetch_recipe_info(recipe_id))
+
+
+async def _fetch_meal_plan_week(calories: int, diet: str | None, exclude: str | None) -> dict[str, Any]:
+    params = {
+        "apiKey": SPOONACULAR_API_KEY,
+        "timeFrame": "week",
+        "targetCalories": calories,
+        "diet": diet,
+        "exclude": exclude,
+    }
+    try:
+        return await upstream.get_json("/mealplanner/generate", params={k: v for k, v in params.items() if v})
+    except UpstreamError as e:
+        logger.error("Spoonacular meal plan failed: %s", e)
+        raise SpoonacularError(f"Spoonacular API failed: {e}", e.status_code) from e
+
+
+async def _fetch_recipe_info(recipe_id: int) -> dict[str, Any]:
+    try:
+        return await upstream.get_json(f"/recipes/{recipe_id}/information", params={"apiKey": SPOONACULAR_API_KEY})
+    except UpstreamError as e:
+        raise SpoonacularError(f"Spoonacular API failed: {e}", e.status_code) from e
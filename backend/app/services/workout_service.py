@@ -1,18 +1,725 @@
-"""Workout business logic and optional YouTube exercise video lookup."""
-from app.services.youtube_service import search_exercise_videos
+"""
+Workout business logic: the template plan engine and YouTube exercise video enrichment.
 
+template_plan() builds a 7-day plan_data (same shape as the LLM output) from a fixed
+exercise library indexed by movement pattern and equipment, filtered by level and the
+user's injuries. Profiles it cannot map safely (unknown goal, injury or medical condition)
+return None so the caller falls back to the LLM.
 
-def get_workout_with_videos(exercises: list[dict], api_key: str | None) -> list[dict]:
-    """Enrich exercise list with YouTube video IDs if API key is set."""
-    if not api_key or not exercises:
+Video lookups go through the exercise_videos table first; only misses hit the YouTube API.
+
+Saved plans are also split into plan_days rows (one per weekday) so today's workout is a
+single indexed lookup instead of a scan of every plan's JSON.
+"""
+import asyncio
+import copy
+import itertools
+import os
+import re
+from collections import Counter
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models.exercise_video import ExerciseVideo
+from app.models.workout import PlanDay, WorkoutPlan
+from app.services.youtube_service import YOUTUBE_API_KEY, get_video_details, search_exercise_videos
+
+YOUTUBE_CACHE_TTL_DAYS = float(os.getenv("YOUTUBE_CACHE_TTL_DAYS", "30"))
+YOUTUBE_NEGATIVE_TTL_HOURS = float(os.getenv("YOUTUBE_NEGATIVE_TTL_HOURS", "24"))  # "no video found" entries
+_VIDEO_FIELDS = ("video_id", "title", "channel", "duration")
+
+
+def exercise_key(name: str) -> str:
+    """Cache key for an exercise name: lowercase words only ("Push-Ups " == "push ups")."""
+    return " ".join(re.findall(r"[a-z0-9]+", name.lower()))
+
+
+async def _cached_videos(db: AsyncSession, keys: list[str]) -> dict[str, ExerciseVideo]:
+    rows = (await db.execute(select(ExerciseVideo).where(ExerciseVideo.exercise_key.in_(keys)))).scalars().all()
+    now = datetime.utcnow()
+    fresh = {}
+    for row in rows:
+        ttl = timedelta(days=YOUTUBE_CACHE_TTL_DAYS) if row.video_id else timedelta(hours=YOUTUBE_NEGATIVE_TTL_HOURS)
+        if row.fetched_at > now - ttl:
+            fresh[row.exercise_key] = row
+    return fresh
+
+
+async def _search_videos(names: dict[str, str], api_key: str) -> dict[str, dict]:
+    """Search each missing exercise (concurrency capped in youtube_service), then fetch details in batches of 50."""
+    results = await asyncio.gather(*(search_exercise_videos(name, api_key, max_results=1) for name in names.values()))
+    found: dict[str, dict] = {}
+    for key, items in zip(names, results):
+        if items is None:
+            continue  # API error: don't cache, retry on the next lookup
+        top = items[0] if items else {}
+        snippet = top.get("snippet", {})
+        found[key] = {
+            "video_id": top.get("id", {}).get("videoId"),
+            "title": (snippet.get("title") or "")[:255] or None,
+            "channel": (snippet.get("channelTitle") or "")[:255] or None,
+            "duration": None,
+        }
+    details = await get_video_details([v["video_id"] for v in found.values() if v["video_id"]], api_key)
+    durations = {d.get("id"): d.get("contentDetails", {}).get("duration") for d in details}
+    for v in found.values():
+        v["duration"] = durations.get(v["video_id"])
+    return found
+
+
+async def _store_videos(db: AsyncSession, found: dict[str, dict]) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    now = datetime.utcnow()
+    stmt = insert(ExerciseVideo).values([{"exercise_key": k, **v, "fetched_at": now} for k, v in found.items()])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["exercise_key"],
+        set_={c: stmt.excluded[c] for c in (*_VIDEO_FIELDS, "fetched_at")},
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def get_workout_with_videos(exercises: list[dict], api_key: str | None = None) -> list[dict]:
+    """
+    Enrich exercise list with YouTube video IDs: one cache query for all names, API searches
+    only for misses (when an API key is set), detail calls batched 50 ids at a time.
+    No database connection is held while YouTube is being called.
+    """
+    names: dict[str, str] = {}
+    for ex in exercises:
+        name = ex.get("name") or ex.get("exercise_name") or ""
+        if name and not ex.get("video_id"):
+            names.setdefault(exercise_key(name), name)
+    if not names:
         return exercises
+    key = api_key or YOUTUBE_API_KEY
+    async with AsyncSessionLocal() as db:
+        cached = await _cached_videos(db, list(names))
+    missing = {k: n for k, n in names.items() if k not in cached}
+    found = await _search_videos(missing, key) if missing and key else {}
+    if found:
+        async with AsyncSessionLocal() as db:
+            await _store_videos(db, found)
+    videos = {k: row.video_id for k, row in cached.items()} | {k: v["video_id"] for k, v in found.items()}
     result = []
     for ex in exercises:
         name = ex.get("name") or ex.get("exercise_name") or ""
-        video_id = ex.get("video_id")
-        if not video_id and name:
-            videos = search_exercise_videos(name, api_key, max_results=1)
-            if videos:
-                ex = {**ex, "video_id": videos[0].get("id", {}).get("videoId")}
+        video_id = ex.get("video_id") or (videos.get(exercise_key(name)) if name else None)
+        if video_id:
+            ex = {**ex, "video_id": video_id, "youtube_url": ex.get("youtube_url") or f"https://www.youtube.com/watch?v={video_id}"}
         result.append(ex)
     return result
+
+
+async def attach_plan_videos(plan_id: int) -> None:
+    """Add video ids to every exercise of a saved plan (runs after the plan is created)."""
+    async with AsyncSessionLocal() as db:
+        plan_data = await db.scalar(select(WorkoutPlan.plan_data).where(WorkoutPlan.id == plan_id))
+    if not isinstance(plan_data, dict):
+        return
+    days = plan_data.get("daily_workouts") or []
+    flat = [ex for day in days for ex in day.get("exercises") or []]
+    enriched = await get_workout_with_videos(flat)  # YouTube calls: no connection held
+    if enriched == flat:
+        return
+    it = iter(enriched)
+    days = [{**day, "exercises": [next(it) for _ in day.get("exercises") or []]} for day in days]
+    async with AsyncSessionLocal() as db:
+        plan = await db.get(WorkoutPlan, plan_id)
+        if plan is None:
+            return
+        plan.plan_data = {**plan_data, "daily_workouts": days}
+        await write_plan_days(db, plan)
+        await db.commit()
+
+
+# --- plan days -----------------------------------------------------------------
+
+_DAY_COLUMNS = frozenset({"day", "day_name", "focus", "total_duration", "exercises"})
+_UNDATED_PLAN = datetime(1970, 1, 1)  # plans saved without created_at sort oldest
+
+
+def _weekday(entry: dict) -> int | None:
+    """0 = Monday from a daily_workouts entry: its day_name, else its day number (1 = Monday)."""
+    name = entry.get("day_name")
+    if isinstance(name, str) and name.strip().capitalize() in DAY_NAMES:
+        return DAY_NAMES.index(name.strip().capitalize())
+    day = entry.get("day")
+    if isinstance(day, int) and not isinstance(day, bool) and 1 <= day <= 7:
+        return day - 1
+    return None
+
+
+def plan_day_rows(plan_id: int, user_id: int, created_at: datetime | None, plan_data) -> list[dict]:
+    """The seven plan_days rows for a plan; the first entry per weekday wins, missing days are empty."""
+    entries: dict[int, dict] = {}
+    daily = plan_data.get("daily_workouts") if isinstance(plan_data, dict) else None
+    for entry in daily if isinstance(daily, list) else []:
+        if isinstance(entry, dict) and (weekday := _weekday(entry)) is not None:
+            entries.setdefault(weekday, entry)
+    rows = []
+    for weekday, day_name in enumerate(DAY_NAMES):
+        entry = entries.get(weekday, {})
+        focus, duration = entry.get("focus"), entry.get("total_duration")
+        rows.append({
+            "plan_id": plan_id,
+            "user_id": user_id,
+            "plan_created_at": created_at or _UNDATED_PLAN,
+            "day_of_week": weekday,
+            "day_name": day_name,
+            "focus": str(focus)[:255] if focus is not None else None,
+            "total_duration": float(duration) if isinstance(duration, (int, float)) and not isinstance(duration, bool) else None,
+            "exercises": [e for e in entry.get("exercises") or [] if isinstance(e, dict)],
+            "details": {k: v for k, v in entry.items() if k not in _DAY_COLUMNS} or None,
+        })
+    return rows
+
+
+async def write_plan_days(db: AsyncSession, plan: WorkoutPlan) -> None:
+    """Replace a flushed plan's plan_days rows from its plan_data (caller commits)."""
+    await db.execute(delete(PlanDay).where(PlanDay.plan_id == plan.id))
+    await db.execute(insert(PlanDay), plan_day_rows(plan.id, plan.user_id, plan.created_at, plan.plan_data))
+
+
+async def get_today_workout(db: AsyncSession, user_id: int, day: date) -> dict | None:
+    """The newest plan's workout for a calendar day, None without a plan. No exercises = rest day."""
+    row = (await db.execute(
+        select(PlanDay, WorkoutPlan.name)
+        .join(WorkoutPlan, WorkoutPlan.id == PlanDay.plan_id)
+        .where(PlanDay.user_id == user_id, PlanDay.day_of_week == day.weekday())
+        .order_by(PlanDay.plan_created_at.desc(), PlanDay.plan_id.desc())
+        .limit(1)
+    )).first()
+    if row is None:
+        return None
+    plan_day, plan_name = row
+    return {
+        **(plan_day.details or {}),
+        "plan_id": plan_day.plan_id,
+        "plan_name": plan_name,
+        "day_name": plan_day.day_name,
+        "focus": plan_day.focus,
+        "total_duration": plan_day.total_duration,
+        "exercises": plan_day.exercises or [],
+    }
+
+
+# --- template plan engine ------------------------------------------------------
+
+LEVELS = ("beginner", "intermediate", "advanced")
+DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+class Exercise(NamedTuple):
+    name: str
+    pattern: str  # squat, hinge, lunge, push, pull, shoulder, biceps, triceps, calves, core, cardio, hiit, mobility
+    equipment: str  # body (anywhere), gym, outdoor
+    min_level: int
+    max_level: int
+    avoid: frozenset  # injury tags this exercise loads
+    impact: bool  # jumping/running; excluded for low-impact profiles
+    timed: bool  # reps given as a hold/duration
+    instructions: str
+
+
+def _ex(name, pattern, equipment, levels, avoid="", impact=False, timed=False, instructions=""):
+    lo, hi = levels
+    return Exercise(name, pattern, equipment, lo, hi, frozenset(avoid.split()), impact, timed, instructions)
+
+
+EXERCISE_LIBRARY: tuple[Exercise, ...] = (
+    # lower body
+    _ex("Bodyweight Squats", "squat", "body", (0, 1), "knee", instructions="Feet shoulder-width, sit hips back and down to parallel, drive up through the heels."),
+    _ex("Wall Sit", "squat", "body", (0, 2), "knee", timed=True, instructions="Back flat on the wall, knees at 90 degrees, hold."),
+    _ex("Jump Squats", "squat", "body", (1, 2), "knee ankle", impact=True, instructions="Squat to parallel and jump explosively, land softly."),
+    _ex("Goblet Squat", "squat", "gym", (0, 2), "knee", instructions="Hold a dumbbell at the chest, squat between the knees with a tall torso."),
+    _ex("Leg Press", "squat", "gym", (0, 2), "knee", instructions="Feet hip-width on the platform, lower under control, do not lock the knees."),
+    _ex("Barbell Back Squat", "squat", "gym", (1, 2), "knee back", instructions="Bar on upper back, brace, squat to depth and stand tall."),
+    _ex("Glute Bridges", "hinge", "body", (0, 2), instructions="Lie on your back, drive through the heels and squeeze the glutes at the top."),
+    _ex("Single-Leg Glute Bridge", "hinge", "body", (1, 2), instructions="One foot planted, other leg extended, lift hips level."),
+    _ex("Bodyweight Good Mornings", "hinge", "body", (0, 1), "back", instructions="Hands behind head, hinge at the hips with a flat back, return."),
+    _ex("Romanian Deadlift", "hinge", "gym", (1, 2), "back", instructions="Soft knees, push hips back with the weights close to the legs, flat back."),
+    _ex("Hip Thrust", "hinge", "gym", (1, 2), instructions="Upper back on a bench, bar over the hips, drive up and squeeze."),
+    _ex("Kettlebell Swings", "hinge", "gym", (1, 2), "back", instructions="Hinge and snap the hips to swing the bell to chest height."),
+    _ex("Reverse Lunges", "lunge", "body", (0, 2), "knee", instructions="Step back, lower the back knee toward the floor, push through the front heel."),
+    _ex("Step-Ups", "lunge", "body", (0, 2), "knee", instructions="Step onto a sturdy chair or step, drive through the top leg, step down slowly."),
+    _ex("Bulgarian Split Squat", "lunge", "body", (1, 2), "knee", instructions="Rear foot on a bench, lower straight down, keep the front knee tracking the toes."),
+    _ex("Walking Lunges", "lunge", "outdoor", (1, 2), "knee", instructions="Long steps forward, back knee just above the ground, alternate legs."),
+    _ex("Side-Lying Leg Raises", "lunge", "body", (0, 2), "hip", instructions="Lie on your side, lift the top leg slowly without rolling the hips."),
+    _ex("Clamshells", "lunge", "body", (0, 1), instructions="Side-lying with knees bent, open the top knee while feet stay together."),
+    _ex("Calf Raises", "calves", "body", (0, 2), "ankle", instructions="Rise onto the balls of the feet, pause, lower slowly."),
+    _ex("Seated Calf Raises", "calves", "gym", (0, 2), instructions="Seated with weight on the knees, raise heels fully and lower slowly."),
+    # upper body
+    _ex("Incline Push-Ups", "push", "body", (0, 1), "wrist shoulder", instructions="Hands on a bench or wall, body straight, lower chest to the edge."),
+    _ex("Push-Ups", "push", "body", (1, 2), "wrist shoulder", instructions="Hands under shoulders, body in a straight line, chest to the floor."),
+    _ex("Diamond Push-Ups", "push", "body", (1, 2), "wrist shoulder elbow", instructions="Hands together under the chest, elbows close to the body."),
+    _ex("Decline Push-Ups", "push", "body", (2, 2), "wrist shoulder", instructions="Feet raised on a bench, lower under control, full lockout."),
+    _ex("Chest Press Machine", "push", "gym", (0, 1), "shoulder", instructions="Handles at mid-chest, press out without locking the elbows."),
+    _ex("Dumbbell Bench Press", "push", "gym", (0, 2), "shoulder", instructions="Lower the dumbbells to chest level, press up over the shoulders."),
+    _ex("Barbell Bench Press", "push", "gym", (1, 2), "shoulder wrist", instructions="Shoulder blades pinched, bar to lower chest, press up."),
+    _ex("Reverse Snow Angels", "pull", "body", (0, 2), instructions="Lie face down, sweep the arms from the hips overhead with thumbs up."),
+    _ex("Superman Hold", "pull", "body", (0, 1), "back", timed=True, instructions="Face down, lift arms, chest and legs slightly off the floor, hold."),
+    _ex("Inverted Rows", "pull", "body", (1, 2), "shoulder", instructions="Under a sturdy table or bar, pull the chest up with a straight body."),
+    _ex("Lat Pulldown", "pull", "gym", (0, 2), "shoulder", instructions="Pull the bar to the upper chest, elbows down and back."),
+    _ex("Seated Cable Row", "pull", "gym", (0, 2), instructions="Sit tall, pull the handle to the belly, squeeze the shoulder blades."),
+    _ex("Bent-Over Dumbbell Row", "pull", "gym", (1, 2), "back", instructions="Hinge forward with a flat back, row the dumbbells to the hips."),
+    _ex("Pull-Ups", "pull", "gym", (2, 2), "shoulder elbow", instructions="Dead hang, pull the chin over the bar, lower fully."),
+    _ex("Prone Y-T-W Raises", "shoulder", "body", (0, 2), instructions="Face down, raise the arms in Y, T and W shapes with thumbs up."),
+    _ex("Plank Shoulder Taps", "shoulder", "body", (0, 2), "wrist", instructions="High plank, tap each shoulder without rocking the hips."),
+    _ex("Pike Push-Ups", "shoulder", "body", (1, 2), "wrist shoulder neck", instructions="Hips high, lower the head toward the floor between the hands."),
+    _ex("Dumbbell Shoulder Press", "shoulder", "gym", (0, 2), "shoulder neck", instructions="Press the dumbbells overhead from shoulder height, ribs down."),
+    _ex("Lateral Raises", "shoulder", "gym", (0, 2), "shoulder", instructions="Raise the dumbbells out to shoulder height with soft elbows."),
+    _ex("Chair Dips", "triceps", "body", (1, 2), "shoulder wrist elbow", instructions="Hands on a chair edge, lower until elbows reach 90 degrees, press up."),
+    _ex("Bottle Tricep Kickbacks", "triceps", "body", (0, 1), "elbow", instructions="Hinge forward holding water bottles, extend the elbows back fully."),
+    _ex("Towel Isometric Curls", "biceps", "body", (0, 1), "elbow", timed=True, instructions="Stand on a towel and pull up against it with bent elbows, hold."),
+    _ex("Dumbbell Bicep Curls", "biceps", "gym", (0, 2), "elbow", instructions="Elbows pinned to the sides, curl up and lower slowly."),
+    _ex("Tricep Rope Pushdown", "triceps", "gym", (0, 2), "elbow", instructions="Elbows at the sides, push the rope down and spread at the bottom."),
+    _ex("Hammer Curls", "biceps", "gym", (1, 2), "elbow wrist", instructions="Neutral grip, curl without swinging the torso."),
+    # core
+    _ex("Plank", "core", "body", (0, 2), "shoulder", timed=True, instructions="Forearms under shoulders, body straight, brace the core."),
+    _ex("Dead Bug", "core", "body", (0, 2), instructions="On your back, lower the opposite arm and leg while keeping the low back down."),
+    _ex("Bird Dogs", "core", "body", (0, 1), "wrist", instructions="On all fours, extend the opposite arm and leg, keep the back flat."),
+    _ex("Bicycle Crunches", "core", "body", (1, 2), "neck", instructions="Alternate elbow to opposite knee with slow, controlled rotation."),
+    _ex("Side Plank", "core", "body", (1, 2), "shoulder", timed=True, instructions="On one forearm, hips lifted in a straight line, hold each side."),
+    _ex("Russian Twists", "core", "body", (1, 2), "back", instructions="Lean back slightly, rotate the torso side to side."),
+    _ex("Hollow Body Hold", "core", "body", (2, 2), "back", timed=True, instructions="Low back pressed down, arms and legs extended just off the floor."),
+    _ex("Hanging Knee Raises", "core", "gym", (1, 2), "shoulder", instructions="Hang from a bar and raise the knees to the chest without swinging."),
+    # conditioning
+    _ex("Brisk Walk", "cardio", "body", (0, 2), timed=True, instructions="Steady pace where you can talk but not sing."),
+    _ex("Low-Impact Marching", "cardio", "body", (0, 1), timed=True, instructions="March in place with high knees and active arms."),
+    _ex("Jog", "cardio", "outdoor", (0, 2), "knee ankle", impact=True, timed=True, instructions="Easy conversational pace, relaxed shoulders."),
+    _ex("Stationary Bike", "cardio", "gym", (0, 2), timed=True, instructions="Moderate resistance at a steady cadence."),
+    _ex("Rowing Machine", "cardio", "gym", (0, 2), "back", timed=True, instructions="Legs, then hips, then arms; reverse on the return."),
+    _ex("Stair Climbing", "cardio", "outdoor", (1, 2), "knee", timed=True, instructions="Steady climb, full foot on each step, walk down."),
+    _ex("Jump Rope", "cardio", "body", (1, 2), "knee ankle", impact=True, timed=True, instructions="Small hops on the balls of the feet, wrists turn the rope."),
+    _ex("Step Jacks", "hiit", "body", (0, 2), timed=True, instructions="Step one foot out while raising the arms, alternate sides quickly."),
+    _ex("Jumping Jacks", "hiit", "body", (0, 1), "knee ankle", impact=True, timed=True, instructions="Jump feet out while raising the arms overhead."),
+    _ex("Mountain Climbers", "hiit", "body", (0, 2), "wrist shoulder", timed=True, instructions="High plank, drive the knees to the chest alternately."),
+    _ex("Shadow Boxing", "hiit", "body", (0, 2), "shoulder", timed=True, instructions="Light on the feet, throw fast straight punches and hooks."),
+    _ex("High Knees", "hiit", "body", (0, 2), "knee ankle", impact=True, timed=True, instructions="Run in place driving the knees to hip height."),
+    _ex("Skater Jumps", "hiit", "body", (1, 2), "knee ankle", impact=True, timed=True, instructions="Leap side to side landing on one leg."),
+    _ex("Burpees", "hiit", "body", (1, 2), "knee wrist back", impact=True, timed=True, instructions="Squat, kick back to plank, return and jump."),
+    _ex("Sprint Intervals", "hiit", "outdoor", (1, 2), "knee ankle hip", impact=True, timed=True, instructions="Fast sprint, then walk back to recover."),
+    _ex("Battle Ropes", "hiit", "gym", (1, 2), "shoulder", timed=True, instructions="Alternate fast arm waves from an athletic stance."),
+    # mobility
+    _ex("Cat-Cow Stretch", "mobility", "body", (0, 2), timed=True, instructions="On all fours, alternate arching and rounding the spine with the breath."),
+    _ex("World's Greatest Stretch", "mobility", "body", (0, 2), "knee", timed=True, instructions="Lunge, hand inside the front foot, rotate the arm to the ceiling."),
+    _ex("Thoracic Rotations", "mobility", "body", (0, 2), timed=True, instructions="Side-lying with knees bent, open the top arm across the body."),
+    _ex("Sun Salutation Flow", "mobility", "body", (0, 2), "wrist", timed=True, instructions="Slow flow through forward fold, plank, cobra and downward dog."),
+    _ex("Hip Flexor Stretch", "mobility", "body", (0, 2), "knee", timed=True, instructions="Half-kneeling, tuck the pelvis and shift forward gently."),
+    _ex("Foam Rolling", "mobility", "gym", (0, 2), timed=True, instructions="Slow passes over quads, glutes, calves and upper back."),
+)
+
+# (pattern, equipment) -> exercises in library order
+_INDEX: dict[tuple[str, str], tuple[Exercise, ...]] = {}
+for _e in EXERCISE_LIBRARY:
+    _INDEX[(_e.pattern, _e.equipment)] = _INDEX.get((_e.pattern, _e.equipment), ()) + (_e,)
+
+EQUIPMENT = {
+    "home": ("body",),
+    "gym": ("gym", "body"),
+    "outdoor": ("outdoor", "body"),
+    "mixed": ("gym", "outdoor", "body"),
+}
+
+# Weekly templates: (focus, day kind, movement patterns); None = rest day. 5 training days.
+_REST = None
+WEEK_TEMPLATES: dict[str, tuple] = {
+    "weight_loss": (
+        ("Full Body Circuit", "strength", ("squat", "push", "hinge", "hiit", "core")),
+        ("Cardio & Core", "cardio", ("cardio", "hiit", "core", "core")),
+        _REST,
+        ("Lower Body & Cardio", "strength", ("lunge", "hinge", "squat", "hiit", "calves")),
+        ("Upper Body & Core", "strength", ("push", "pull", "shoulder", "core", "hiit")),
+        ("Active Recovery", "recovery", ("cardio", "mobility", "mobility")),
+        _REST,
+    ),
+    "muscle_gain": (
+        ("Push - Chest, Shoulders & Triceps", "strength", ("push", "push", "shoulder", "triceps", "core")),
+        ("Lower Body", "strength", ("squat", "hinge", "lunge", "calves", "core")),
+        _REST,
+        ("Pull - Back & Biceps", "strength", ("pull", "pull", "biceps", "shoulder", "core")),
+        ("Legs & Glutes", "strength", ("hinge", "squat", "lunge", "calves")),
+        ("Full Body", "strength", ("squat", "push", "pull", "core")),
+        _REST,
+    ),
+    "strength": (
+        ("Lower Body Strength", "strength", ("squat", "hinge", "lunge", "core")),
+        ("Upper Body Push", "strength", ("push", "shoulder", "push", "core")),
+        _REST,
+        ("Posterior Chain", "strength", ("hinge", "pull", "lunge", "core")),
+        ("Upper Body Pull", "strength", ("pull", "pull", "biceps", "core")),
+        ("Active Recovery & Mobility", "recovery", ("cardio", "mobility", "mobility")),
+        _REST,
+    ),
+    "endurance": (
+        ("Aerobic Base", "cardio", ("cardio", "core", "mobility")),
+        ("Strength Endurance", "strength", ("squat", "push", "lunge", "pull", "core")),
+        _REST,
+        ("Intervals", "cardio", ("hiit", "hiit", "cardio", "core")),
+        ("Full Body Circuit", "strength", ("hinge", "push", "lunge", "hiit", "core")),
+        ("Long Steady Session", "recovery", ("cardio", "mobility", "calves")),
+        _REST,
+    ),
+    "general": (
+        ("Full Body Strength", "strength", ("squat", "push", "pull", "core")),
+        ("Cardio & Core", "cardio", ("cardio", "hiit", "core")),
+        _REST,
+        ("Upper Body", "strength", ("push", "pull", "shoulder", "core")),
+        ("Lower Body", "strength", ("squat", "hinge", "lunge", "calves")),
+        ("Active Recovery", "recovery", ("cardio", "mobility", "mobility")),
+        _REST,
+    ),
+}
+# Patterns tried, in order, when a day is left with fewer than 3 exercises after filtering
+_FILLERS = ("core", "mobility", "cardio")
+
+# goal -> level -> (sets, reps, rest_seconds) for resistance exercises
+_PRESCRIPTION = {
+    "weight_loss": ((2, "12-15", 45), (3, "12-15", 45), (3, "15", 30)),
+    "muscle_gain": ((3, "10-12", 75), (4, "8-12", 75), (4, "6-10", 90)),
+    "strength": ((3, "10", 90), (4, "6-8", 120), (5, "4-6", 150)),
+    "endurance": ((2, "15-20", 30), (3, "15-20", 30), (3, "20-25", 30)),
+    "general": ((3, "10-12", 60), (3, "10-12", 60), (4, "10-12", 60)),
+}
+_HOLD_SECONDS = (30, 45, 60)
+_CARDIO_MINUTES = (15, 20, 30)
+_INTERVALS = ((3, "30s", 30), (4, "40s", 20), (5, "45s", 15))
+_WARMUP_COOLDOWN_MINUTES = 10
+
+_WARMUPS = {
+    "strength": "5 minutes of marching in place, arm circles, hip circles and bodyweight squats",
+    "cardio": "5 minutes of easy walking or marching, building up the pace",
+    "recovery": "3 minutes of gentle joint rotations from neck to ankles",
+}
+_COOLDOWNS = {
+    "strength": "5 minutes of stretching for the muscles worked, breathing slowly",
+    "cardio": "5 minutes of slow walking, then calf, hamstring and hip stretches",
+    "recovery": "2 minutes of deep breathing lying down",
+}
+_RECOMMENDED_TIME = {
+    "morning": "6:00 AM - 7:00 AM",
+    "afternoon": "12:00 PM - 1:00 PM",
+    "evening": "6:00 PM - 7:00 PM",
+}
+
+_GOAL_SUMMARIES = {
+    "weight_loss": "circuits and intervals that keep the heart rate up, with resistance work to hold on to muscle while losing fat",
+    "muscle_gain": "a push / legs / pull split with moderate reps in the hypertrophy range and enough rest to add load each week",
+    "strength": "compound lifts for the lower body, push and pull patterns with low reps and long rests",
+    "endurance": "steady aerobic sessions, intervals and high-rep strength circuits to build stamina",
+    "general": "balanced full-body strength, cardio and mobility for overall fitness",
+}
+_GOAL_TIPS = {
+    "weight_loss": ["Pair training with a modest calorie deficit", "Aim for 8,000+ steps on rest days"],
+    "muscle_gain": ["Eat 1.6-2.2 g of protein per kg of body weight", "Add reps or weight when all sets feel easy"],
+    "strength": ["Prioritise form over load on every rep", "Sleep 7-9 hours to recover between heavy sessions"],
+    "endurance": ["Keep most cardio at a conversational pace", "Increase total weekly volume by no more than 10%"],
+    "general": ["Consistency beats intensity", "Take the stairs and walk whenever you can"],
+}
+_COMMON_TIPS = ["Stay hydrated", "Rest adequately between sessions"]
+
+# Free-text assessment values -> canonical buckets (first keyword match wins)
+_GOAL_KEYWORDS = (
+    ("weight_loss", ("weight loss", "lose weight", "fat loss", "lose fat", "slim")),
+    ("muscle_gain", ("muscle", "bulk", "hypertrophy", "mass")),
+    ("strength", ("strength", "stronger", "power")),
+    ("endurance", ("endurance", "stamina", "cardio", "running")),
+    ("general", ("general", "fitness", "health", "fit", "maintain", "tone")),
+)
+_LEVEL_KEYWORDS = (
+    ("beginner", ("beginner", "novice", "sedentary", "light", "low")),
+    ("advanced", ("advanced", "very active", "athlete", "expert", "high")),
+    ("intermediate", ("intermediate", "moderate", "active", "medium")),
+)
+_EQUIPMENT_KEYWORDS = (
+    ("mixed", ("mixed", "both", "any", "hybrid")),
+    ("gym", ("gym",)),
+    ("outdoor", ("outdoor", "park", "outside")),
+    ("home", ("home", "indoor", "bodyweight", "no equipment")),
+)
+_INJURY_KEYWORDS = (
+    ("knee", ("knee", "acl", "mcl", "meniscus", "patella")),
+    ("back", ("back", "spine", "spinal", "lumbar", "disc", "sciatica")),
+    ("shoulder", ("shoulder", "rotator")),
+    ("wrist", ("wrist", "carpal", "hand")),
+    ("elbow", ("elbow",)),
+    ("ankle", ("ankle", "achilles", "plantar", "foot", "feet", "shin")),
+    ("hip", ("hip",)),
+    ("neck", ("neck", "cervical")),
+)
+# Conditions the templates can accommodate: condition -> constraints
+_CONDITION_RULES = (
+    (("hypertension", "blood pressure", "bp"), ("no_hiit",)),
+    (("asthma",), ("no_hiit",)),
+    (("diabetes", "thyroid", "pcos", "pcod", "cholesterol"), ()),
+    (("obesity", "overweight"), ("low_impact",)),
+    (("arthritis",), ("low_impact",)),
+)
+_NONE_VALUES = {"", "none", "no", "nil", "n/a", "na", "nothing", "-"}
+
+_WORD = re.compile(r"[a-z]+")
+
+
+def _match(text: str | None, table) -> str | None:
+    value = (text or "").strip().lower()
+    for canonical, keywords in table:
+        if any(k in value for k in keywords):
+            return canonical
+    return None
+
+
+def _real_items(values) -> list[str]:
+    if isinstance(values, str):
+        values = re.split(r"[\n,;]+", values)
+    return [v.strip().lower() for v in values or [] if v and v.strip().lower() not in _NONE_VALUES]
+
+
+def _injury_tags(injuries) -> tuple[frozenset | None, str | None]:
+    tags = set()
+    for injury in _real_items(injuries):
+        tag = _match(injury, _INJURY_KEYWORDS)
+        if tag is None:
+            return None, f"injury:{injury}"
+        tags.add(tag)
+    return frozenset(tags), None
+
+
+def _condition_constraints(conditions) -> tuple[frozenset | None, str | None]:
+    constraints = set()
+    for condition in _real_items(conditions):
+        words = set(_WORD.findall(condition))
+        for keywords, adds in _CONDITION_RULES:
+            if any(k in condition if " " in k else k in words for k in keywords):
+                constraints.update(adds)
+                break
+        else:
+            return None, f"condition:{condition}"
+    return frozenset(constraints), None
+
+
+def _bmi_band(bmi) -> str:
+    if not isinstance(bmi, (int, float)) or bmi <= 0:
+        return "unknown"
+    if bmi < 18.5:
+        return "underweight"
+    if bmi < 25:
+        return "normal"
+    if bmi < 30:
+        return "overweight"
+    return "obese"
+
+
+class PlanBucket(NamedTuple):
+    goal: str
+    level: int
+    equipment: str
+    injuries: frozenset
+    low_impact: bool
+    no_hiit: bool
+    time_of_day: str | None
+    minutes: int
+
+
+def profile_bucket(profile: dict) -> tuple[PlanBucket | None, str | None]:
+    """Canonical template key for a plan profile, or (None, reason) when it is not covered."""
+    goal = _match(profile.get("fitness_goal"), _GOAL_KEYWORDS)
+    if goal is None:
+        return None, f"goal:{profile.get('fitness_goal')}"
+    level = _match(profile.get("fitness_level"), _LEVEL_KEYWORDS)
+    if level is None:
+        return None, f"level:{profile.get('fitness_level')}"
+    equipment = _match(profile.get("workout_preference") or "home", _EQUIPMENT_KEYWORDS)
+    if equipment is None:
+        return None, f"equipment:{profile.get('workout_preference')}"
+    injuries, reason = _injury_tags(profile.get("injuries"))
+    if injuries is None:
+        return None, reason
+    constraints, reason = _condition_constraints(profile.get("health_conditions"))
+    if constraints is None:
+        return None, reason
+    band = _bmi_band(profile.get("bmi"))
+    if band == "underweight" and goal == "weight_loss":
+        return None, "bmi:underweight_weight_loss"
+    low_impact = "low_impact" in constraints or band == "obese" or bool(injuries & {"knee", "ankle", "hip"})
+    minutes = int(profile.get("available_time_per_day") or 45)
+    if minutes < 20:
+        return None, f"time:{minutes}"
+    return PlanBucket(
+        goal=goal,
+        level=LEVELS.index(level),
+        equipment=equipment,
+        injuries=injuries,
+        low_impact=low_impact,
+        no_hiit="no_hiit" in constraints,
+        time_of_day=_match(profile.get("workout_time_preference"), tuple((k, (k,)) for k in _RECOMMENDED_TIME)),
+        minutes=min(minutes, 120),
+    ), None
+
+
+def _candidates(pattern: str, bucket: PlanBucket) -> list[Exercise]:
+    out = []
+    for equipment in EQUIPMENT[bucket.equipment]:
+        for e in _INDEX.get((pattern, equipment), ()):
+            if not e.min_level <= bucket.level <= e.max_level:
+                continue
+            if e.avoid & bucket.injuries or (e.impact and bucket.low_impact):
+                continue
+            out.append(e)
+    return out
+
+
+def _prescribe(e: Exercise, bucket: PlanBucket) -> dict:
+    level = bucket.level
+    if e.pattern in ("cardio", "mobility"):
+        minutes = _CARDIO_MINUTES[level] + (10 if bucket.goal == "endurance" and e.pattern == "cardio" else 0)
+        sets, reps, rest = 1, f"{minutes if e.pattern == 'cardio' else 5} min", 0
+    elif e.pattern == "hiit":
+        sets, reps, rest = _INTERVALS[level]
+    else:
+        sets, reps, rest = _PRESCRIPTION[bucket.goal][level]
+        if e.timed:
+            reps = f"{_HOLD_SECONDS[level]}s"
+        elif e.pattern in ("core", "calves"):
+            reps = "15" if level == 0 else "20"
+    return {
+        "name": e.name,
+        "sets": sets,
+        "reps": reps,
+        "rest_seconds": rest,
+        "difficulty": LEVELS[level],
+        "instructions": e.instructions,
+    }
+
+
+def _minutes(exercise: dict) -> float:
+    reps = exercise["reps"]
+    if reps.endswith(" min"):
+        return float(reps.split()[0])
+    work = float(reps[:-1]) if reps.endswith("s") else 45.0
+    return exercise["sets"] * (work + exercise["rest_seconds"]) / 60
+
+
+def _build_day(day: int, template, bucket: PlanBucket, used: Counter) -> dict | None:
+    if template is None:
+        return {
+            "day": day, "day_name": DAY_NAMES[day - 1], "focus": "Rest Day", "total_duration": 0,
+            "recommended_time": "All Day", "warmup": "None", "exercises": [], "cooldown": "None",
+        }
+    focus, kind, patterns = template
+    picked: list[Exercise] = []
+    for pattern in patterns + _FILLERS:
+        if len(picked) >= len(patterns):
+            break
+        if pattern == "hiit" and bucket.no_hiit:
+            pattern = "cardio"
+        options = [e for e in _candidates(pattern, bucket) if e not in picked]
+        if not options:
+            continue
+        # Rotate through the options across the week so days don't repeat exercises
+        choice = options[used[pattern] % len(options)]
+        used[pattern] += 1
+        picked.append(choice)
+    if len(picked) < 3:
+        return None
+    exercises = [_prescribe(e, bucket) for e in picked]
+    budget = bucket.minutes - _WARMUP_COOLDOWN_MINUTES
+    while len(exercises) > 3 and sum(_minutes(x) for x in exercises) > budget:
+        exercises.pop()
+    total = _WARMUP_COOLDOWN_MINUTES + sum(_minutes(x) for x in exercises)
+    warmup = _WARMUPS[kind]
+    if bucket.low_impact:
+        warmup = warmup.replace("bodyweight squats", "leg swings holding a chair")
+    return {
+        "day": day,
+        "day_name": DAY_NAMES[day - 1],
+        "focus": focus,
+        "total_duration": int(round(total)),
+        "recommended_time": _RECOMMENDED_TIME.get(bucket.time_of_day, "Anytime"),
+        "warmup": warmup,
+        "exercises": exercises,
+        "cooldown": _COOLDOWNS[kind],
+    }
+
+
+@lru_cache(maxsize=4096)
+def _build_plan(bucket: PlanBucket) -> dict | None:
+    used: Counter = Counter()
+    days = []
+    for day, template in enumerate(WEEK_TEMPLATES[bucket.goal], start=1):
+        built = _build_day(day, template, bucket, used)
+        if built is None:
+            return None
+        days.append(built)
+    tips = list(_GOAL_TIPS[bucket.goal]) + _COMMON_TIPS
+    if bucket.injuries:
+        tips.append(f"Exercises that load the {', '.join(sorted(bucket.injuries))} were left out; stop if anything hurts")
+    if bucket.low_impact:
+        tips.append("Everything is low impact; progress by adding sets before adding speed")
+    if bucket.no_hiit:
+        tips.append("Intervals were replaced with steady cardio; keep the effort moderate")
+    return {
+        "plan_duration": "7 days",
+        "daily_workouts": days,
+        "weekly_summary": f"A {LEVELS[bucket.level]} {bucket.equipment} plan with {_GOAL_SUMMARIES[bucket.goal]}.",
+        "tips": tips,
+    }
+
+
+def template_plan(profile: dict) -> dict | None:
+    """Deterministic 7-day plan_data for a profile, or None if the LLM should handle it."""
+    bucket, _ = profile_bucket(profile)
+    if bucket is None:
+        return None
+    plan = _build_plan(bucket)
+    return copy.deepcopy(plan) if plan is not None else None
+
+
+# Option values offered by the assessment form, plus common free-text answers
+ASSESSMENT_GRID = {
+    "fitness_level": ["Beginner", "Intermediate", "Advanced"],
+    "fitness_goal": ["Weight Loss", "Muscle Gain", "General Fitness", "Strength Training", "Endurance"],
+    "workout_preference": ["Home", "Gym", "Outdoor", "Mixed"],
+    "workout_time_preference": ["Morning", "Evening"],
+    "bmi": [17.5, 22.0, 27.5, 32.0],
+    "injuries": [[], ["knee pain"], ["lower back pain"], ["shoulder injury"], ["sprained ankle"], ["wrist pain"], ["hernia"]],
+    "health_conditions": [[], ["hypertension"], ["asthma"], ["type 2 diabetes"], ["heart disease"]],
+}
+
+
+def coverage_report(profiles: Iterable[dict] | None = None) -> dict:
+    """
+    Share of profiles the template engine answers, with the reasons for the rest. Defaults to
+    every combination in ASSESSMENT_GRID; pass real assessments to weigh by actual users.
+    """
+    if profiles is None:
+        keys = list(ASSESSMENT_GRID)
+        profiles = (dict(zip(keys, combo)) for combo in itertools.product(*ASSESSMENT_GRID.values()))
+    total = covered = 0
+    reasons: Counter = Counter()
+    for profile in profiles:
+        weight = int(profile.get("count", 1))
+        total += weight
+        bucket, reason = profile_bucket(profile)
+        if bucket is not None and _build_plan(bucket) is None:
+            reason = "library:too_few_exercises"
+        if reason is None:
+            covered += weight
+        else:
+            reasons[reason] += weight
+    return {
+        "profiles": total,
+        "covered": covered,
+        "coverage": round(covered / total, 4) if total else 0.0,
+        "uncovered_reasons": dict(reasons.most_common()),
+        "distinct_plans_cached": _build_plan.cache_info().currsize,
+    }
+
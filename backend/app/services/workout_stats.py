@@ -0,0 +1,340 @@
+"""
+Workout statistics: typed exercise completions and incrementally maintained aggregates.
+
+Every completed exercise is an exercise_completions row (the progress_entries JSON row is
+still written for existing clients). In the same transaction record_completions adds it to
+the user's day and week totals (workout_period_stats), per-exercise totals (exercise_totals)
+and the all-time totals and streaks (workout_user_stats), so /workouts/stats reads a handful
+of indexed rows however long the history is. rebuild_statements/streak_updates recompute
+everything from the fact table (migration 11 and the admin rebuild use them).
+
+Days and weeks (starting Monday) are UTC, like the nutrition rollups.
+"""
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import DateTime, bindparam, case, delete, func, insert, literal, select, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.workout import ExerciseCompletion, ExerciseTotal, WorkoutPeriodStat, WorkoutUserStat
+
+PERIODS = ("day", "week")
+_SUMS = ("sets", "reps", "duration_minutes", "calories_burned")
+
+
+def completion_key(name: str) -> str:
+    """
+    exercise_completions.exercise_key: case and whitespace folded, punctuation kept. Not the
+    video cache's workout_service.exercise_key; totals already stored are grouped by this one.
+    """
+    return re.sub(r"\s+", " ", name.strip().lower())[:255]
+
+
+def _int(value: Any) -> int:
+    try:
+        return max(int(float(value)), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def completion_row(user_id: int, data: dict, completed_at: datetime, progress_entry_id: int | None = None) -> dict:
+    """exercise_completions values from a completion body (or legacy progress_entries metadata)."""
+    name = str(data.get("exercise_name") or "unknown")[:255]
+    plan_id = data.get("plan_id")
+    return {
+        "user_id": user_id,
+        "progress_entry_id": progress_entry_id,
+        "exercise_name": name,
+        "exercise_key": completion_key(name),
+        "plan_id": str(plan_id)[:64] if plan_id not in (None, "") else None,
+        "sets": _int(data.get("sets_completed")),
+        "reps": _int(data.get("reps_completed")),
+        "duration_minutes": _int(data.get("duration_minutes")),
+        "calories_burned": _int(data.get("calories_burned")),
+        "completed_at": completed_at,
+    }
+
+
+def _day_start(value: datetime | date) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+
+def period_start(period: str, value: datetime | date) -> datetime:
+    day = _day_start(value)
+    return day - timedelta(days=day.weekday()) if period == "week" else day
+
+
+def _period_expr(dialect: str, period: str):
+    """SQL for the period start of ExerciseCompletion.completed_at, stored like Python datetimes."""
+    if dialect == "sqlite":
+        modifiers = ("-6 days", "weekday 1") if period == "week" else ()
+        return type_coerce(func.strftime("%Y-%m-%d 00:00:00.000000", ExerciseCompletion.completed_at, *modifiers), DateTime)
+    return func.date_trunc(period, ExerciseCompletion.completed_at)
+
+
+def _insert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert
+
+
+def _additive_upsert(dialect: str, model, keys: tuple[str, ...], extra: Callable | None = None):
+    """Upsert executed with row dicts: counters add to the stored ones; extra(stmt) adds more SET columns."""
+    stmt = _insert(dialect)(model)
+    set_ = {c: getattr(model, c) + stmt.excluded[c] for c in ("completions", *_SUMS)}
+    if extra is not None:
+        set_.update(extra(stmt))
+    return stmt.on_conflict_do_update(index_elements=list(keys), set_=set_)
+
+
+def _latest_exercise(stmt) -> dict:
+    newer = stmt.excluded.last_completed_at >= ExerciseTotal.last_completed_at
+    return {
+        "exercise_name": case((newer, stmt.excluded.exercise_name), else_=ExerciseTotal.exercise_name),
+        "last_completed_at": case((newer, stmt.excluded.last_completed_at), else_=ExerciseTotal.last_completed_at),
+    }
+
+
+def streak_walk(days: Iterable[datetime], current: int = 0, longest: int = 0, last: datetime | None = None):
+    """
+    Extend (current, longest, last active day) with later active days in ascending order.
+    Returns None when a day is before `last`, i.e. the streak must be recomputed.
+    """
+    for day in days:
+        if last is None or day > last + timedelta(days=1):
+            current = 1
+        elif day == last + timedelta(days=1):
+            current += 1
+        elif day < last:
+            return None
+        else:
+            continue
+        last = day
+        longest = max(longest, current)
+    return current, longest, last
+
+
+async def record_completions(db: AsyncSession, rows: list[dict]) -> None:
+    """
+    Insert completion rows (completion_row dicts) and fold them into the aggregates, in the
+    caller's transaction. The user's workout_user_stats row is upserted first: it serializes
+    concurrent writers for that user before active days and streaks are read.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    await db.execute(insert(ExerciseCompletion), rows)
+    users: dict[int, dict] = {}
+    periods: dict[tuple, dict] = {}
+    exercises: dict[tuple, dict] = {}
+    for r in rows:
+        sums = {c: r[c] for c in _SUMS}
+        user = users.setdefault(r["user_id"], {"user_id": r["user_id"], "completions": 0, **dict.fromkeys(_SUMS, 0), "days": set()})
+        user["days"].add(_day_start(r["completed_at"]))
+        for period in PERIODS:
+            key = (r["user_id"], period, period_start(period, r["completed_at"]))
+            agg = periods.setdefault(key, {"user_id": key[0], "period": period, "start": key[2], "completions": 0, **dict.fromkeys(_SUMS, 0)})
+            agg["completions"] += 1
+            for c, v in sums.items():
+                agg[c] += v
+        key = (r["user_id"], r["exercise_key"])
+        agg = exercises.setdefault(key, {
+            "user_id": key[0], "exercise_key": key[1], "exercise_name": r["exercise_name"],
+            "completions": 0, **dict.fromkeys(_SUMS, 0), "last_completed_at": r["completed_at"],
+        })
+        agg["completions"] += 1
+        for c, v in sums.items():
+            agg[c] += v
+        if r["completed_at"] >= agg["last_completed_at"]:
+            agg["exercise_name"], agg["last_completed_at"] = r["exercise_name"], r["completed_at"]
+        user["completions"] += 1
+        for c, v in sums.items():
+            user[c] += v
+
+    await db.execute(
+        _additive_upsert(dialect, WorkoutUserStat, ("user_id",)),
+        [{k: v for k, v in u.items() if k != "days"} for u in users.values()],
+    )
+    new_days: dict[int, list[datetime]] = {}
+    for user_id, u in users.items():
+        existing = set(map(_day_start, (await db.execute(
+            select(WorkoutPeriodStat.start).where(
+                WorkoutPeriodStat.user_id == user_id,
+                WorkoutPeriodStat.period == "day",
+                WorkoutPeriodStat.start.in_(u["days"]),
+            )
+        )).scalars()))
+        new_days[user_id] = sorted(u["days"] - existing)
+    await db.execute(_additive_upsert(dialect, WorkoutPeriodStat, ("user_id", "period", "start")), list(periods.values()))
+    await db.execute(
+        _additive_upsert(dialect, ExerciseTotal, ("user_id", "exercise_key"), _latest_exercise),
+        list(exercises.values()),
+    )
+
+    for user_id, days in new_days.items():
+        if not days:
+            continue
+        stat = (await db.execute(
+            select(WorkoutUserStat).where(WorkoutUserStat.user_id == user_id).execution_options(populate_existing=True)
+        )).scalar_one()
+        last = _day_start(stat.last_active_date) if stat.last_active_date else None
+        walked = streak_walk(days, stat.current_streak or 0, stat.longest_streak or 0, last)
+        if walked is None:  # a backfilled day: recount from the day rows
+            walked = streak_walk(map(_day_start, (await db.execute(
+                select(WorkoutPeriodStat.start)
+                .where(WorkoutPeriodStat.user_id == user_id, WorkoutPeriodStat.period == "day")
+                .order_by(WorkoutPeriodStat.start)
+            )).scalars()))
+        stat.current_streak, stat.longest_streak, stat.last_active_date = walked
+        stat.active_days = (stat.active_days or 0) + len(days)
+    await db.flush()  # the session does not autoflush; later reads in this transaction see the streaks
+
+
+def rebuild_statements(dialect: str, user_id: int | None = None) -> list:
+    """Statements that recompute every aggregate from exercise_completions; run streak_updates after."""
+    only = (lambda col: [col == user_id]) if user_id is not None else (lambda col: [])
+    c = ExerciseCompletion
+    sums = [func.coalesce(func.sum(getattr(c, s)), 0).label(s) for s in _SUMS]
+    statements = [
+        delete(WorkoutPeriodStat).where(*only(WorkoutPeriodStat.user_id)),
+        delete(ExerciseTotal).where(*only(ExerciseTotal.user_id)),
+        delete(WorkoutUserStat).where(*only(WorkoutUserStat.user_id)),
+    ]
+    for period in PERIODS:
+        start = _period_expr(dialect, period)
+        statements.append(insert(WorkoutPeriodStat).from_select(
+            ["user_id", "period", "start", "completions", *_SUMS],
+            select(c.user_id, literal(period), start, func.count(), *sums)
+            .where(*only(c.user_id)).group_by(c.user_id, start),
+        ))
+    latest_name = (
+        select(c.exercise_name)
+        .where(c.user_id == ExerciseTotal.user_id, c.exercise_key == ExerciseTotal.exercise_key)
+        .order_by(c.completed_at.desc(), c.id.desc()).limit(1).scalar_subquery()
+    )
+    statements.append(insert(ExerciseTotal).from_select(
+        ["user_id", "exercise_key", "exercise_name", "completions", *_SUMS, "last_completed_at"],
+        select(c.user_id, c.exercise_key, func.max(c.exercise_name), func.count(), *sums, func.max(c.completed_at))
+        .where(*only(c.user_id)).group_by(c.user_id, c.exercise_key),
+    ))
+    statements.append(update(ExerciseTotal).where(*only(ExerciseTotal.user_id)).values(exercise_name=latest_name))
+    statements.append(insert(WorkoutUserStat).from_select(
+        ["user_id", "completions", *_SUMS],
+        select(c.user_id, func.count(), *sums).where(*only(c.user_id)).group_by(c.user_id),
+    ))
+    return statements
+
+
+def active_days_select(user_id: int | None = None):
+    where = [WorkoutPeriodStat.period == "day"]
+    if user_id is not None:
+        where.append(WorkoutPeriodStat.user_id == user_id)
+    return select(WorkoutPeriodStat.user_id, WorkoutPeriodStat.start).where(*where).order_by(
+        WorkoutPeriodStat.user_id, WorkoutPeriodStat.start
+    )
+
+
+def streak_updates(rows: Iterable) -> list[dict]:
+    """(user_id, day) rows in order -> parameters for streak_update()."""
+    by_user: dict[int, list[datetime]] = {}
+    for user_id, day in rows:
+        by_user.setdefault(user_id, []).append(_day_start(day))
+    out = []
+    for user_id, days in by_user.items():
+        current, longest, last = streak_walk(days)
+        out.append({"uid": user_id, "days": len(days), "cur": current, "best": longest, "last": last})
+    return out
+
+
+def streak_update():
+    t = WorkoutUserStat.__table__
+    return update(t).where(t.c.user_id == bindparam("uid")).values(
+        active_days=bindparam("days"),
+        current_streak=bindparam("cur"),
+        longest_streak=bindparam("best"),
+        last_active_date=bindparam("last"),
+    )
+
+
+async def rebuild_workout_stats(db: AsyncSession, user_id: int | None = None) -> int:
+    """Recompute all workout aggregates from exercise_completions; returns users written."""
+    for stmt in rebuild_statements(db.get_bind().dialect.name, user_id):
+        await db.execute(stmt)
+    updates = streak_updates((await db.execute(active_days_select(user_id))).all())
+    if updates:
+        await db.execute(streak_update(), updates)
+    await db.commit()
+    return len(updates)
+
+
+def _sums_dict(row) -> dict:
+    return {
+        "completions": int(row.completions or 0) if row else 0,
+        **{s: int(getattr(row, s) or 0) if row else 0 for s in _SUMS},
+    }
+
+
+def streak_dict(stat: WorkoutUserStat | None, today: date) -> dict:
+    last = _day_start(stat.last_active_date) if stat and stat.last_active_date else None
+    return {
+        # a streak is current while its last day is today or yesterday
+        "current": stat.current_streak if last and last >= _day_start(today) - timedelta(days=1) else 0,
+        "longest": stat.longest_streak if stat else 0,
+        "last_active_date": last.date().isoformat() if last else None,
+    }
+
+
+async def get_today_summary(db: AsyncSession, user_id: int, today: date | None = None) -> dict:
+    """Streak and today's totals: two primary-key / unique-index lookups."""
+    today = _day_start(today or datetime.utcnow())
+    stat = (await db.execute(select(WorkoutUserStat).where(WorkoutUserStat.user_id == user_id))).scalar_one_or_none()
+    row = (await db.execute(select(WorkoutPeriodStat).where(
+        WorkoutPeriodStat.user_id == user_id, WorkoutPeriodStat.period == "day", WorkoutPeriodStat.start == today,
+    ))).scalar_one_or_none()
+    return {"streak": streak_dict(stat, today), "today": _sums_dict(row)}
+
+
+async def get_workout_stats(
+    db: AsyncSession, user_id: int, days: int = 7, weeks: int = 8, exercises: int = 10, today: date | None = None
+) -> dict:
+    """Totals, streaks, the last `days` days and `weeks` weeks (zero-filled) and the top exercises."""
+    today = _day_start(today or datetime.utcnow())
+    stat = (await db.execute(select(WorkoutUserStat).where(WorkoutUserStat.user_id == user_id))).scalar_one_or_none()
+    first_day = today - timedelta(days=days - 1)
+    first_week = period_start("week", today) - timedelta(weeks=weeks - 1)
+    rows = (await db.execute(
+        select(WorkoutPeriodStat).where(
+            WorkoutPeriodStat.user_id == user_id,
+            WorkoutPeriodStat.period.in_(PERIODS),
+            WorkoutPeriodStat.start >= min(first_day, first_week),
+        )
+    )).scalars().all()
+    stored = {(r.period, _day_start(r.start)): r for r in rows}
+    top = (await db.execute(
+        select(ExerciseTotal).where(ExerciseTotal.user_id == user_id)
+        .order_by(ExerciseTotal.completions.desc(), ExerciseTotal.last_completed_at.desc()).limit(exercises)
+    )).scalars().all()
+    return {
+        "totals": {**_sums_dict(stat), "active_days": stat.active_days if stat else 0},
+        "streak": streak_dict(stat, today),
+        "today": _sums_dict(stored.get(("day", today))),
+        "days": [
+            {"date": d.date().isoformat(), **_sums_dict(stored.get(("day", d)))}
+            for d in (first_day + timedelta(days=i) for i in range(days))
+        ],
+        "weeks": [
+            {"week_start": w.date().isoformat(), **_sums_dict(stored.get(("week", w)))}
+            for w in (first_week + timedelta(weeks=i) for i in range(weeks))
+        ],
+        "exercises": [
+            {
+                "exercise_name": e.exercise_name,
+                **_sums_dict(e),
+                "last_completed_at": e.last_completed_at.isoformat() if e.last_completed_at else None,
+            }
+            for e in top
+        ],
+    }
@@ -1,41 +1,88 @@
-"""YouTube Data API v3 for exercise videos."""
+"""
+YouTube Data API v3 for exercise videos.
+
+Calls go straight to the REST endpoints over the shared HTTP client (no discovery
+document). Point YOUTUBE_API_BASE_URL at a local fake to test without quota.
+"""
+import asyncio
+import logging
 import os
-from typing import Any
+from typing import Any, Optional
+
+from app.services.http_client import UpstreamError, register_upstream
+
+logger = logging.getLogger(__name__)
 
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3").rstrip("/")
+YOUTUBE_TIMEOUT = float(os.getenv("YOUTUBE_TIMEOUT_SECONDS", "10"))
+YOUTUBE_MAX_CONCURRENCY = int(os.getenv("YOUTUBE_MAX_CONCURRENCY", "4"))
+DETAILS_BATCH_SIZE = 50  # videos.list accepts at most 50 ids
+# Quota cost per call (https://developers.google.com/youtube/v3/determine_quota_cost)
+_SEARCH_COST, _LIST_COST = 100, 1
+
+upstream = register_upstream("youtube", YOUTUBE_API_BASE_URL, timeout=YOUTUBE_TIMEOUT)
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+_counters = {"searches": 0, "detail_calls": 0, "quota_units": 0, "errors": 0}
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Caps concurrent API calls process-wide (lookups for several plans share it)."""
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore, _semaphore_loop = asyncio.Semaphore(YOUTUBE_MAX_CONCURRENCY), loop
+    return _semaphore
 
 
-def search_exercise_videos(query: str, api_key: str | None = None, max_results: int = 5) -> list[dict[str, Any]]:
-    """Search YouTube for exercise/how-to videos. Returns list of items from API."""
+async def _get(path: str, params: dict, cost: int) -> dict | None:
+    async with _get_semaphore():
+        _counters["quota_units"] += cost
+        try:
+            return await upstream.get_json(path, params=params)
+        except UpstreamError as e:
+            _counters["errors"] += 1
+            logger.warning("YouTube %s failed: %s", path, e)
+            return None
+
+
+async def search_exercise_videos(query: str, api_key: str | None = None, max_results: int = 5) -> list[dict[str, Any]] | None:
+    """Search YouTube for exercise/how-to videos. Returns list of items from API, None if the call failed."""
     key = api_key or YOUTUBE_API_KEY
     if not key:
         return []
-    try:
-        from googleapiclient.discovery import build
-        youtube = build("youtube", "v3", developerKey=key)
-        req = youtube.search().list(
-            part="snippet",
-            q=f"{query} exercise tutorial",
-            type="video",
-            maxResults=max_results,
-            videoDuration="short",
-            safeSearch="strict",
-        )
-        res = req.execute()
-        return res.get("items", [])
-    except Exception:
-        return []
+    _counters["searches"] += 1
+    res = await _get("/search", {
+        "part": "snippet",
+        "q": f"{query} exercise tutorial",
+        "type": "video",
+        "maxResults": max_results,
+        "videoDuration": "short",
+        "safeSearch": "strict",
+        "key": key,
+    }, _SEARCH_COST)
+    return res.get("items", []) if res is not None else None
 
 
-def get_video_details(video_ids: list[str], api_key: str | None = None) -> list[dict]:
-    """Fetch title, description, duration for given video IDs."""
+async def get_video_details(video_ids: list[str], api_key: str | None = None) -> list[dict]:
+    """Fetch title, description, duration for given video IDs, 50 ids per API call."""
     key = api_key or YOUTUBE_API_KEY
     if not key or not video_ids:
         return []
-    try:
-        from googleapiclient.discovery import build
-        youtube = build("youtube", "v3", developerKey=key)
-        res = youtube.videos().list(part="snippet,contentDetails", id=",".join(video_ids[:50])).execute()
-        return res.get("items", [])
-    except Exception:
-        return []
+    ids = list(dict.fromkeys(video_ids))
+    batches = [ids[i:i + DETAILS_BATCH_SIZE] for i in range(0, len(ids), DETAILS_BATCH_SIZE)]
+    _counters["detail_calls"] += len(batches)
+    results = await asyncio.gather(*(
+        _get("/videos", {"part": "snippet,contentDetails", "id": ",".join(batch), "key": key}, _LIST_COST)
+        for batch in batches
+    ))
+    return [item for res in results if res for item in res.get("items", [])]
+
+
+def youtube_stats() -> dict:
+    """Quota accounting; latency, retries and circuit state are in http_client_stats()."""
+    return {
+        "in_flight": (YOUTUBE_MAX_CONCURRENCY - _semaphore._value) if _semaphore else 0,
+        **_counters,
+    }
@@ -0,0 +1,49 @@
+"""
+Benchmarks. Run from backend/:
+
+    python -m benchmarks.<name> [--help]
+
+Importing this package points DATABASE_URL at a throwaway SQLite file before anything
+imports app.database (as tests/conftest.py does), so a benchmark never touches a real database.
+"""
+import os
+import statistics
+import tempfile
+import uuid
+from contextlib import asynccontextmanager
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="arogyamitra-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DIR}/bench.db"
+os.environ.setdefault("GROQ_API_KEY", "")
+
+
+def latency(timings: list[float]) -> str:
+    """p50/p95/p99 of millisecond timings."""
+    ordered = sorted(timings)
+
+    def pct(p: float) -> float:
+        return ordered[int(p * (len(ordered) - 1))]
+
+    return (f"p50={statistics.median(ordered):8.2f}ms  p95={pct(0.95):8.2f}ms  "
+            f"p99={pct(0.99):8.2f}ms  n={len(ordered)}")
+
+
+@asynccontextmanager
+async def app_client():
+    """httpx client on the app, with its lifespan (migrations, workers) entered."""
+    import httpx
+
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)  # does not run the lifespan; enter it here
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        yield client
+
+
+async def register(client, password: str = "bench123") -> dict:
+    """Create a user and return its Authorization headers."""
+    res = await client.post("/auth/register", json={
+        "email": f"{uuid.uuid4().hex[:12]}@bench.example.com", "password": password, "full_name": "Bench",
+    })
+    res.raise_for_status()
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
@@ -0,0 +1,65 @@
+"""
+Achievement evaluation cost against history size: seeding a user's counters from history
+(the one full scan) and evaluating a progress + meal write event afterwards.
+
+    python -m benchmarks.achievements [--history N ...] [--runs N]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.database import AsyncSessionLocal, close_db, init_db
+from app.models.nutrition import Meal
+from app.models.progress import ProgressEntry
+from app.models.user import User
+from app.services.achievements import _seed, on_meals, on_progress
+
+
+async def main(history: list[int], runs: int) -> None:
+    init_db()
+    print(f"{'history':>8} {'seed (full scan)':>17} {'event p50':>10} {'event p95':>10}")
+    for user_id, size in enumerate(history, start=1):
+        t0 = datetime(2026, 1, 1) - timedelta(minutes=size)
+        async with AsyncSessionLocal() as db:
+            db.add(User(id=user_id, email=f"u{user_id}@bench", hashed_password="-"))
+            await db.flush()
+            await db.execute(insert(ProgressEntry), [
+                {"user_id": user_id, "entry_type": ("weight", "steps", "waist")[i % 3], "value": 80 - i / size,
+                 "unit": "kg", "recorded_at": t0 + timedelta(minutes=i)}
+                for i in range(size)
+            ])
+            await db.execute(insert(Meal), [
+                {"user_id": user_id, "name": "meal", "calories": 400, "logged_at": t0 + timedelta(minutes=i)}
+                for i in range(size // 3)
+            ])
+            await db.commit()
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await _seed(db, user_id)
+            seed_ms = (time.perf_counter() - started) * 1000
+            await db.commit()
+        timings = []
+        for run in range(runs):
+            async with AsyncSessionLocal() as db:
+                event = {"entry_type": "weight", "value": 70.0, "unit": "kg",
+                         "recorded_at": datetime(2026, 1, 1) + timedelta(days=run)}
+                started = time.perf_counter()
+                await on_progress(db, user_id, [event])
+                await on_meals(db, user_id, [{"nutrition_plan_id": None}])
+                timings.append((time.perf_counter() - started) * 1000)
+                await db.rollback()
+        p95 = sorted(timings)[int(0.95 * (len(timings) - 1))]
+        print(f"{size:>8} {seed_ms:>15.1f}ms {statistics.median(timings):>8.2f}ms {p95:>8.2f}ms")
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.achievements")
+    parser.add_argument("--history", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.history, args.runs))
@@ -0,0 +1,66 @@
+"""
+Cost of the get_current_user dependency alone, with the token and user caches warm against
+cleared before every call (a JWT decode and a users row read each time, the old behaviour).
+
+Each call gets its own session, as a request does.
+
+    python -m benchmarks.auth_dependency [--calls N]
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+
+from benchmarks import latency
+from app.core import deps
+from app.core.security import create_access_token
+from app.database import AsyncSessionLocal, async_engine, close_db, init_db
+from app.models.user import User
+
+
+async def _run(credentials, calls: int, cached: bool) -> tuple[list[float], int]:
+    statements = 0
+
+    def count(*args) -> None:
+        nonlocal statements
+        statements += 1
+
+    timings = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        for _ in range(calls):
+            if not cached:
+                deps._token_cache.clear()
+                deps._user_cache.clear()
+            started = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                await deps.get_current_user(credentials, db)
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    return timings, statements
+
+
+async def main(calls: int) -> None:
+    init_db()
+    async with AsyncSessionLocal() as db:
+        user = User(email="bench@example.com", hashed_password="-")
+        db.add(user)
+        await db.commit()
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token({"sub": str(user.id)}))
+    await _run(credentials, 100, cached=False)  # warm up the pool and imports
+
+    for label, cached in (("cache off", False), ("cache on", True)):
+        timings, statements = await _run(credentials, calls, cached)
+        print(f"{label:<10} {latency(timings)}  statements/call={statements / calls:.2f}")
+    print("cache stats:", deps.auth_cache_stats())
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.auth_dependency")
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls))
@@ -0,0 +1,43 @@
+"""
+Bulk ingestion throughput: rows/sec for /progress/bulk (JSON and NDJSON) and
+/nutrition/meals/bulk against one request per row.
+
+    python -m benchmarks.bulk_ingest [--rows N]
+"""
+import argparse
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def main(rows: int) -> None:
+    entries = [{"entry_type": "weight", "value": 70 + i / 100, "unit": "kg"} for i in range(rows)]
+    meals = [{"name": f"meal {i}", "calories": 300, "protein": 20} for i in range(rows)]
+    with TestClient(app) as client:
+        res = client.post("/auth/register", json={"email": "bench@example.com", "password": "bench123", "full_name": "Bench"})
+        headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+        def run(label: str, send) -> None:
+            started = time.perf_counter()
+            send()
+            elapsed = time.perf_counter() - started
+            print(f"{label:<28} {rows} rows in {elapsed * 1000:7.0f}ms  {rows / elapsed:9.0f} rows/s")
+
+        run("progress, one per request", lambda: [client.post("/progress/", json=r, headers=headers) for r in entries])
+        run("progress, bulk JSON", lambda: client.post("/progress/bulk", json=entries, headers=headers))
+        ndjson = "\n".join(json.dumps(r) for r in entries)
+        run("progress, bulk NDJSON", lambda: client.post(
+            "/progress/bulk", content=ndjson, headers={**headers, "Content-Type": "application/x-ndjson"}
+        ))
+        run("meals, one per request", lambda: [client.post("/nutrition/meals", json=m, headers=headers) for m in meals])
+        run("meals, bulk JSON", lambda: client.post("/nutrition/meals/bulk", json=meals, headers=headers))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bulk_ingest")
+    parser.add_argument("--rows", type=int, default=500)
+    args = parser.parse_args()
+    main(args.rows)
@@ -0,0 +1,73 @@
+"""
+Home-page load: /dashboard/summary (fresh and 304-revalidated) against the per-widget fan-out
+it replaces, called one after another and all at once.
+
+    python -m benchmarks.dashboard [--runs N]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks import app_client, latency, register
+from app.services.workout_service import DAY_NAMES
+
+FAN_OUT = [
+    "/auth/me", "/health/", "/workouts/plans", "/nutrition/plans", "/progress/",
+    "/nutrition/daily-totals", "/workouts/stats", "/achievements/",
+]
+
+
+async def _seed(client, headers: dict) -> None:
+    await client.post("/health/", json={"age": 30, "bmi": 24.2, "fitness_goal": "weight loss"}, headers=headers)
+    await client.post("/workouts/plans", headers=headers, json={"name": "Plan", "plan_data": {"daily_workouts": [
+        {"day": i + 1, "day_name": name, "focus": "full body", "exercises": [{"name": f"ex {j}"} for j in range(6)]}
+        for i, name in enumerate(DAY_NAMES)
+    ]}})
+    await client.post("/nutrition/plans", json={"name": "Cut", "daily_calories": 2000}, headers=headers)
+    await client.post("/progress/bulk", json=[{"entry_type": "weight", "value": 80 - i / 10} for i in range(500)], headers=headers)
+    await client.post("/nutrition/meals/bulk", json=[{"name": "meal", "calories": 500}] * 200, headers=headers)
+    await client.post("/workouts/complete/bulk", json=[{"exercise_name": "squat", "sets_completed": 3}] * 200, headers=headers)
+
+
+async def main(runs: int) -> None:
+    async with app_client() as client:
+        headers = await register(client)
+        await _seed(client, headers)
+
+        async def sequential():
+            for path in FAN_OUT:
+                (await client.get(path, headers=headers)).raise_for_status()
+
+        async def concurrent():
+            for r in await asyncio.gather(*(client.get(path, headers=headers) for path in FAN_OUT)):
+                r.raise_for_status()
+
+        async def summary():
+            (await client.get("/dashboard/summary", headers=headers)).raise_for_status()
+
+        etag = (await client.get("/dashboard/summary", headers=headers)).headers["etag"]
+
+        async def revalidate():
+            r = await client.get("/dashboard/summary", headers={**headers, "If-None-Match": etag})
+            assert r.status_code == 304, r.status_code
+
+        for label, send in (
+            (f"fan-out, {len(FAN_OUT)} sequential calls", sequential),
+            (f"fan-out, {len(FAN_OUT)} concurrent calls", concurrent),
+            ("/dashboard/summary", summary),
+            ("/dashboard/summary, 304", revalidate),
+        ):
+            await send()  # warm up
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                await send()
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"{label:<34} {latency(timings)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.dashboard")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
@@ -0,0 +1,85 @@
+"""
+Ingredient autocomplete latency on a synthetic dataset: the word-prefix index (FTS5 on
+SQLite) against the LIKE fallback, for prefixes typed as-is and words out of order.
+
+    python -m benchmarks.ingredient_search [--rows N] [--queries N]
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Iterator
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks import SCRATCH_DIR, latency
+from app.migrations import run_migrations
+from app.services.nutrition_service import _local_search, _search_backend, import_records, ingredient_key
+
+
+def _synthetic_records(n: int) -> Iterator[dict]:
+    rng = random.Random(17)
+    foods = (
+        "apple apricot avocado banana barley basil bean beef beet blueberry bread broccoli butter cabbage "
+        "carrot cashew cauliflower celery cheddar cheese cherry chicken chickpea chili cod coconut corn "
+        "couscous cranberry cream cucumber date egg eggplant fig flour garlic ginger grape guava ham "
+        "hazelnut honey kale kiwi lamb leek lemon lentil lettuce lime mango milk millet mint mushroom "
+        "mustard oat okra olive onion orange papaya paneer parsley pasta pea peach peanut pear pepper "
+        "pineapple plum pork potato pumpkin quinoa radish raisin rice salmon sardine semolina sesame "
+        "shrimp spinach squash strawberry sugar tofu tomato tuna turkey turmeric walnut watermelon "
+        "wheat yogurt zucchini"
+    ).split()
+    forms = "raw cooked boiled baked fried roasted steamed grilled dried canned frozen fresh smoked pickled".split()
+    extras = "whole sliced diced ground mashed puree juice powder flakes paste sauce low fat organic unsalted".split()
+    seen: set[str] = set()
+    while len(seen) < n:
+        name = f"{rng.choice(foods)} {rng.choice(forms)} {rng.choice(extras)} {rng.randint(1, 99)}"
+        if name not in seen:
+            seen.add(name)
+            yield {"name": name, "calories": rng.uniform(10, 600), "protein": rng.uniform(0, 40)}
+
+
+def _queries(records: list[dict], n: int) -> list[str]:
+    rng = random.Random(0)
+    queries = []
+    for _ in range(n):
+        words = rng.choice(records)["name"].split()
+        if rng.random() < 0.5:  # typing the start of a name: "chi", "chicken gr"
+            q = " ".join(words[:rng.randint(1, 2)])
+            queries.append(q[:rng.randint(2, len(q))])
+        else:  # words out of order: "gri chick"
+            queries.append(f"{words[1][:rng.randint(2, 5)]} {words[0][:rng.randint(2, 5)]}")
+    return queries
+
+
+async def _search(path: str, queries: list[str]) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with async_sessionmaker(engine)() as db:
+        for backend in (await _search_backend(db), "like"):
+            timings = []
+            for q in queries:
+                started = time.perf_counter()
+                await _local_search(db, ingredient_key(q), 10, backend=backend)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"autocomplete ({backend:<5}) {latency(timings)}")
+    await engine.dispose()
+
+
+def main(rows: int, queries: int) -> None:
+    path = f"{SCRATCH_DIR}/ingredients.db"
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    started = time.perf_counter()
+    records = list(_synthetic_records(rows))
+    print(import_records(records, engine), f"import {time.perf_counter() - started:.1f}s")
+    engine.dispose()
+    asyncio.run(_search(path, _queries(records, queries)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.ingredient_search")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.rows, args.queries)
@@ -0,0 +1,67 @@
+"""
+Mixed load: login throughput and the latency of other endpoints while logins are hashing.
+
+--logins clients log in back to back while --readers clients read /progress/, for --seconds
+per setting of PASSWORD_HASH_WORKERS (0 = the event loop's default thread pool, which is
+where bcrypt competed with every other request before the dedicated pool).
+
+    python -m benchmarks.login_load [--workers 0 4] [--logins N] [--readers N] [--seconds S]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks import app_client, latency
+from app.core import security
+
+
+async def _mixed(client, email: str, headers: dict, logins: int, readers: int, seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    login_ok = login_busy = 0
+    reads: list[float] = []
+
+    async def login() -> None:
+        nonlocal login_ok, login_busy
+        while time.perf_counter() < deadline:
+            res = await client.post("/auth/login", json={"email": email, "password": "bench123"})
+            if res.status_code == 503:
+                login_busy += 1
+            else:
+                res.raise_for_status()
+                login_ok += 1
+
+    async def read() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            (await client.get("/progress/", headers=headers)).raise_for_status()
+            reads.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(login() for _ in range(logins)), *(read() for _ in range(readers)))
+    print(f"  logins: {login_ok / seconds:6.1f}/s ({login_busy} answered 503)")
+    print(f"  /progress/ {latency(reads)}")
+
+
+async def main(workers: list[int], logins: int, readers: int, seconds: float) -> None:
+    async with app_client() as client:
+        email = "login-bench@example.com"
+        res = await client.post("/auth/register", json={"email": email, "password": "bench123", "full_name": "Bench"})
+        res.raise_for_status()
+        headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+        await client.post("/progress/bulk", json=[{"entry_type": "weight", "value": 80 - i / 10} for i in range(100)], headers=headers)
+
+        for n in workers:
+            security.shutdown_password_hasher()
+            security.PASSWORD_HASH_WORKERS = n
+            await client.post("/auth/login", json={"email": email, "password": "bench123"})  # start the pool
+            print(f"PASSWORD_HASH_WORKERS={n}, {logins} login clients, {readers} readers, {seconds:.0f}s")
+            await _mixed(client, email, headers, logins, readers, seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.login_load")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, security.PASSWORD_HASH_WORKERS or 4])
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.logins, args.readers, args.seconds))
@@ -0,0 +1,70 @@
+"""
+Progress series latency over a large history: --rows weight entries spread across five years,
+read as daily buckets over 90 days, weekly over two years and monthly over everything.
+
+    python -m benchmarks.progress_series [--rows N] [--runs N]
+"""
+import argparse
+import asyncio
+import math
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks import SCRATCH_DIR
+from app.migrations import run_migrations
+from app.models.progress import ProgressEntry
+from app.services.progress_service import np, progress_series
+
+
+def _seed(path: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    run_migrations(engine)
+    rng = random.Random(21)
+    t0 = datetime(2026, 10, 1) - timedelta(days=5 * 365)
+    step = 5 * 365 * 86400 / rows
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO users (id, email, hashed_password, is_active) VALUES (1, 'b@x', '-', 1)")
+        for chunk in range(0, rows, 50_000):
+            conn.execute(insert(ProgressEntry), [
+                {
+                    "user_id": 1, "entry_type": "weight", "unit": "kg",
+                    "value": 80 - 8 * i / rows + math.sin(i / 500) + rng.gauss(0, 0.3),
+                    "recorded_at": t0 + timedelta(seconds=i * step),
+                }
+                for i in range(chunk, min(chunk + 50_000, rows))
+            ])
+    engine.dispose()
+    print(f"inserted {rows} entries in {time.perf_counter() - started:.1f}s (numpy={'yes' if np else 'no'})")
+
+
+async def _series(path: str, runs: int) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with async_sessionmaker(engine)() as db:
+        for bucket, days in (("day", 90), ("week", 730), ("month", None)):
+            start = datetime(2026, 10, 1) - timedelta(days=days) if days else None
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                res = await progress_series(db, 1, "weight", start=start, bucket=bucket)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"{bucket:>5} over {str(days or 'all'):>4} days: entries={res['count']:>8} "
+                  f"buckets={len(res['buckets']):>5} points={len(res['series'])} "
+                  f"median={statistics.median(timings):.0f}ms")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.progress_series")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    path = f"{SCRATCH_DIR}/progress.db"
+    _seed(path, args.rows)
+    asyncio.run(_series(path, args.runs))
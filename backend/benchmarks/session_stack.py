@@ -0,0 +1,99 @@
+"""
+Latency under concurrency: the async session stack against the old threadpool model.
+
+Two routes run the same read (a user's latest progress entries). One is an async handler on
+get_async_db; the other is a sync `def` on get_db, which Starlette runs in its threadpool
+(40 threads), as every router did before. Each round fires --clients requests at once.
+
+    python -m benchmarks.session_stack [--clients N] [--rounds N]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import latency
+
+
+def _bench_app():
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    from app.database import get_async_db, get_db
+    from app.models.progress import ProgressEntry
+
+    def latest(user_id: int):
+        return (
+            select(ProgressEntry)
+            .where(ProgressEntry.user_id == user_id)
+            .order_by(ProgressEntry.recorded_at.desc())
+            .limit(50)
+        )
+
+    app = FastAPI()
+
+    @app.get("/threadpool")
+    def threadpool(db: Session = Depends(get_db)):
+        return len(db.execute(latest(1)).scalars().all())
+
+    @app.get("/async")
+    async def async_(db: AsyncSession = Depends(get_async_db)):
+        return len((await db.execute(latest(1))).scalars().all())
+
+    return app
+
+
+def _seed(rows: int) -> None:
+    from sqlalchemy import insert
+
+    from app.database import SessionLocal, init_db
+    from app.models.progress import ProgressEntry
+    from app.models.user import User
+
+    init_db()
+    t0 = datetime(2026, 1, 1)
+    with SessionLocal() as db:
+        db.add(User(id=1, email="bench@example.com", hashed_password="-"))
+        db.flush()
+        db.execute(insert(ProgressEntry), [
+            {"user_id": 1, "entry_type": "weight", "value": 80 - i / rows, "unit": "kg",
+             "recorded_at": t0 + timedelta(hours=i)}
+            for i in range(rows)
+        ])
+        db.commit()
+
+
+async def main(clients: int, rounds: int) -> None:
+    import httpx
+
+    from app.database import close_db
+
+    _seed(500)
+    transport = httpx.ASGITransport(app=_bench_app())
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+        for path in ("/threadpool", "/async"):
+            await client.get(path)  # warm up
+            timings = []
+
+            async def one() -> None:
+                started = time.perf_counter()
+                (await client.get(path)).raise_for_status()
+                timings.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            for _ in range(rounds):
+                await asyncio.gather(*(one() for _ in range(clients)))
+            elapsed = time.perf_counter() - started
+            print(f"{path:<11} {clients} concurrent  {len(timings) / elapsed:7.0f} req/s  {latency(timings)}")
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.session_stack")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.rounds))
@@ -0,0 +1,71 @@
+"""
+Startup cost of the migration runner: a cold migrate of an empty database, a warm start
+(schema already current: one version check), and several workers starting together on an
+empty database, as uvicorn --workers N does.
+
+Each start uses a new engine, so connecting is part of the timing, as in a new process.
+
+    python -m benchmarks.startup [--runs N] [--workers N]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, event
+
+from benchmarks import SCRATCH_DIR, latency
+from app.database import _apply_sqlite_pragmas
+from app.migrations import LATEST_VERSION, run_migrations
+
+_files = 0
+
+
+def _engine(path: str | None = None):
+    global _files
+    if path is None:
+        _files += 1
+        path = f"{SCRATCH_DIR}/startup-{_files}.db"
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", _apply_sqlite_pragmas)  # WAL, as the app runs
+    return engine
+
+
+def _start(engine) -> float:
+    started = time.perf_counter()
+    assert run_migrations(engine) == LATEST_VERSION
+    elapsed = (time.perf_counter() - started) * 1000
+    engine.dispose()
+    return elapsed
+
+
+def main(runs: int, workers: int) -> None:
+    print(f"schema version {LATEST_VERSION}")
+    print(f"{'cold (empty database)':<32} {latency([_start(_engine()) for _ in range(runs)])}")
+
+    warm = _engine()
+    run_migrations(warm)
+    path = warm.url.database
+    statements: list[str] = []
+    probe = _engine(path)
+    event.listen(probe, "before_cursor_execute", lambda conn, cur, stmt, *a: statements.append(stmt))
+    _start(probe)
+    print(f"{'warm (schema current)':<32} {latency([_start(_engine(path)) for _ in range(runs)])}  "
+          f"statements={len(statements)}")
+
+    timings = []
+    with ThreadPoolExecutor(workers) as pool:
+        for _ in range(runs):
+            engines = [_engine()] * workers  # one database, every worker on its own connection
+            started = time.perf_counter()
+            list(pool.map(run_migrations, engines))
+            timings.append((time.perf_counter() - started) * 1000)
+            engines[0].dispose()
+    print(f"{f'{workers} workers, empty database':<32} {latency(timings)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    main(args.runs, args.workers)
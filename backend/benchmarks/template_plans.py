@@ -0,0 +1,41 @@
+"""
+Template plan engine: time per plan over every profile in ASSESSMENT_GRID, cold (plans built)
+and warm (plans cached), the share of profiles it covers, and optionally one LLM generation
+for comparison (needs GROQ_API_KEY).
+
+    python -m benchmarks.template_plans [--llm]
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+
+from app.services.workout_service import ASSESSMENT_GRID, coverage_report, template_plan
+
+
+def main(llm: bool) -> None:
+    grid = [dict(zip(ASSESSMENT_GRID, c)) for c in itertools.product(*ASSESSMENT_GRID.values())]
+    for label in ("cold", "warm"):
+        timings = []
+        for p in grid:
+            started = time.perf_counter()
+            template_plan(p)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f"template ({label}): n={len(timings)} p50={statistics.median(timings):.3f}ms "
+              f"p99={timings[int(len(timings) * 0.99)]:.3f}ms max={timings[-1]:.3f}ms")
+    print("coverage:", coverage_report(grid))
+    if llm:
+        from app.services.plan_jobs import PROFILE_DEFAULTS, _generate
+
+        started = time.perf_counter()
+        asyncio.run(_generate(dict(PROFILE_DEFAULTS), 0))
+        print(f"llm: {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.template_plans")
+    parser.add_argument("--llm", action="store_true", help="also time one LLM plan generation")
+    args = parser.parse_args()
+    main(args.llm)
@@ -0,0 +1,79 @@
+"""
+Write throughput on /nutrition/meals and /progress/: the SQLite engine profile (WAL,
+synchronous=NORMAL, mmap, busy timeout) against SQLite's defaults (rollback journal).
+
+Both runs go through the app; the defaults run swaps get_async_db for sessions on a second
+database file whose connections get no pragmas.
+
+    python -m benchmarks.write_throughput [--clients N] [--requests N]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks import SCRATCH_DIR, app_client, latency, register
+
+
+async def _load(client, headers: dict, clients: int, requests: int) -> None:
+    timings: dict[str, list[float]] = {"/nutrition/meals": [], "/progress/": []}
+    failures = 0
+
+    async def writer(n: int) -> None:
+        nonlocal failures
+        for i in range(requests):
+            path, body = (
+                ("/nutrition/meals", {"name": f"meal {n}.{i}", "calories": 450, "protein": 30})
+                if (n + i) % 2 else
+                ("/progress/", {"entry_type": "weight", "value": 70 + i / 100, "unit": "kg"})
+            )
+            started = time.perf_counter()
+            res = await client.post(path, json=body, headers=headers)
+            timings[path].append((time.perf_counter() - started) * 1000)
+            failures += res.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(n) for n in range(clients)))
+    elapsed = time.perf_counter() - started
+    total = clients * requests
+    print(f"  {total} writes in {elapsed:.2f}s = {total / elapsed:7.0f} writes/s, {failures} failed")
+    for path, values in timings.items():
+        print(f"  {path:<17} {latency(values)}")
+
+
+async def main(clients: int, requests: int) -> None:
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    from app.database import get_async_db
+    from app.main import app
+    from app.migrations import run_migrations
+
+    async with app_client() as client:
+        print(f"engine profile (WAL), {clients} clients x {requests} writes")
+        await _load(client, await register(client), clients, requests)
+
+        path = f"{SCRATCH_DIR}/defaults.db"
+        run_migrations(create_engine(f"sqlite:///{path}"))
+        plain = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=AsyncAdaptedQueuePool)
+        Session = async_sessionmaker(plain, autoflush=False, expire_on_commit=False)
+
+        async def plain_db():
+            async with Session() as db:
+                yield db
+
+        app.dependency_overrides[get_async_db] = plain_db
+        try:
+            print(f"SQLite defaults (rollback journal), {clients} clients x {requests} writes")
+            await _load(client, await register(client), clients, requests)
+        finally:
+            app.dependency_overrides.pop(get_async_db)
+            await plain.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.write_throughput")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.requests))
@@ -0,0 +1 @@
+"""Operational commands. Run from backend/: python -m scripts.<name> [--help]"""
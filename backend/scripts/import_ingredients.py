@@ -0,0 +1,19 @@
+"""
+Bulk-load an ingredient dataset into the ingredients table (and its search index).
+
+    python -m scripts.import_ingredients FILE   # CSV (, ; or tab separated), JSON array or NDJSON
+"""
+import argparse
+import time
+
+from app.database import init_db
+from app.services.nutrition_service import import_ingredients
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m scripts.import_ingredients")
+    parser.add_argument("file")
+    args = parser.parse_args()
+
+    init_db()
+    started = time.perf_counter()
+    print(import_ingredients(args.file), f"{time.perf_counter() - started:.1f}s")
@@ -0,0 +1,68 @@
+"""
+Shared fixtures. DATABASE_URL points at a throwaway SQLite file before anything imports
+app.database, so the suite never touches a real database.
+"""
+import os
+import tempfile
+import uuid
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='arogyamitra-test-')}/test.db"
+os.environ.setdefault("GROQ_API_KEY", "")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def register(client):
+    """Create a user and return its Authorization headers."""
+    def _register() -> dict:
+        res = client.post("/auth/register", json={
+            "email": f"{uuid.uuid4().hex[:12]}@example.com", "password": "secret123", "full_name": "Test User",
+        })
+        assert res.status_code == 200, res.text
+        return {"Authorization": f"Bearer {res.json()['access_token']}"}
+    return _register
+
+
+@pytest.fixture
+def auth(register):
+    return register()
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_statements():
+    """Context manager factory recording every SQL statement the async engine runs."""
+    from contextlib import contextmanager
+
+    from app.database import async_engine
+
+    @contextmanager
+    def _count():
+        counter = StatementCounter()
+        event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+    return _count
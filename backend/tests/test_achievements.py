@@ -0,0 +1,83 @@
+"""Achievements: seeded once from history, then unlocked incrementally as thresholds are crossed."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.database import AsyncSessionLocal
+from app.models.nutrition import Meal
+from app.models.progress import ProgressEntry
+from app.services.achievements import crossed
+
+
+def _unlocked(res) -> list[str]:
+    assert res.status_code == 200, res.text
+    return sorted(a["id"] for a in res.json()["unlocked_achievements"])
+
+
+def _log(client, headers, entries: list[dict]) -> list[str]:
+    return _unlocked(client.post("/progress/bulk", json=entries, headers=headers))
+
+
+def _weigh(client, headers, value: float, unit: str) -> list[str]:
+    return _unlocked(client.post("/progress/", json={"entry_type": "weight", "value": value, "unit": unit}, headers=headers))
+
+
+def test_crossed_returns_thresholds_in_half_open_range():
+    assert [r.code for r in crossed("sets", 99, 1000)] == ["sets_100", "sets_1000"]
+    assert [r.code for r in crossed("sets", 100, 999)] == []
+    assert crossed("sets", 500, 400) == [] and crossed("no_such_metric", 0, 10) == []
+
+
+def test_counters_are_seeded_from_history(client, auth):
+    user_id = client.get("/auth/me", headers=auth).json()["id"]
+    t0 = datetime(2026, 1, 1, 8)
+
+    async def history() -> None:  # rows written before achievements were evaluated on writes
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(ProgressEntry), [
+                *({"user_id": user_id, "entry_type": "weight", "value": 80 - d, "unit": "kg",
+                   "recorded_at": t0 + timedelta(days=d)} for d in range(7)),
+                {"user_id": user_id, "entry_type": "steps", "value": 12_000, "recorded_at": t0},
+            ])
+            await db.execute(insert(Meal), [{"user_id": user_id, "name": "oats", "logged_at": t0}] * 3)
+            await db.commit()
+
+    client.portal.call(history)
+    res = client.get("/achievements/", headers=auth)
+    assert res.status_code == 200, res.text
+    by_id = {a["id"]: a for a in res.json()["achievements"]}
+    assert sorted(k for k, a in by_id.items() if a["unlocked"]) == [
+        "first_meal", "first_steps", "steps_10k", "week_warrior", "weight_loss_1", "weight_loss_5",
+    ]
+    assert by_id["meals_50"]["progress"] == {"value": 3, "target": 50}
+    assert by_id["weight_loss_10"]["progress"] == {"value": 6, "target": 10}
+
+
+def test_unlocks_when_a_threshold_is_crossed(client, auth):
+    assert _weigh(client, auth, 80, "kg") == ["first_steps"]
+    assert _weigh(client, auth, 79.2, "kg") == []
+    assert _weigh(client, auth, 78.9, "kg") == ["weight_loss_1"]
+    assert _weigh(client, auth, 78.5, "kg") == []  # already unlocked
+
+
+def test_weight_loss_converts_pounds(client, register):
+    pounds = register()
+    assert _weigh(client, pounds, 176, "lb") == ["first_steps"]
+    assert _weigh(client, pounds, 175, "lbs") == []  # 0.45 kg, not 1
+    assert _weigh(client, pounds, 173.5, "lb") == ["weight_loss_1"]
+
+    mixed = register()
+    _weigh(client, mixed, 176, "lb")  # 79.8 kg
+    assert _weigh(client, mixed, 79, "kg") == []
+    assert _weigh(client, mixed, 78.7, "kg") == ["weight_loss_1"]
+
+
+def test_backfilled_day_recounts_the_streak(client, auth):
+    today = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0)
+
+    def day(n: int) -> dict:
+        return {"entry_type": "mood", "value": 4, "recorded_at": (today - timedelta(days=n)).isoformat()}
+
+    assert _log(client, auth, [day(n) for n in (6, 5, 4)]) == ["first_steps"]
+    assert _log(client, auth, [day(n) for n in (2, 1, 0)]) == []
+    assert _log(client, auth, [day(3)]) == ["week_warrior"]  # joins 3 + 3 days into 7
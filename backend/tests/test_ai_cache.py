@@ -0,0 +1,52 @@
+"""AI response cache: near matches never return an answer to a different question."""
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.services import ai_cache
+
+SYSTEM = {"role": "system", "content": "You are AROMI."}
+MODEL = "llama-test"
+
+
+def _ask(text: str, system: dict = SYSTEM) -> list[dict]:
+    return [system, {"role": "user", "content": text}]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(ai_cache, "AI_CACHE_ENABLED", True)
+    monkeypatch.setattr(ai_cache, "AI_CACHE_SEMANTIC", True)
+    return ai_cache.ResponseCache()
+
+
+def test_similarity_tier_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("AI_CACHE_SEMANTIC", raising=False)
+    assert ai_cache.AI_CACHE_SEMANTIC is False
+
+
+def test_rephrasing_hits(cache):
+    cache.store(_ask("What are some good sources of protein for vegetarians?"), MODEL, "Lentils, tofu, dairy.")
+    assert cache.lookup(_ask("what are good sources of protein for vegetarians"), MODEL) == "Lentils, tofu, dairy."
+    assert cache.semantic_hits == 1
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Is it safe to run with knee pain?", "Is it safe to run without knee pain?"),
+    ("I only get 5 hours of sleep, is that ok?", "I only get 8 hours of sleep, is that ok?"),
+    ("How many push ups should a beginner do?", "How many pull ups should a beginner do?"),
+    ("Should I eat carbs before a workout?", "Should I not eat carbs before a workout?"),
+    ("Is 2 litres of water a day enough?", "Is 3 litres of water a day enough?"),
+])
+@pytest.mark.parametrize("threshold", [0.95, 0.5])
+def test_different_questions_miss(cache, monkeypatch, stored, asked, threshold):
+    monkeypatch.setattr(ai_cache, "AI_CACHE_SIMILARITY", threshold)
+    cache.store(_ask(stored), MODEL, "stored answer")
+    assert cache.lookup(_ask(asked), MODEL) is None
+
+
+def test_near_match_stays_within_system_prompt(cache):
+    cache.store(_ask("What are some good sources of protein for vegetarians?"), MODEL, "Lentils, tofu, dairy.")
+    other = {"role": "system", "content": "You are a nutrition assistant."}
+    assert cache.lookup(_ask("what are good sources of protein for vegetarians", other), MODEL) is None
+    assert cache.lookup(_ask("what are good sources of protein for vegetarians"), MODEL) == "Lentils, tofu, dairy."
@@ -0,0 +1,69 @@
+"""Bulk endpoints: per-row validation by index, NDJSON bodies and the row cap."""
+import json
+
+import pytest
+
+from app.core import bulk
+
+# endpoint, listing that shows the inserted rows, a valid row, an invalid one
+ENDPOINTS = {
+    "progress": ("/progress/bulk", "/progress/", {"entry_type": "weight", "value": 70.5}, {"value": "heavy"}),
+    "meals": ("/nutrition/meals/bulk", "/nutrition/meals", {"name": "oats", "calories": 350}, {"calories": 100}),
+    "workouts": (
+        "/workouts/complete/bulk", "/progress/", {"exercise_name": "squat", "sets_completed": 3}, {"sets_completed": "x"},
+    ),
+}
+
+
+def _listed_ids(client, headers, path: str) -> list[int]:
+    res = client.get(path, params={"fields": "id", "limit": 500}, headers=headers)
+    assert res.status_code == 200, res.text
+    return sorted(r["id"] for r in res.json())
+
+
+@pytest.mark.parametrize("kind", sorted(ENDPOINTS))
+def test_mixed_payload_inserts_only_valid_rows(client, auth, kind):
+    path, listing, good, bad = ENDPOINTS[kind]
+    res = client.post(path, json=[good, bad, good, "not an object", good], headers=auth)
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert (body["received"], body["inserted"]) == (5, 3)
+    assert [e["index"] for e in body["errors"]] == [1, 3]
+    assert all(e["errors"] for e in body["errors"])
+    assert [i is None for i in body["ids"]] == [False, True, False, True, False]
+    assert _listed_ids(client, auth, listing) == sorted(i for i in body["ids"] if i is not None)
+
+
+@pytest.mark.parametrize("kind", sorted(ENDPOINTS))
+def test_ndjson_body(client, auth, kind):
+    path, listing, good, bad = ENDPOINTS[kind]
+    lines = [json.dumps(good), "", json.dumps(bad), "{not json", json.dumps(good)]
+    res = client.post(path, content="\n".join(lines) + "\n",
+                      headers={**auth, "Content-Type": "application/x-ndjson"})
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert (body["received"], body["inserted"]) == (4, 2)  # blank lines are not rows
+    assert [e["index"] for e in body["errors"]] == [1, 2]
+    assert _listed_ids(client, auth, listing) == sorted(i for i in body["ids"] if i is not None)
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+@pytest.mark.parametrize("kind", sorted(ENDPOINTS))
+def test_over_the_row_limit_inserts_nothing(client, auth, monkeypatch, kind, ndjson):
+    monkeypatch.setattr(bulk, "BULK_MAX_ROWS", 3)
+    path, listing, good, _ = ENDPOINTS[kind]
+    rows = [good] * 4
+    if ndjson:
+        res = client.post(path, content="\n".join(map(json.dumps, rows)),
+                          headers={**auth, "Content-Type": "application/x-ndjson"})
+    else:
+        res = client.post(path, json=rows, headers=auth)
+    assert res.status_code == 413, res.text
+    assert "3 rows" in res.json()["detail"]
+    assert _listed_ids(client, auth, listing) == []
+    assert client.post(path, json=rows[:3], headers=auth).json()["inserted"] == 3
+
+
+def test_non_array_body_is_rejected(client, auth):
+    res = client.post("/progress/bulk", json={"entry_type": "weight"}, headers=auth)
+    assert res.status_code == 400
@@ -0,0 +1,69 @@
+"""AROMI prompt context: every turn is either in the summary or in the prompt."""
+from app.database import AsyncSessionLocal
+from app.models.chat import ChatMessage, ChatSession
+from app.models.user import User
+from app.services import chat_context
+
+
+async def _session_with_messages(count: int, summarized: int = 0) -> ChatSession:
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"ctx-{count}-{summarized}@example.com", hashed_password="x", full_name="Ctx")
+        db.add(user)
+        await db.flush()
+        session = ChatSession(user_id=user.id, title="t")
+        db.add(session)
+        await db.flush()
+        messages = [
+            ChatMessage(session_id=session.id, role="user" if i % 2 == 0 else "assistant", content=f"turn {i}")
+            for i in range(count)
+        ]
+        db.add_all(messages)
+        await db.flush()
+        if summarized:
+            session.summary = "earlier turns"
+            session.summary_through_id = messages[summarized - 1].id
+        await db.commit()
+        return session
+
+
+async def _context(count: int, summarized: int = 0) -> list[str]:
+    session = await _session_with_messages(count, summarized)
+    async with AsyncSessionLocal() as db:
+        messages = await chat_context.build_context(db, session, "new question", "system")
+    return [m["content"] for m in messages]
+
+
+def test_aged_out_turns_stay_in_prompt_until_summarized(client):
+    # One short of a summary batch beyond the recent window: nothing is summarized yet
+    count = chat_context.HISTORY_MESSAGES + chat_context.SUMMARY_BATCH_MESSAGES - 1
+    contents = client.portal.call(_context, count)
+    assert contents[1:-1] == [f"turn {i}" for i in range(count)]
+
+
+def test_context_resumes_right_after_the_summary(client):
+    count, summarized = chat_context.HISTORY_MESSAGES + 12, 10
+    contents = client.portal.call(_context, count, summarized)
+    assert contents[1] == "Summary of the earlier conversation: earlier turns"
+    assert contents[2:-1] == [f"turn {i}" for i in range(summarized, count)]
+
+
+def test_refresh_summary_folds_a_batch_and_context_continues_after_it(client, monkeypatch):
+    from app.services import ai_agent
+
+    async def fake_summary(messages, **kwargs):
+        return " goals: run 5k "
+
+    monkeypatch.setattr(ai_agent, "get_ai_response", fake_summary)
+    count = chat_context.HISTORY_MESSAGES + chat_context.SUMMARY_BATCH_MESSAGES
+    session = client.portal.call(_session_with_messages, count)
+    client.portal.call(chat_context.refresh_summary, session.id)
+
+    async def reload_and_build():
+        async with AsyncSessionLocal() as db:
+            fresh = await db.get(ChatSession, session.id)
+            return fresh, await chat_context.build_context(db, fresh, "new question", "system")
+
+    fresh, messages = client.portal.call(reload_and_build)
+    assert fresh.summary == "goals: run 5k"
+    contents = [m["content"] for m in messages]
+    assert contents[2:-1] == [f"turn {i}" for i in range(chat_context.SUMMARY_BATCH_MESSAGES, count)]
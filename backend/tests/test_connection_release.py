@@ -0,0 +1,90 @@
+"""Slow calls (Groq, YouTube, password hashing) run without holding a pooled database connection."""
+from app.database import async_engine
+
+
+def _checked_out() -> int:
+    return async_engine.pool.checkedout()
+
+
+def test_chat_releases_connection_during_llm_call(client, auth, monkeypatch):
+    from app.routers import aromi
+
+    seen = []
+
+    async def fake_ai_response(messages, **kwargs):
+        seen.append(_checked_out())
+        return "Stay hydrated."
+
+    monkeypatch.setattr(aromi, "get_ai_response", fake_ai_response)
+    res = client.post("/aromi/chat", json={"message": "How much water?"}, headers=auth)
+    assert res.status_code == 200, res.text
+    assert seen == [0]
+
+    follow_up = client.post("/aromi/chat", json={"message": "And after a run?", "session_id": res.json()["session_id"]}, headers=auth)
+    assert follow_up.status_code == 200 and seen == [0, 0]
+    messages = client.get(f"/aromi/sessions/{res.json()['session_id']}/messages", headers=auth)
+    assert messages.status_code == 200 and len(messages.json()) == 4
+
+
+def test_plan_videos_release_connection_during_youtube_calls(client, auth, monkeypatch):
+    from app.services import workout_service
+
+    plan = {"daily_workouts": [{"day": 1, "day_name": "Monday", "focus": "legs", "exercises": [{"name": "Goblet squat"}]}]}
+    plan_id = client.post("/workouts/plans", json={"name": "P", "plan_data": plan}, headers=auth).json()["id"]
+    seen = []
+
+    async def fake_search(names, api_key):
+        seen.append(_checked_out())
+        return {key: {"video_id": "abc123", "title": "t", "channel": "c", "duration": "PT1M"} for key in names}
+
+    monkeypatch.setattr(workout_service, "YOUTUBE_API_KEY", "test-key")
+    monkeypatch.setattr(workout_service, "_search_videos", fake_search)
+    client.portal.call(workout_service.attach_plan_videos, plan_id)  # on the app's event loop
+    assert seen == [0]
+    today = client.portal.call(_plan_day_exercises, plan_id)
+    assert today[0]["video_id"] == "abc123"
+
+
+async def _plan_day_exercises(plan_id: int) -> list[dict]:
+    from sqlalchemy import select
+
+    from app.database import AsyncSessionLocal
+    from app.models.workout import PlanDay
+
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(PlanDay.exercises).where(PlanDay.plan_id == plan_id, PlanDay.day_of_week == 0))
+
+
+def test_auth_releases_connection_while_hashing(client, monkeypatch):
+    from app.core import security
+    from app.routers import auth
+
+    seen = []
+
+    async def fake_hash(password):
+        seen.append(_checked_out())
+        return security.get_password_hash(password)
+
+    async def fake_verify(plain, hashed):
+        seen.append(_checked_out())
+        return True, security.get_password_hash(plain)  # as if BCRYPT_ROUNDS had been raised
+
+    monkeypatch.setattr(auth, "hash_password_async", fake_hash)
+    monkeypatch.setattr(auth, "verify_and_update_password_async", fake_verify)
+    credentials = {"email": "hasher@example.com", "password": "secret123"}
+    assert client.post("/auth/register", json=credentials).status_code == 200
+    assert client.post("/auth/register", json=credentials).status_code == 400
+    stored = client.portal.call(_hashed_password, credentials["email"])
+    assert client.post("/auth/login", json=credentials).status_code == 200
+    assert seen == [0, 0]
+    assert client.portal.call(_hashed_password, credentials["email"]) != stored  # rehash written afterwards
+
+
+async def _hashed_password(email: str) -> str:
+    from sqlalchemy import select
+
+    from app.database import AsyncSessionLocal
+    from app.models.user import User
+
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(User.hashed_password).where(User.email == email))
@@ -0,0 +1,43 @@
+"""/dashboard/summary: one document, one pooled connection, ETag revalidation."""
+from sqlalchemy import event
+
+from app.database import async_engine
+
+
+class PeakConnections:
+    def __init__(self):
+        self.current = self.peak = 0
+
+    def checkout(self, *args):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def checkin(self, *args):
+        self.current -= 1
+
+
+def test_summary_uses_one_connection(client, auth):
+    client.post("/nutrition/meals", json={"name": "oats", "calories": 300}, headers=auth)
+    client.post("/workouts/complete", json={"exercise_name": "squat", "sets_completed": 3}, headers=auth)
+    pool = async_engine.sync_engine.pool
+    peak = PeakConnections()
+    event.listen(pool, "checkout", peak.checkout)
+    event.listen(pool, "checkin", peak.checkin)
+    try:
+        res = client.get("/dashboard/summary", headers=auth)
+    finally:
+        event.remove(pool, "checkout", peak.checkout)
+        event.remove(pool, "checkin", peak.checkin)
+    assert res.status_code == 200, res.text
+    assert peak.peak == 1
+    body = res.json()
+    assert body["nutrition"]["calories"] == 300 and body["streak"]["current"] == 1
+
+
+def test_summary_revalidates_with_etag(client, auth):
+    first = client.get("/dashboard/summary", headers=auth)
+    etag = first.headers["etag"]
+    assert client.get("/dashboard/summary", headers={**auth, "If-None-Match": etag}).status_code == 304
+    client.post("/nutrition/meals", json={"name": "apple", "calories": 95}, headers=auth)
+    changed = client.get("/dashboard/summary", headers={**auth, "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
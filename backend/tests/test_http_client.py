@@ -0,0 +1,68 @@
+"""Upstream circuit breaker: half-open probes always end, and quota/rate-limit answers trip it."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import http_client
+from app.services.http_client import CircuitOpen, Upstream, UpstreamError
+
+
+def _fake(monkeypatch, handler) -> list[httpx.Request]:
+    sent = []
+
+    def record(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return handler(request)
+
+    fake = httpx.AsyncClient(transport=httpx.MockTransport(record))
+    monkeypatch.setattr(http_client, "get_http_client", lambda: fake)
+    return sent
+
+
+def _upstream(**options) -> Upstream:
+    return Upstream("fake", "http://upstream.test", breaker_threshold=1, breaker_reset=0, **options)
+
+
+def test_probe_that_fails_unexpectedly_does_not_wedge_the_breaker(monkeypatch):
+    _fake(monkeypatch, lambda request: httpx.Response(503))
+    upstream = _upstream(max_retries=0)
+    with pytest.raises(UpstreamError):
+        asyncio.run(upstream.request("GET", "/x"))
+    assert upstream.breaker.state == "half_open"
+
+    def broken(request: httpx.Request) -> httpx.Response:
+        raise ValueError("not an upstream failure")
+
+    _fake(monkeypatch, broken)
+    with pytest.raises(ValueError):
+        asyncio.run(upstream.request("GET", "/x"))  # the probe
+
+    _fake(monkeypatch, lambda request: httpx.Response(200, json={}))
+    assert asyncio.run(upstream.request("GET", "/x")).status_code == 200  # next probe let through
+    assert upstream.breaker.state == "closed"
+
+
+@pytest.mark.parametrize("status, attempts", [(402, 1), (429, 3)])
+def test_quota_and_rate_limit_count_as_failures(monkeypatch, status, attempts):
+    sent = _fake(monkeypatch, lambda request: httpx.Response(status))
+    upstream = Upstream("fake", "http://upstream.test", breaker_threshold=1, breaker_reset=60)
+    monkeypatch.setattr(http_client.asyncio, "sleep", _no_sleep)
+    with pytest.raises(UpstreamError) as e:
+        asyncio.run(upstream.request("GET", "/x"))
+    assert e.value.status_code == status
+    assert len(sent) == attempts  # 402 is not retried; 429 is
+    assert upstream.breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        asyncio.run(upstream.request("GET", "/x"))
+
+
+def test_other_client_errors_are_the_callers_business(monkeypatch):
+    _fake(monkeypatch, lambda request: httpx.Response(404))
+    upstream = _upstream()
+    assert asyncio.run(upstream.request("GET", "/x")).status_code == 404
+    assert upstream.breaker.state == "closed" and upstream.counters["client_errors"] == 1
+
+
+async def _no_sleep(delay: float) -> None:
+    return None
@@ -0,0 +1,9 @@
+"""Ingredient dataset import: column mapping."""
+from app.services.nutrition_service import _import_row
+
+
+def test_only_an_explicit_column_becomes_the_spoonacular_id():
+    fdc = _import_row({"id": "171688", "description": "Apples, raw", "energy_kcal": "52"})
+    assert fdc["spoonacular_id"] is None
+    assert fdc["name"] == "Apples, raw" and fdc["calories"] == 52.0
+    assert _import_row({"spoonacular_id": "9003", "name": "apple"})["spoonacular_id"] == 9003
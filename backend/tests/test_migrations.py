@@ -0,0 +1,153 @@
+"""The migrated schema matches the models, backfills legacy rows and indexes the hot per-user queries."""
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.pool import QueuePool
+
+from app.migrations import LATEST_VERSION, current_version, run_migrations
+from app.models.chat import ChatMessage, ChatSession
+from app.models.health import HealthAssessment
+from app.models.nutrition import Meal, NutritionPlan
+from app.models.plan_job import PlanJob
+from app.models.progress import ProgressEntry
+from app.models.workout import PlanDay, Workout, WorkoutPlan
+
+HOT_QUERIES = {
+    "ix_progress_entries_user_recorded": select(ProgressEntry).where(ProgressEntry.user_id == 1)
+    .order_by(ProgressEntry.recorded_at.desc()).limit(100),
+    "ix_progress_entries_user_type_recorded_value": select(ProgressEntry.recorded_at, ProgressEntry.value)
+    .where(ProgressEntry.user_id == 1, ProgressEntry.entry_type == "weight", ProgressEntry.recorded_at >= "2026-01-01"),
+    "ix_meals_user_logged": select(Meal).where(Meal.user_id == 1).order_by(Meal.logged_at.desc()).limit(100),
+    "ix_meals_nutrition_plan": select(Meal).where(Meal.nutrition_plan_id.in_([1, 2, 3])),
+    "ix_nutrition_plans_user_created": select(NutritionPlan).where(NutritionPlan.user_id == 1)
+    .order_by(NutritionPlan.created_at.desc()),
+    "ix_workouts_user_created": select(Workout).where(Workout.user_id == 1).order_by(Workout.created_at.desc()).limit(100),
+    "ix_workout_plans_user_created": select(WorkoutPlan).where(WorkoutPlan.user_id == 1)
+    .order_by(WorkoutPlan.created_at.desc()).limit(1),
+    "ix_health_assessments_user_updated": select(HealthAssessment).where(HealthAssessment.user_id == 1)
+    .order_by(HealthAssessment.updated_at.desc()).limit(1),
+    "ix_chat_sessions_user_updated": select(ChatSession).where(ChatSession.user_id == 1)
+    .order_by(ChatSession.updated_at.desc()).limit(50),
+    "ix_chat_messages_session_created": select(ChatMessage).where(ChatMessage.session_id == 1)
+    .order_by(ChatMessage.created_at.desc()).limit(50),
+    "ix_plan_jobs_hash_status": select(PlanJob).where(PlanJob.request_hash == "h", PlanJob.status.in_(["queued", "running"])),
+    "ix_plan_days_user_day_plan": select(PlanDay).where(PlanDay.user_id == 1, PlanDay.day_of_week == 0)
+    .order_by(PlanDay.plan_created_at.desc(), PlanDay.plan_id.desc()).limit(1),
+}
+
+
+@pytest.fixture(scope="module")
+def migrated(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('migrations')}/plan.db")
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_migrations_reach_latest_version(migrated):
+    assert current_version(migrated) == LATEST_VERSION
+    assert run_migrations(migrated) == LATEST_VERSION  # idempotent
+
+
+@pytest.mark.parametrize("index", sorted(HOT_QUERIES))
+def test_hot_query_uses_index(migrated, index):
+    sql = HOT_QUERIES[index].compile(migrated, compile_kwargs={"literal_binds": True})
+    with migrated.connect() as conn:
+        plan = " | ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert index in plan, plan
+
+
+def test_migrated_schema_matches_models(migrated):
+    """Steps carry frozen DDL; together they must still produce what app.models declares."""
+    from app.database import Base
+
+    inspector = inspect(migrated)
+    for table in Base.metadata.sorted_tables:
+        columns = {c["name"]: c for c in inspector.get_columns(table.name)}
+        assert set(columns) == set(table.columns.keys()), table.name
+        for column in table.columns:
+            assert columns[column.name]["nullable"] == column.nullable, f"{table.name}.{column.name}"
+        indexes = {i["name"]: (i["column_names"], bool(i["unique"])) for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            assert indexes.get(index.name) == ([c.name for c in index.columns], bool(index.unique)), index.name
+
+
+def test_busy_timeout_restored_on_pooled_connection(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/lock.db", pool_size=1, poolclass=QueuePool)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA busy_timeout=1234")
+    run_migrations(engine)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 1234
+    engine.dispose()
+
+
+def test_backfills_from_legacy_rows(tmp_path, monkeypatch):
+    """Steps 9, 11 and 13 derive rollups, workout stats and plan days from rows written before them."""
+    import app.migrations as migrations
+
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:8])
+    run_migrations(engine)
+    monkeypatch.undo()
+    plan = {"daily_workouts": [
+        {"day": 1, "day_name": "Monday", "focus": "legs", "exercises": [{"name": "squat"}], "warmup": "jog"},
+        {"day": 3, "focus": "arms", "total_duration": 30, "exercises": [{"name": "curl"}, "junk"]},
+    ]}
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@b', '-')"))
+        conn.execute(text(
+            "INSERT INTO meals (user_id, name, calories, protein, logged_at) VALUES "
+            "(1, 'a', 300, 10, '2026-03-01 08:00:00.000000'), (1, 'b', 200, NULL, '2026-03-01 20:00:00.000000'), "
+            "(1, 'c', 500, 30, '2026-03-02 12:00:00.000000')"
+        ))
+        conn.execute(
+            text("INSERT INTO progress_entries (user_id, entry_type, value, metadata, recorded_at) VALUES "
+                 "(1, 'workout_exercise', :sets, :meta, :at)"),
+            [
+                {"sets": 3, "meta": json.dumps({"exercise_name": "Bench  Press", "reps_completed": 10}), "at": "2026-03-01 09:00:00.000000"},
+                {"sets": 2, "meta": json.dumps({"exercise_name": "bench press", "sets_completed": 4}), "at": "2026-03-02 09:00:00.000000"},
+                {"sets": 1, "meta": None, "at": "2026-03-04 09:00:00.000000"},
+            ],
+        )
+        conn.execute(
+            text("INSERT INTO workout_plans (id, user_id, name, plan_data, created_at) VALUES (7, 1, 'p', :data, NULL)"),
+            {"data": json.dumps(json.dumps(plan))},  # plan_data once stored double-encoded
+        )
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        logs = conn.execute(text(
+            "SELECT substr(date, 1, 10), total_calories, total_protein, meal_count FROM nutrition_logs ORDER BY date"
+        )).all()
+        assert logs == [("2026-03-01", 500, 10, 2), ("2026-03-02", 500, 30, 1)]
+
+        totals = conn.execute(text(
+            "SELECT exercise_key, exercise_name, completions, sets, reps FROM exercise_totals ORDER BY exercise_key"
+        )).all()
+        assert totals == [("bench press", "bench press", 2, 7, 10), ("unknown", "unknown", 1, 1, 0)]
+        weeks = conn.execute(text("SELECT substr(start, 1, 10), completions FROM workout_period_stats WHERE period = 'week'")).all()
+        assert weeks == [("2026-02-23", 1), ("2026-03-02", 2)]
+        stats = conn.execute(text(
+            "SELECT completions, active_days, current_streak, longest_streak, substr(last_active_date, 1, 10) "
+            "FROM workout_user_stats"
+        )).one()
+        assert tuple(stats) == (3, 3, 1, 2, "2026-03-04")
+
+    days = {d.day_of_week: d for d in _plan_days(engine)}
+    assert len(days) == 7
+    assert (days[0].focus, days[0].exercises, days[0].details) == ("legs", [{"name": "squat"}], {"warmup": "jog"})
+    assert (days[2].focus, days[2].total_duration, days[2].exercises) == ("arms", 30.0, [{"name": "curl"}])
+    assert days[1].exercises == [] and days[1].focus is None
+    assert days[0].plan_created_at == datetime(1970, 1, 1)
+    engine.dispose()
+
+
+def _plan_days(engine):
+    with engine.connect() as conn:
+        return conn.execute(
+            select(PlanDay.day_of_week, PlanDay.focus, PlanDay.total_duration, PlanDay.exercises, PlanDay.details,
+                   PlanDay.plan_created_at).where(PlanDay.plan_id == 7)
+        ).all()
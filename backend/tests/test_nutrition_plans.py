@@ -0,0 +1,42 @@
+"""Nutrition plans with their meals: constant query count and per-user isolation."""
+
+
+def _plan_with_meals(client, headers, meals: int) -> int:
+    plan_id = client.post("/nutrition/plans", json={"name": "Plan"}, headers=headers).json()["id"]
+    res = client.post(f"/nutrition/plans/{plan_id}/meals", json=[{"name": f"meal {i}"} for i in range(meals)], headers=headers)
+    assert res.status_code == 200, res.text
+    return plan_id
+
+
+def _list_plans_statements(client, headers, count_statements) -> int:
+    client.get("/nutrition/plans", headers=headers)  # warm the auth cache
+    with count_statements() as counter:
+        res = client.get("/nutrition/plans", headers=headers)
+    assert res.status_code == 200
+    return len([s for s in counter.statements if s.lstrip().upper().startswith("SELECT")])
+
+
+def test_list_plans_query_count_is_constant(client, register, count_statements):
+    one, many = register(), register()
+    _plan_with_meals(client, one, 3)
+    for _ in range(12):
+        _plan_with_meals(client, many, 3)
+
+    assert len(client.get("/nutrition/plans", headers=many).json()) == 12
+    single = _list_plans_statements(client, one, count_statements)
+    assert single == _list_plans_statements(client, many, count_statements)
+    assert single <= 2
+
+
+def test_meal_cannot_attach_to_another_users_plan(client, register):
+    owner, other = register(), register()
+    plan_id = _plan_with_meals(client, owner, 1)
+
+    res = client.post("/nutrition/meals", json={"name": "intruder", "nutrition_plan_id": plan_id}, headers=other)
+    assert res.status_code == 404
+
+    bulk = client.post("/nutrition/meals/bulk", json=[{"name": "intruder", "nutrition_plan_id": plan_id}], headers=other).json()
+    assert bulk["errors"] and bulk["errors"][0]["index"] == 0
+
+    meals = client.get("/nutrition/plans", headers=owner).json()[0]["meals"]
+    assert [m["name"] for m in meals] == ["meal 0"]
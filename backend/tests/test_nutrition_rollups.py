@@ -0,0 +1,71 @@
+"""nutrition_logs rollups stay equal to the sums over logged meals through adds, bulk adds and deletes."""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app.database import AsyncSessionLocal
+from app.services.nutrition_service import check_rollups
+
+FIELDS = ("calories", "protein", "carbs", "fat")
+
+
+def test_rollups_equal_meal_sums(client, auth):
+    user_id = client.get("/auth/me", headers=auth).json()["id"]
+    day1 = datetime.utcnow().replace(hour=8, minute=0, second=0, microsecond=0) - timedelta(days=3)
+    day2 = day1 + timedelta(days=1, hours=4)
+    plan = client.post("/nutrition/plans", json={"name": "Cut", "daily_calories": 1800}, headers=auth).json()["id"]
+    meals: dict[int, dict] = {}  # id -> meal as logged
+
+    def expected() -> dict[str, dict]:
+        days: dict[str, dict] = defaultdict(lambda: {"meal_count": 0, **{f"total_{f}": 0.0 for f in FIELDS}})
+        for m in meals.values():
+            row = days[m["logged_at"][:10]]
+            row["meal_count"] += 1
+            for f in FIELDS:
+                row[f"total_{f}"] += m.get(f) or 0
+        return dict(days)
+
+    def stored() -> dict[str, dict]:
+        res = client.get("/nutrition/logs", params={"limit": 500}, headers=auth)
+        assert res.status_code == 200, res.text
+        return {
+            r["date"][:10]: {k: round(r[k], 6) for k in ("meal_count", *(f"total_{f}" for f in FIELDS))}
+            for r in res.json() if r["meal_count"]
+        }
+
+    async def mismatches() -> list[dict]:
+        async with AsyncSessionLocal() as db:
+            return await check_rollups(db, user_id)
+
+    def check() -> None:
+        assert stored() == {d: {k: round(v, 6) for k, v in row.items()} for d, row in expected().items()}
+        assert client.portal.call(mismatches) == []
+
+    single = {"name": "eggs", "calories": 210.5, "protein": 18, "fat": 14}
+    res = client.post("/nutrition/meals", json=single, headers=auth)
+    assert res.status_code == 200, res.text
+    meals[res.json()["id"]] = {**single, "logged_at": datetime.utcnow().isoformat()}
+    check()
+
+    bulk = [
+        {"name": "oats", "calories": 350, "protein": 12, "carbs": 60, "fat": 6, "logged_at": day1.isoformat()},
+        {"name": "rice", "calories": 420.25, "carbs": 90, "logged_at": day1.isoformat()},
+        {"name": "dal", "calories": None, "protein": 9, "logged_at": day2.isoformat()},
+        {"name": "salad", "calories": 120, "logged_at": day2.isoformat()},
+        {"name": "planned", "calories": 900, "nutrition_plan_id": plan, "logged_at": day1.isoformat()},
+    ]
+    res = client.post("/nutrition/meals/bulk", json=bulk, headers=auth)
+    assert res.status_code == 200 and res.json()["inserted"] == 5, res.text
+    ids = res.json()["ids"]
+    meals.update({i: m for i, m in zip(ids[:4], bulk[:4])})  # a plan's meals are not eaten meals
+    check()
+
+    for meal_id in (ids[1], ids[4]):  # an eaten meal, then a plan meal
+        assert client.delete(f"/nutrition/meals/{meal_id}", headers=auth).status_code == 200
+        meals.pop(meal_id, None)
+        check()
+
+    for meal_id in (ids[2], ids[3]):  # day 2's last meals
+        assert client.delete(f"/nutrition/meals/{meal_id}", headers=auth).status_code == 200
+        meals.pop(meal_id)
+    check()
+    assert day2.date().isoformat() not in stored()
@@ -0,0 +1,73 @@
+"""Keyset pagination visits every row once, including rows whose sort timestamp is NULL."""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import Response
+from sqlalchemy import insert, select, update
+
+from app.core.pagination import NEXT_CURSOR_HEADER, PageParams, paginate
+from app.database import AsyncSessionLocal
+from app.models.nutrition import Meal
+
+
+async def _drop_timestamps(db, user_id: int, names: list[str]) -> None:
+    """Rows from before logged_at had a default (inserting None gets the default)."""
+    await db.execute(update(Meal).where(Meal.user_id == user_id, Meal.name.in_(names)).values(logged_at=None))
+    await db.commit()
+
+
+def test_cursor_pages_through_null_timestamps(client, auth):
+    """Legacy meals without logged_at come last, newest first, and are still paged through."""
+    user_id = client.get("/auth/me", headers=auth).json()["id"]
+    t0 = datetime(2026, 5, 1)
+
+    async def seed() -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(Meal), [
+                {"user_id": user_id, "name": f"m{i}", "logged_at": t0 + timedelta(hours=i % 4)} for i in range(10)
+            ])
+            await _drop_timestamps(db, user_id, ["m0", "m3", "m6", "m9"])
+
+    async def expected() -> list[int]:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(select(Meal.id, Meal.logged_at).where(Meal.user_id == user_id))).all()
+        dated = sorted((r for r in rows if r.logged_at), key=lambda r: (r.logged_at, r.id), reverse=True)
+        return [r.id for r in dated] + sorted((r.id for r in rows if r.logged_at is None), reverse=True)
+
+    client.portal.call(seed)
+    seen, cursor = [], None
+    while True:
+        res = client.get("/nutrition/meals", params={"limit": 3, "fields": "id", **({"cursor": cursor} if cursor else {})},
+                         headers=auth)
+        assert res.status_code == 200, res.text
+        seen += [m["id"] for m in res.json()]
+        cursor = res.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    assert seen == client.portal.call(expected)
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_null_cursor_values_round_trip(client, auth, descending):
+    user_id = client.get("/auth/me", headers=auth).json()["id"]
+    t0 = datetime(2026, 5, 1)
+
+    async def pages() -> list[list[str]]:
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(Meal), [
+                {"user_id": user_id, "name": name, "logged_at": at}
+                for name, at in [("a", t0), ("b", datetime(2026, 1, 1)), ("c", t0), ("d", datetime(2026, 1, 2))]
+            ])
+            await _drop_timestamps(db, user_id, ["a", "c"])
+            out, cursor = [], None
+            while True:
+                response = Response()
+                page = PageParams(cursor=cursor, limit=1, fields="name")
+                rows = await paginate(db, response, Meal, Meal.user_id == user_id,
+                                      order_by=(Meal.logged_at, Meal.id), page=page, descending=descending)
+                out.append([r["name"] for r in rows])
+                if not (cursor := response.headers.get(NEXT_CURSOR_HEADER)):
+                    return out
+
+    names = [n for page in client.portal.call(pages) for n in page]
+    assert names == (["d", "b", "c", "a"] if descending else ["a", "c", "b", "d"])
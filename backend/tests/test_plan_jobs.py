@@ -0,0 +1,81 @@
+"""Plan generation jobs always reach a terminal status."""
+import time
+
+import pytest
+
+from app.services import plan_jobs
+
+
+def _wait_for_terminal(client, headers, job_id: int, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/workouts/plans/jobs/{job_id}", headers=headers).json()
+        if job["status"] in plan_jobs.TERMINAL_STATUSES:
+            return job
+        time.sleep(0.05)
+    pytest.fail(f"job {job_id} still {job['status']}")
+
+
+def _submit(client, headers, **profile) -> int:
+    res = client.post("/workouts/plans/generate?engine=llm", json=profile, headers=headers)
+    assert res.status_code == 202, res.text
+    return res.json()["id"]
+
+
+@pytest.mark.parametrize("reply", [None, "", "   "])
+def test_parse_plan_rejects_empty_output(reply):
+    with pytest.raises(ValueError, match="empty"):
+        plan_jobs.parse_plan(reply)
+
+
+def test_unexpected_error_fails_the_job(client, auth, monkeypatch):
+    async def broken_generate(profile, job_id):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(plan_jobs, "_generate", broken_generate)
+    job = _wait_for_terminal(client, auth, _submit(client, auth, injuries=["unexpected"]))
+    assert job["status"] == "failed"
+    assert job["error"] == "Plan generation failed unexpectedly"
+
+
+def test_empty_model_reply_fails_after_retries(client, auth, monkeypatch):
+    from app.services import ai_agent
+
+    calls = []
+
+    async def empty_reply(messages, **kwargs):
+        calls.append(messages)
+        return None
+
+    monkeypatch.setattr(ai_agent, "get_ai_response", empty_reply)
+    job = _wait_for_terminal(client, auth, _submit(client, auth, injuries=["empty"]))
+    assert job["status"] == "failed" and "empty" in job["error"]
+    assert len(calls) == plan_jobs.PLAN_JOB_MAX_ATTEMPTS
+
+
+def test_recover_requeues_every_running_job(client, auth, monkeypatch):
+    """A restarted process owns no job yet, so even a job started a moment ago is re-queued."""
+    from datetime import datetime
+
+    from app.database import AsyncSessionLocal
+    from app.models.plan_job import PlanJob
+
+    user_id = client.get("/auth/me", headers=auth).json()["id"]
+
+    async def orphan() -> int:
+        async with AsyncSessionLocal() as db:
+            job = PlanJob(user_id=user_id, request_hash="orphan", status="running", started_at=datetime.utcnow())
+            db.add(job)
+            await db.commit()
+            return job.id
+
+    async def status(job_id: int) -> str:
+        async with AsyncSessionLocal() as db:
+            return (await db.get(PlanJob, job_id)).status
+
+    job_id = client.portal.call(orphan)
+    enqueued = []
+    monkeypatch.setattr(plan_jobs, "_enqueue", enqueued.append)
+    client.portal.call(plan_jobs._recover)
+    assert job_id in enqueued
+    assert client.portal.call(status, job_id) == "queued"
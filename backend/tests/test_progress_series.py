@@ -0,0 +1,75 @@
+"""Progress series: LTTB keeps the line's ends and extremes, numpy and pure Python agree, calendar moving averages."""
+import math
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import progress_service
+from app.services.progress_service import lttb, moving_average
+
+needs_numpy = pytest.mark.skipif(progress_service.np is None, reason="compares against the numpy path")
+
+
+def _pure_python(monkeypatch):
+    monkeypatch.setattr(progress_service, "np", None)
+
+
+@needs_numpy
+@pytest.mark.parametrize("n, threshold", [(10, 3), (1000, 50), (5003, 300), (20_000, 2000)])
+def test_lttb_numpy_and_python_pick_the_same_points(monkeypatch, n, threshold):
+    rng = random.Random(n)
+    xs = sorted(rng.uniform(0, 1e6) for _ in range(n))
+    ys = [math.sin(x / 5e4) * 10 + rng.gauss(0, 1) for x in xs]
+    vectorized = lttb(xs, ys, threshold)
+    _pure_python(monkeypatch)
+    assert lttb(xs, ys, threshold) == vectorized
+    assert len(vectorized[0]) == threshold
+
+
+@needs_numpy
+@pytest.mark.parametrize("window", [1, 3, 7, 30])
+def test_moving_average_numpy_and_python_agree(monkeypatch, window):
+    rng = random.Random(window)
+    positions = sorted(rng.sample(range(200), 120))
+    values = [rng.uniform(60, 90) for _ in positions]
+    vectorized = moving_average(values, positions, window)
+    _pure_python(monkeypatch)
+    assert moving_average(values, positions, window) == vectorized
+
+
+def test_moving_average_spans_calendar_buckets():
+    # buckets 0, 1, 2 then a gap to 9: ma_3 on bucket 9 only sees bucket 9
+    assert moving_average([1, 2, 3, 10], [0, 1, 2, 9], 3) == [None, None, 2.0, 10.0]
+    assert moving_average([1, 2], [0, 5], 3) == [None, 2.0]
+
+
+@pytest.mark.parametrize("grouped", [False, True])
+@pytest.mark.parametrize("numpy", [True, False])
+def test_series_keeps_first_last_and_extremes(client, auth, monkeypatch, grouped, numpy):
+    if not numpy:
+        _pure_python(monkeypatch)
+    if grouped:  # force SQL grouping into slots (MinMaxLTTB)
+        monkeypatch.setattr(progress_service, "SERIES_RAW_LIMIT", 100)
+    kind = f"weight-{int(grouped)}{int(numpy)}"
+    t0 = datetime(2026, 1, 1)
+    entries = [
+        {"entry_type": kind, "value": 80 + math.sin(i / 20), "recorded_at": (t0 + timedelta(hours=i)).isoformat()}
+        for i in range(900)
+    ]
+    entries[0]["value"], entries[-1]["value"] = 79.5, 80.5
+    entries[300]["value"], entries[611]["value"] = 95.0, 61.0  # spike and dip
+    assert client.post("/progress/bulk", json=entries, headers=auth).json()["inserted"] == 900
+
+    res = client.get("/progress/series", params={"entry_type": kind, "points": 40, "bucket": "week"}, headers=auth)
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert body["downsampled"] and len(body["series"]) == 40
+    values = [v for _, v in body["series"]]
+    assert {95.0, 61.0} <= set(values)
+    if not grouped:  # grouped slots start with their minimum and end with their maximum
+        assert body["series"][0] == [t0.isoformat(), 79.5]
+        assert body["series"][-1] == [(t0 + timedelta(hours=899)).isoformat(), 80.5]
+    assert [b["start"] for b in body["buckets"]] == ["2025-12-29", "2026-01-05", "2026-01-12", "2026-01-19",
+                                                     "2026-01-26", "2026-02-02"]
+    assert max(b["max"] for b in body["buckets"]) == 95.0 and min(b["min"] for b in body["buckets"]) == 61.0
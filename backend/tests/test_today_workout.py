@@ -0,0 +1,69 @@
+"""/workouts/today: the caller's calendar day (?tz=) picks the newest plan's day."""
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core import deps
+
+NOW = datetime(2026, 10, 18, 22, 30, tzinfo=timezone.utc)  # Sunday evening UTC, Monday in India
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW.astimezone(tz) if tz else NOW.replace(tzinfo=None)
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(deps, "datetime", _FrozenDatetime)
+
+
+def _plan(client, headers, name: str, days: list[dict]) -> int:
+    res = client.post("/workouts/plans", json={"name": name, "plan_data": {"daily_workouts": days}}, headers=headers)
+    assert res.status_code == 200, res.text
+    return res.json()["id"]
+
+
+def _today(client, headers, **params) -> dict:
+    res = client.get("/workouts/today", params=params, headers=headers)
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+def test_timezone_moves_the_day_across_midnight(client, auth):
+    _plan(client, auth, "old", [{"day_name": "Monday", "focus": "old", "exercises": [{"name": "walk"}]}])
+    plan_id = _plan(client, auth, "Split", [
+        {"day": 1, "day_name": "Monday", "focus": "legs", "exercises": [{"name": "squat", "sets": 3}]},
+        {"day": 7, "day_name": "Sunday", "focus": "recovery", "exercises": []},
+    ])
+
+    utc = _today(client, auth)
+    assert (utc["date"], utc["day_name"], utc["status"]) == ("2026-10-18", "Sunday", "rest_day")
+    assert utc["workout"]["focus"] == "recovery"
+
+    india = _today(client, auth, tz="Asia/Kolkata")
+    assert (india["date"], india["day_name"], india["status"]) == ("2026-10-19", "Monday", "scheduled")
+    assert (india["workout"]["plan_id"], india["workout"]["plan_name"]) == (plan_id, "Split")  # newest plan wins
+    assert india["workout"]["exercises"] == [{"name": "squat", "sets": 3}]
+
+    behind = _today(client, auth, tz="America/Los_Angeles")
+    assert (behind["date"], behind["status"]) == ("2026-10-18", "rest_day")
+
+
+def test_day_missing_from_the_plan_is_a_rest_day(client, auth):
+    _plan(client, auth, "Mondays", [{"day": 1, "focus": "legs", "exercises": [{"name": "squat"}]}])
+    today = _today(client, auth, tz="UTC")
+    assert today["status"] == "rest_day" and today["workout"]["exercises"] == []
+
+
+def test_without_a_plan(client, auth):
+    today = _today(client, auth)
+    assert (today["status"], today["workout"]) == ("no_plan", None)
+
+
+@pytest.mark.parametrize("tz", ["Mars/Olympus_Mons", "../../etc/passwd", ""])
+def test_unknown_timezone_is_rejected(client, auth, tz):
+    res = client.get("/workouts/today", params={"tz": tz}, headers=auth)
+    assert res.status_code == 400
+    assert "Unknown timezone" in res.json()["detail"]
@@ -0,0 +1,46 @@
+"""Incrementally maintained workout aggregates equal a full recount, whatever the arrival order."""
+from datetime import datetime, timedelta
+
+from app.database import AsyncSessionLocal
+from app.services.workout_stats import completion_key, rebuild_workout_stats
+
+
+def test_completion_key_folds_case_and_whitespace():
+    assert completion_key("  Push-Up\t Hold ") == "push-up hold"
+
+
+def test_out_of_order_completions_match_a_recount(client, auth):
+    user_id = client.get("/auth/me", headers=auth).json()["id"]
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def complete(days_ago: list[int], name: str = "Squat") -> None:
+        rows = [
+            {"exercise_name": name, "sets_completed": 3, "reps_completed": 10, "completed_at": (today - timedelta(days=d)).isoformat()}
+            for d in days_ago
+        ]
+        res = client.post("/workouts/complete/bulk", json=rows, headers=auth)
+        assert res.status_code == 200 and res.json()["inserted"] == len(rows), res.text
+
+    def stats() -> dict:
+        res = client.get("/workouts/stats", params={"days": 30, "weeks": 6}, headers=auth)
+        assert res.status_code == 200, res.text
+        return res.json()
+
+    async def recount() -> None:
+        async with AsyncSessionLocal() as db:
+            await rebuild_workout_stats(db, user_id)
+
+    complete([0, 1])                   # run 1: today, yesterday
+    complete([5, 3, 4])                # run 2, out of order and older than the last active day
+    complete([3], name="  squat ")     # same day again, same exercise under another spelling
+    assert stats()["streak"] == {"current": 2, "longest": 3, "last_active_date": today.date().isoformat()}
+    complete([2])                      # the missing day joins the two runs
+    complete([20, 9])
+    incremental = stats()
+    assert incremental["streak"]["current"] == incremental["streak"]["longest"] == 6
+    assert incremental["totals"]["active_days"] == 8
+    assert [e["exercise_name"] for e in incremental["exercises"]] == ["Squat"]
+    assert incremental["exercises"][0]["completions"] == 9
+
+    client.portal.call(recount)
+    assert stats() == incremental
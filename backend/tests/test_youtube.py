@@ -0,0 +1,96 @@
+"""YouTube lookups against a fake API: id batching, cache TTLs and the concurrency cap."""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import update
+
+from app.database import AsyncSessionLocal
+from app.models.exercise_video import ExerciseVideo
+from app.services import http_client, workout_service, youtube_service
+from app.services.workout_service import exercise_key, get_workout_with_videos
+
+
+class FakeYouTube:
+    """Answers /search with one video per query (none for "nothing ..."), /videos with a duration per id."""
+
+    def __init__(self):
+        self.searches: list[str] = []
+        self.detail_batches: list[list[str]] = []
+        self.in_flight = self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        assert str(request.url).startswith(youtube_service.upstream.base_url)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if request.url.path.endswith("/search"):
+                query = request.url.params["q"]
+                self.searches.append(query)
+                items = [] if query.startswith("nothing") else [
+                    {"id": {"videoId": f"v-{query.split()[0]}"}, "snippet": {"title": query, "channelTitle": "c"}}
+                ]
+                return httpx.Response(200, json={"items": items})
+            ids = request.url.params["id"].split(",")
+            self.detail_batches.append(ids)
+            return httpx.Response(200, json={"items": [{"id": i, "contentDetails": {"duration": "PT1M"}} for i in ids]})
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def fake_youtube(monkeypatch):
+    fake = FakeYouTube()
+    monkeypatch.setattr(http_client, "get_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(fake)))
+    monkeypatch.setattr(youtube_service, "_semaphore", None)
+    return fake
+
+
+def test_video_details_are_fetched_50_ids_per_call(fake_youtube):
+    ids = [f"id{i}" for i in range(120)]
+    details = asyncio.run(youtube_service.get_video_details(ids + ids[:10], api_key="test-key"))
+    assert [len(b) for b in fake_youtube.detail_batches] == [50, 50, 20]
+    assert sorted(d["id"] for d in details) == sorted(ids)
+
+
+def test_cache_misses_share_the_concurrency_cap(client, fake_youtube, monkeypatch):
+    monkeypatch.setattr(youtube_service, "YOUTUBE_MAX_CONCURRENCY", 3)
+    run = uuid.uuid4().hex[:8]
+    exercises = [{"name": f"cap{i}-{run} squat"} for i in range(12)]
+    enriched = client.portal.call(get_workout_with_videos, exercises, "test-key")
+    assert len(fake_youtube.searches) == 12
+    assert fake_youtube.max_in_flight == 3
+    assert all(e["video_id"] == f"v-{e['name'].split()[0]}" for e in enriched)
+
+
+def test_cache_rows_expire_after_their_ttl(client, fake_youtube):
+    run = uuid.uuid4().hex[:8]
+    found, missing = f"ttl-{run} lunge", f"nothing-{run} at all"
+    exercises = [{"name": found}, {"name": missing}]
+
+    def lookup() -> list[str]:
+        fake_youtube.searches.clear()
+        client.portal.call(get_workout_with_videos, exercises, "test-key")
+        return sorted(q.split()[0] for q in fake_youtube.searches)
+
+    async def age(name: str, by: timedelta) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(ExerciseVideo).where(ExerciseVideo.exercise_key == exercise_key(name))
+                .values(fetched_at=datetime.utcnow() - by)
+            )
+            await db.commit()
+
+    assert lookup() == sorted([f"ttl-{run}", f"nothing-{run}"])
+    assert lookup() == []  # both cached, "no video" included
+
+    negative_ttl = timedelta(hours=workout_service.YOUTUBE_NEGATIVE_TTL_HOURS)
+    client.portal.call(age, missing, negative_ttl + timedelta(minutes=1))
+    client.portal.call(age, found, negative_ttl + timedelta(minutes=1))
+    assert lookup() == [f"nothing-{run}"]  # a found video is kept far longer
+
+    client.portal.call(age, found, timedelta(days=workout_service.YOUTUBE_CACHE_TTL_DAYS, minutes=1))
+    assert lookup() == [f"ttl-{run}"]
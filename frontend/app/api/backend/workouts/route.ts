@@ -1,14 +1,10 @@
 import { NextRequest, NextResponse } from "next/server"
-import { getTokenFromCookie } from "@/lib/backend-api"
-import { API_CONFIG } from "@/config/api"
+import { fetchAllPages, getTokenFromCookie } from "@/lib/backend-api"
 
 export async function GET(req: NextRequest) {
   const token = getTokenFromCookie(req.headers.get("cookie") ?? null)
   if (!token) return NextResponse.json({ error: "Not authenticated" }, { status: 401 })
-  const res = await fetch(`${API_CONFIG.getBackendUrl()}/workouts/`, {
-    headers: { Authorization: `Bearer ${token}` },
-  })
-  if (!res.ok) return NextResponse.json(await res.json().catch(() => ({})), { status: res.status })
-  const data = await res.json()
-  return NextResponse.json(data)
+  const page = await fetchAllPages("/workouts/", token)
+  if (!page.ok) return NextResponse.json(await page.response.json().catch(() => ({})), { status: page.response.status })
+  return NextResponse.json(page.items)
 }
@@ -1,15 +1,13 @@
 import { NextRequest, NextResponse } from "next/server"
-import { getTokenFromCookie } from "@/lib/backend-api"
+import { fetchAllPages, getTokenFromCookie } from "@/lib/backend-api"
 import { API_CONFIG } from "@/config/api"
 
 export async function GET(req: NextRequest) {
     const token = getTokenFromCookie(req.headers.get("cookie") ?? null)
     if (!token) return NextResponse.json({ error: "Unauthorized" }, { status: 401 })
-    const res = await fetch(`${API_CONFIG.getBackendUrl()}/progress/`, {
-        headers: { Authorization: `Bearer ${token}` },
-    })
-    if (!res.ok) return NextResponse.json({ history: [] })
-    return NextResponse.json(await res.json())
+    const page = await fetchAllPages("/progress/", token)
+    if (!page.ok) return NextResponse.json({ history: [] })
+    return NextResponse.json(page.items)
 }
 
 export async function POST(req: NextRequest) {
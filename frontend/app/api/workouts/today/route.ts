@@ -43,34 +43,27 @@ export async function GET(req: NextRequest) {
   const token = getTokenFromCookie(req.headers.get("cookie") ?? null)
   if (!token) return NextResponse.json({ error: "Unauthorized" }, { status: 401 })
 
-  const today = new Date()
-  const dayName = DAY_NAMES[today.getDay()]
+  // The backend resolves the day from its plan_days index; pass the caller's timezone through.
+  const tz = req.nextUrl.searchParams.get("tz") || Intl.DateTimeFormat().resolvedOptions().timeZone || "UTC"
+  let dayName = DAY_NAMES[new Date().getDay()]
 
-  let plan: { id?: number; plan_data?: string | { daily_workouts?: DailyWorkout[] } } | null = null
+  let todayWorkout: (DailyWorkout & { plan_id?: number }) | null = null
   try {
-    const res = await fetch(`${API_CONFIG.getBackendUrl()}/workouts/plans`, {
+    const res = await fetch(`${API_CONFIG.getBackendUrl()}/workouts/today?tz=${encodeURIComponent(tz)}`, {
       headers: { Authorization: `Bearer ${token}` },
       cache: "no-store",
     })
     if (res.ok) {
-      const plans = await res.json()
-      plan = Array.isArray(plans) && plans.length > 0 ? plans[0] : null
+      const data = await res.json()
+      dayName = data.day_name ?? dayName
+      // days the plan leaves out come back empty; treat them like before (fallback below)
+      const w = data.workout
+      todayWorkout = w && (w.focus || w.exercises?.length) ? w : null
     }
   } catch {
     // backend unreachable
   }
 
-  let planData = plan?.plan_data
-  if (typeof planData === "string") {
-    try {
-      planData = JSON.parse(planData) as { daily_workouts?: DailyWorkout[] }
-    } catch {
-      planData = undefined
-    }
-  }
-  const dailyWorkouts = (planData as { daily_workouts?: DailyWorkout[] } | undefined)?.daily_workouts ?? []
-  const todayWorkout = dailyWorkouts.find((d: DailyWorkout) => d.day_name?.toLowerCase() === dayName.toLowerCase())
-
   if (todayWorkout) {
     const exercises = todayWorkout.exercises ?? []
     return NextResponse.json({
@@ -82,7 +75,7 @@ export async function GET(req: NextRequest) {
         warmup: todayWorkout.warmup ?? "",
         cooldown: todayWorkout.cooldown ?? "",
         exercises: exercises.map((e) => mapExercise(e)),
-        plan_id: String(plan?.id ?? ""),
+        plan_id: String(todayWorkout.plan_id ?? ""),
         status: "incomplete",
         completed_exercises: [],
       },
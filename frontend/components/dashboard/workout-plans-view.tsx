@@ -138,7 +138,7 @@ export function WorkoutPlansView({
   const [genStatus, setGenStatus] = useState("Preparing your plan...")
 
   const fetchToday = useCallback(async () => {
-    const res = await fetch("/api/workouts/today")
+    const res = await fetch(`/api/workouts/today?tz=${encodeURIComponent(Intl.DateTimeFormat().resolvedOptions().timeZone)}`)
     const data = await res.json()
     setTodayWorkout(data)
     if (data.workout?.completed_exercises) {
@@ -29,6 +29,30 @@ export async function fetchBackend(
   return fetch(url, { ...rest, headers })
 }
 
+const NEXT_CURSOR_HEADER = "X-Next-Cursor"
+const PAGE_LIMIT = 500 // backend MAX_LIMIT
+
+/**
+ * GET a keyset-paginated list endpoint and follow X-Next-Cursor until the last page.
+ * Resolves to the concatenated items, or to the first failed page's response.
+ */
+export async function fetchAllPages<T = unknown>(
+  path: string,
+  token: string
+): Promise<{ ok: true; items: T[] } | { ok: false; response: Response }> {
+  const items: T[] = []
+  let cursor: string | null = null
+  do {
+    const sep = path.includes("?") ? "&" : "?"
+    const query = `limit=${PAGE_LIMIT}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""}`
+    const res = await fetchBackend(`${path}${sep}${query}`, { token, cache: "no-store" })
+    if (!res.ok) return { ok: false, response: res }
+    items.push(...((await res.json()) as T[]))
+    cursor = res.headers.get(NEXT_CURSOR_HEADER)
+  } while (cursor)
+  return { ok: true, items }
+}
+
 // Auth
 export async function loginBackend(email: string, password: string) {
   const r = await fetchBackend("/auth/login", {